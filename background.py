@@ -1,13 +1,16 @@
 import pygame
-import random
 import math
-from typing import List, Tuple
+import numpy as np
+from typing import List, Optional, Tuple
 from constants import COLORS
+from palette import PALETTE
 
 class Background:
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, rng: Optional[np.random.Generator] = None):
         self.width = width
         self.height = height
+        # Eigener Zufallsgenerator, damit der Hintergrund den Spielablauf nicht beeinflusst
+        self.rng = rng if rng is not None else np.random.default_rng()
         
         # Berechne die gewünschte Anzahl von Punkten (wie vorher)
         desired_cols = self.width // 100  # Ungefähr ein Punkt alle 100 Pixel
@@ -17,51 +20,59 @@ class Background:
         self.grid_size_x = self.width / desired_cols
         self.grid_size_y = self.height / desired_rows
         self.line_thickness = 1
+        self.line_color = (30, 30, 30)  # Dunkelgrau
+        self.point_color = (128, 128, 128)
         
         # Liste für Farbwechsel-Effekte
         self.color_change_effects = []
         
-        # Erstelle ein Raster von Punkten
-        self.points = []
-        for y in range(desired_rows + 1):
-            row = []
-            for x in range(desired_cols + 1):
-                # Berechne die exakte Position für jeden Punkt
-                pos_x = x * self.grid_size_x
-                pos_y = y * self.grid_size_y
-                row.append({
-                    'x': pos_x,
-                    'y': pos_y,
-                    'base_x': pos_x,
-                    'base_y': pos_y,
-                    'radius': random.randint(4, 10),
-                    'offset': random.uniform(0, 2 * math.pi),
-                    'color': (128, 128, 128),
-                    'inner_color': random.choice(COLORS)
-                })
-            self.points.append(row)
+        # Erstelle ein Raster von Punkten als NumPy-Arrays (Zeilen x Spalten)
+        shape = (desired_rows + 1, desired_cols + 1)
+        self.base_x, self.base_y = np.meshgrid(np.arange(shape[1]) * self.grid_size_x,
+                                               np.arange(shape[0]) * self.grid_size_y)
+        self.x = self.base_x.copy()
+        self.y = self.base_y.copy()
+        self.radius = self.rng.integers(4, 10, shape, endpoint=True)
+        self.offset = self.rng.uniform(0, 2 * math.pi, shape)
+        
+        # Innere Farben als Index in die Palette
+        self.palette: List[Tuple[int, int, int]] = list(COLORS)
+        self.inner_color = self.rng.integers(0, len(self.palette), shape)
+        
+        # Gecachte Punkt-Sprites pro (Radius, innere Farbe)
+        self.dot_sprites = {}
+
+        # Zuletzt von grid_changes() gesehene ganzzahlige Punktpositionen
+        self.last_grid = None
     
-    def update(self):
-        # Aktualisiere die Position der Punkte für eine subtile Bewegung
-        time = pygame.time.get_ticks() / 1000  # Zeit in Sekunden
-        for row in self.points:
-            for point in row:
-                # Kreisförmige Bewegung mit bis zu 4 Pixeln
-                point['x'] = point['base_x'] + math.cos(time + point['offset']) * 4
-                point['y'] = point['base_y'] + math.sin(time + point['offset']) * 4
+    def update(self, time: float):
+        # time ist die Simulationszeit in Sekunden; ein Aufruf pro Physik-Schritt
+        self.update_points(time)
         
         # Aktualisiere Farbwechsel-Effekte
         for effect in self.color_change_effects[:]:
             effect['radius'] += effect['speed']
+            effect['step'] += 1
             effect['angle'] += effect['rotation_speed']
             effect['lifetime'] -= 1
             
             if effect['lifetime'] <= 0 or effect['radius'] >= effect['max_radius']:
                 self.color_change_effects.remove(effect)
     
+    def update_points(self, time: float):
+        # Kreisförmige Bewegung mit bis zu 4 Pixeln, für alle Punkte auf einmal
+        phase = time + self.offset
+        np.add(self.base_x, np.cos(phase) * 4, out=self.x)
+        np.add(self.base_y, np.sin(phase) * 4, out=self.y)
+    
+    def palette_index(self, color: Tuple[int, int, int]) -> int:
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
+    
     def update_colors(self, active_balls, destroyed_ball_color=None):
         # Wenn keine Ballfarbe angegeben wurde, nichts tun
-        if destroyed_ball_color is None:
+        if destroyed_ball_color is None or destroyed_ball_color not in self.palette:
             return
             
         # Hole die Farben der noch aktiven Bälle
@@ -70,69 +81,113 @@ class Background:
             return
             
         # Aktualisiere nur die Punkte, die die gleiche Farbe wie der zerstörte Ball hatten
-        for row in self.points:
-            for point in row:
-                if point['inner_color'] == destroyed_ball_color:
-                    new_color = random.choice(available_colors)
-                    old_color = point['inner_color']
-                    point['inner_color'] = new_color
-                    
-                    # Erstelle Spiral-Effekt für diesen Punkt
-                    num_particles = 24  # Anzahl der Partikel bleibt gleich
-                    for i in range(num_particles):
-                        angle = (i / num_particles) * 2 * math.pi
-                        self.color_change_effects.append({
-                            'x': point['x'],
-                            'y': point['y'],
-                            'angle': angle,
-                            'radius': 0,
-                            'speed': 1.5,  # Reduziert von 3 auf 1.5 für langsamere Bewegung
-                            'rotation_speed': 0.15,  # Reduziert von 0.3 auf 0.15 für langsamere Rotation
-                            'lifetime': 90,  # Verdoppelt von 45 auf 90 für längere Dauer
-                            'max_radius': point['radius'] * 4,  # Erhöht von 3 auf 4 für größere Reichweite
-                            'old_color': old_color,
-                            'new_color': new_color
-                        })
+        old_index = self.palette.index(destroyed_ball_color)
+        for row, col in np.argwhere(self.inner_color == old_index):
+            new_color = available_colors[self.rng.integers(len(available_colors))]
+            self.inner_color[row, col] = self.palette_index(new_color)
+            
+            # Erstelle Spiral-Effekt für diesen Punkt; der Farbübergang kommt als
+            # Tabelle (eine Farbe pro Schritt) aus der Palette
+            num_particles = 24  # Anzahl der Partikel bleibt gleich
+            max_radius = int(self.radius[row, col]) * 4  # Erhöht von 3 auf 4 für größere Reichweite
+            speed = 1.5  # Reduziert von 3 auf 1.5 für langsamere Bewegung
+            colors = PALETTE.fade(destroyed_ball_color, new_color, max_radius, speed)
+            for i in range(num_particles):
+                angle = (i / num_particles) * 2 * math.pi
+                self.color_change_effects.append({
+                    'x': float(self.x[row, col]),
+                    'y': float(self.y[row, col]),
+                    'angle': angle,
+                    'radius': 0,
+                    'speed': speed,
+                    'rotation_speed': 0.15,  # Reduziert von 0.3 auf 0.15 für langsamere Rotation
+                    'lifetime': 90,  # Verdoppelt von 45 auf 90 für längere Dauer
+                    'max_radius': max_radius,
+                    'old_color': destroyed_ball_color,
+                    'new_color': new_color,
+                    'colors': colors,
+                    'step': 0
+                })
+    
+    def get_dot_sprite(self, radius: int, color_index: int) -> pygame.Surface:
+        key = (radius, color_index)
+        sprite = self.dot_sprites.get(key)
+        if sprite is None:
+            # Äußerer grauer Punkt und innerer farbiger Punkt (2/3 so groß) in einer Surface
+            sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, self.point_color, (radius, radius), radius)
+            pygame.draw.circle(sprite, self.palette[color_index], (radius, radius), int(radius * 2/3))
+            self.dot_sprites[key] = sprite
+        return sprite
     
     def draw(self, screen):
-        # Zeichne die Verbindungslinien
-        for i, row in enumerate(self.points):
-            for j, point in enumerate(row):
-                # Zeichne horizontale Linien
-                if j < len(row) - 1:
-                    start_pos = (int(point['x']), int(point['y']))
-                    end_pos = (int(row[j + 1]['x']), int(row[j + 1]['y']))
-                    color = (30, 30, 30)  # Dunkelgrau
-                    pygame.draw.line(screen, color, start_pos, end_pos, self.line_thickness)
-                
-                # Zeichne vertikale Linien
-                if i < len(self.points) - 1:
-                    start_pos = (int(point['x']), int(point['y']))
-                    end_pos = (int(self.points[i + 1][j]['x']), int(self.points[i + 1][j]['y']))
-                    pygame.draw.line(screen, color, start_pos, end_pos, self.line_thickness)
+        self.draw_grid(screen)
+        self.draw_effects(screen)
+
+    def grid_changes(self) -> Optional[List[pygame.Rect]]:
+        # Bereiche, in denen sich das Gitter seit dem letzten Aufruf verändert hat
+        # (None beim ersten Aufruf: alles)
+        xi = self.x.astype(int)
+        yi = self.y.astype(int)
+        last = self.last_grid
+        self.last_grid = (xi, yi)
+        if last is None:
+            return None
+        changed = np.argwhere((xi != last[0]) | (yi != last[1])).tolist()
+        new_x, new_y = xi.tolist(), yi.tolist()
+        last_x, last_y = last[0].tolist(), last[1].tolist()
+        rows, cols = xi.shape
+        pad = self.line_thickness + 1
+        rects = []
+        for row, col in changed:
+            # Der Punkt selbst, alt und neu
+            dot = int(self.radius[row, col]) + 2
+            left = min(new_x[row][col], last_x[row][col])
+            top = min(new_y[row][col], last_y[row][col])
+            right = max(new_x[row][col], last_x[row][col])
+            bottom = max(new_y[row][col], last_y[row][col])
+            rects.append(pygame.Rect(left - dot, top - dot, right - left + 2 * dot + 1, bottom - top + 2 * dot + 1))
+            # Die Linien zu den vier Nachbarn, alt und neu
+            for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if 0 <= r < rows and 0 <= c < cols:
+                    xs = (new_x[row][col], last_x[row][col], new_x[r][c], last_x[r][c])
+                    ys = (new_y[row][col], last_y[row][col], new_y[r][c], last_y[r][c])
+                    rects.append(pygame.Rect(min(xs) - pad, min(ys) - pad,
+                                             max(xs) - min(xs) + 2 * pad + 1, max(ys) - min(ys) + 2 * pad + 1))
+        return rects
+
+    def effect_rects(self) -> List[pygame.Rect]:
+        # Ein Rechteck pro Farbwechsel-Spirale (alle Partikel eines Punktes)
+        spirals = {(effect['x'], effect['y'], effect['radius']) for effect in self.color_change_effects}
+        return [pygame.Rect(int(x - radius) - 4, int(y - radius) - 4, int(2 * radius) + 9, int(2 * radius) + 9)
+                for x, y, radius in spirals]
+
+    def draw_grid(self, screen):
+        # Ganzzahlige Positionen aller Punkte als verschachtelte Listen [Zeile][Spalte] = [x, y]
+        xi = self.x.astype(int)
+        yi = self.y.astype(int)
+        rows = np.stack((xi, yi), axis=-1).tolist()
+        columns = np.stack((xi.T, yi.T), axis=-1).tolist()
         
-        # Zeichne die Punkte
-        for row in self.points:
-            for point in row:
-                # Zeichne den äußeren grauen Punkt
-                pygame.draw.circle(screen, point['color'], 
-                                 (int(point['x']), int(point['y'])), 
-                                 point['radius'])
-                
-                # Zeichne den inneren farbigen Punkt (2/3 so groß)
-                inner_radius = int(point['radius'] * 2/3)  # Zwei Drittel der Größe
-                pygame.draw.circle(screen, point['inner_color'],
-                                 (int(point['x']), int(point['y'])),
-                                 inner_radius)
+        # Zeichne die Verbindungslinien: ein Linienzug pro Zeile und pro Spalte
+        for points in rows:
+            pygame.draw.lines(screen, self.line_color, False, points, self.line_thickness)
+        for points in columns:
+            pygame.draw.lines(screen, self.line_color, False, points, self.line_thickness)
         
+        # Zeichne die Punkte als gecachte Sprites in einem Aufruf
+        radius = self.radius.ravel().tolist()
+        screen.blits([
+            (self.get_dot_sprite(r, c), (x - r, y - r))
+            for r, c, x, y in zip(radius, self.inner_color.ravel().tolist(),
+                                  xi.ravel().tolist(), yi.ravel().tolist())
+        ], doreturn=False)
+
+    def draw_effects(self, screen):
         # Zeichne Farbwechsel-Effekte
         for effect in self.color_change_effects:
-            # Berechne Farbübergang
-            progress = effect['radius'] / effect['max_radius']
-            color = tuple(
-                int(effect['old_color'][i] * (1 - progress) + effect['new_color'][i] * progress)
-                for i in range(3)
-            )
+            # Farbübergang aus der Tabelle
+            color = effect['colors'][effect['step']]
             
             # Berechne Position der Spiralpartikel
             x = effect['x'] + math.cos(effect['angle']) * effect['radius']
@@ -0,0 +1,160 @@
+import numpy as np
+from typing import List, Tuple
+from ball import Ball
+from constants import WIDTH, HEIGHT
+
+# Ball attributes that live in the engine's arrays instead of on the Ball
+ARRAY_FIELDS = ('x', 'y', 'prev_x', 'prev_y', 'dx', 'dy', 'radius', 'damage',
+                'survival_time', 'is_exploding', 'explosion_timer')
+
+
+class BallEngine:
+    """Struct-of-arrays state of many balls, advanced in vectorized steps.
+
+    Positions, velocities, radii, damage, survival time and explosion state
+    are NumPy arrays, one entry per ball. `move()` does what `Ball.move()`
+    does for every ball at once: remember the previous position, sample
+    the trail into a ring buffer, move and reflect off the walls. The
+    balls are replaced by `BallView`s on the arrays (`views`), so
+    collisions, rankings and drawing keep working on Ball attributes.
+
+    Every attribute access on a view goes through the arrays, which makes
+    per-ball code (collisions, CCD) slower than on plain Balls. Match
+    therefore does not use the engine; it is timed on its own in
+    benchmarks/bench_physics.py.
+    """
+
+    def __init__(self, balls: List[Ball]):
+        n = len(balls)
+        self.x = np.array([ball.x for ball in balls], dtype=float)
+        self.y = np.array([ball.y for ball in balls], dtype=float)
+        self.prev_x = np.array([ball.prev_x for ball in balls], dtype=float)
+        self.prev_y = np.array([ball.prev_y for ball in balls], dtype=float)
+        self.dx = np.array([ball.dx for ball in balls], dtype=float)
+        self.dy = np.array([ball.dy for ball in balls], dtype=float)
+        self.radius = np.array([ball.radius for ball in balls], dtype=np.int64)
+        self.damage = np.array([ball.damage for ball in balls], dtype=np.int64)
+        self.survival_time = np.array([ball.survival_time for ball in balls], dtype=np.int64)
+        self.is_exploding = np.array([ball.is_exploding for ball in balls], dtype=bool)
+        self.explosion_timer = np.array([ball.explosion_timer for ball in balls], dtype=np.int64)
+        self.effects = np.array([ball.effects for ball in balls], dtype=bool)
+        self.trail_gap = np.array([ball.trail_gap for ball in balls], dtype=float)
+        self.active = np.ones(n, dtype=bool)  # False once a ball is removed from the match
+
+        # Trail ring buffers: slot `trail_head[i]` of ball i is written next
+        self.trail_length = max((ball.trail_length for ball in balls), default=20)
+        self.trail = np.zeros((n, self.trail_length, 2))
+        self.trail_count = np.zeros(n, dtype=np.int64)
+        self.trail_head = np.zeros(n, dtype=np.int64)
+        for i, ball in enumerate(balls):
+            positions = list(ball.trail)[-self.trail_length:]
+            if positions:
+                self.trail[i, :len(positions)] = positions
+            self.trail_count[i] = len(positions)
+            self.trail_head[i] = len(positions) % self.trail_length
+
+        self.views = [BallView(self, i, ball) for i, ball in enumerate(balls)]
+
+    def begin_step(self):
+        # Remember the last position for interpolation and sample the trails
+        np.copyto(self.prev_x, self.x, where=self.active)
+        np.copyto(self.prev_y, self.y, where=self.active)
+        recording = np.flatnonzero(self.active & self.effects & ~self.is_exploding)
+        if len(recording):
+            head = self.trail_head[recording]
+            gap = self.trail_gap[recording]
+            self.trail[recording, head, 0] = self.x[recording] - self.dx[recording] * gap
+            self.trail[recording, head, 1] = self.y[recording] - self.dy[recording] * gap
+            self.trail_head[recording] = (head + 1) % self.trail_length
+            self.trail_count[recording] = np.minimum(self.trail_count[recording] + 1, self.trail_length)
+
+    def move(self):
+        self.begin_step()
+        moving = self.active & ~self.is_exploding
+        self.x[moving] += self.dx[moving]
+        self.y[moving] += self.dy[moving]
+
+        # Bounce off walls
+        x, y, radius = self.x, self.y, self.radius
+        hit_x = moving & ((x - radius <= 0) | (x + radius >= WIDTH))
+        hit_y = moving & ((y - radius <= 0) | (y + radius >= HEIGHT))
+        self.dx[hit_x] *= -1
+        self.dy[hit_y] *= -1
+        # Particles in the order Ball.move() creates them
+        for i in np.flatnonzero((hit_x | hit_y) & self.effects):
+            view = self.views[i]
+            for _ in range(int(hit_x[i]) + int(hit_y[i])):
+                view.create_particles()
+
+    def update(self, frames: int = 1) -> List['BallView']:
+        # Ball.update() for every ball; returns the balls whose explosion is over
+        alive = self.active & ~self.is_exploding
+        self.survival_time[alive] += frames
+        exploding = np.flatnonzero(self.active & self.is_exploding)
+        if len(exploding) == 0:
+            return []
+        timer = self.explosion_timer[exploding]
+        self.explosion_timer[exploding] = timer - frames
+        # New particles every 20 frames
+        for i in exploding[(timer - 1) // 20 != (timer - frames - 1) // 20]:
+            self.views[i].add_explosion_particles()
+        return [self.views[i] for i in exploding[timer - frames <= 0]]
+
+    def remove(self, view: 'BallView'):
+        self.active[view.index] = False
+
+    def trail_positions(self, i: int) -> List[Tuple[float, float]]:
+        # Oldest first, like Ball.trail
+        count = self.trail_count.item(i)
+        slots = (self.trail_head.item(i) - count + np.arange(count)) % self.trail_length
+        return list(map(tuple, self.trail[i, slots].tolist()))
+
+
+def _array_property(name: str) -> property:
+    def get(self):
+        return getattr(self.engine, name).item(self.index)
+
+    def set(self, value):
+        getattr(self.engine, name)[self.index] = value
+    return property(get, set)
+
+
+class BallView(Ball):
+    """A Ball whose per-frame state is one entry of a BallEngine's arrays.
+
+    Everything else (color, particles, shards, cracks, ...) is copied from
+    the ball it replaces and stays on the object.
+    """
+
+    __slots__ = ('engine', 'index')
+
+    x = _array_property('x')
+    y = _array_property('y')
+    prev_x = _array_property('prev_x')
+    prev_y = _array_property('prev_y')
+    dx = _array_property('dx')
+    dy = _array_property('dy')
+    radius = _array_property('radius')
+    damage = _array_property('damage')
+    survival_time = _array_property('survival_time')
+    is_exploding = _array_property('is_exploding')
+    explosion_timer = _array_property('explosion_timer')
+
+    def __init__(self, engine: BallEngine, index: int, ball: Ball):
+        self.engine = engine
+        self.index = index
+        for name in Ball.__slots__:
+            if name not in ARRAY_FIELDS and name != 'trail':
+                setattr(self, name, getattr(ball, name))
+
+    @property
+    def trail(self) -> List[Tuple[float, float]]:
+        return self.engine.trail_positions(self.index)
+
+    def record_trail(self):
+        engine = self.engine
+        i = self.index
+        head = engine.trail_head.item(i)
+        engine.trail[i, head] = (self.x - self.dx * self.trail_gap, self.y - self.dy * self.trail_gap)
+        engine.trail_head[i] = (head + 1) % engine.trail_length
+        engine.trail_count[i] = min(engine.trail_count.item(i) + 1, engine.trail_length)
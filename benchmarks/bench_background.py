@@ -0,0 +1,125 @@
+"""Background.update() + draw() against the previous per-point implementation.
+
+Runs under the SDL dummy video driver, checks that both paths produce the
+same pixels and prints the time per frame at 1080p and 4K (1080p only
+with `--quick`):
+
+    python benchmarks/bench_background.py
+"""
+from harness import make_parser, make_suite
+
+import itertools
+import math
+import numpy as np
+import pygame
+from background import Background
+
+SIZES = {
+    '1080p': (1920, 1080),
+    '4K': (3840, 2160),
+}
+
+
+def reference_points(background):
+    # The grid in the old layout: one dict per point
+    return [
+        [{
+            'x': 0.0,
+            'y': 0.0,
+            'base_x': float(background.base_x[i, j]),
+            'base_y': float(background.base_y[i, j]),
+            'radius': int(background.radius[i, j]),
+            'offset': float(background.offset[i, j]),
+            'color': background.point_color,
+            'inner_color': background.palette[background.inner_color[i, j]]
+        } for j in range(background.base_x.shape[1])]
+        for i in range(background.base_x.shape[0])
+    ]
+
+
+def reference_update(points, time):
+    for row in points:
+        for point in row:
+            point['x'] = point['base_x'] + math.cos(time + point['offset']) * 4
+            point['y'] = point['base_y'] + math.sin(time + point['offset']) * 4
+
+
+def reference_draw(screen, points, line_thickness=1):
+    color = (30, 30, 30)
+    for i, row in enumerate(points):
+        for j, point in enumerate(row):
+            if j < len(row) - 1:
+                start_pos = (int(point['x']), int(point['y']))
+                end_pos = (int(row[j + 1]['x']), int(row[j + 1]['y']))
+                pygame.draw.line(screen, color, start_pos, end_pos, line_thickness)
+            if i < len(points) - 1:
+                start_pos = (int(point['x']), int(point['y']))
+                end_pos = (int(points[i + 1][j]['x']), int(points[i + 1][j]['y']))
+                pygame.draw.line(screen, color, start_pos, end_pos, line_thickness)
+    for row in points:
+        for point in row:
+            pygame.draw.circle(screen, point['color'],
+                               (int(point['x']), int(point['y'])), point['radius'])
+            pygame.draw.circle(screen, point['inner_color'],
+                               (int(point['x']), int(point['y'])), int(point['radius'] * 2/3))
+
+
+def differing_pixels(a, b):
+    pixels_a = np.frombuffer(pygame.image.tobytes(a, 'RGB'), dtype=np.uint8).reshape(-1, 3)
+    pixels_b = np.frombuffer(pygame.image.tobytes(b, 'RGB'), dtype=np.uint8).reshape(-1, 3)
+    return int(np.any(pixels_a != pixels_b, axis=1).sum())
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=None, help="frames drawn per repetition")
+    args = parser.parse_args()
+    suite = make_suite('background', args)
+    frames = args.frames or (10 if args.quick else 30)
+    sizes = list(SIZES.items())[:1] if args.quick else SIZES.items()
+
+    pygame.display.init()
+    for name, (width, height) in sizes:
+        background = Background(width, height, np.random.default_rng(0))
+        points = reference_points(background)
+        screen = pygame.Surface((width, height))
+        reference_screen = pygame.Surface((width, height))
+
+        # Same pixels for a few points in time
+        mismatches = 0
+        for t in (0.0, 0.7, 3.2, 10.5):
+            screen.fill((0, 0, 0))
+            background.update_points(t)
+            background.draw(screen)
+            reference_screen.fill((0, 0, 0))
+            reference_update(points, t)
+            reference_draw(reference_screen, points)
+            mismatches += differing_pixels(screen, reference_screen)
+
+        def fast(t):
+            background.update_points(t)
+            background.draw(screen)
+
+        def reference(t):
+            reference_update(points, t)
+            reference_draw(reference_screen, points)
+
+        # One frame per call, at the times of consecutive frames
+        params = {'size': name, 'points': background.x.size}
+        reference_result = suite.bench('background.reference', lambda times: reference(next(times) / 60),
+                                       itertools.count, frames, params)
+        fast_result = suite.bench('background.vectorized', lambda times: fast(next(times) / 60),
+                                  itertools.count, frames, params)
+        for result in (reference_result, fast_result):
+            if result:
+                result['differing_pixels'] = mismatches
+        if reference_result and fast_result:
+            print(f"{'':<28}{reference_result['median_ms'] / fast_result['median_ms']:.1f}x faster, "
+                  f"differing pixels: {mismatches}")
+
+    if args.output:
+        suite.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Allocation churn and GC pauses while many balls explode at once.
+
+Every round builds a match, lets all balls explode together and steps it
+until the explosions are over, so that particle storage is created and
+dropped again and again. After `--warmup` untimed rounds, reports the
+frame times, the garbage collector's pauses and the particle storage
+allocated over `--repeat` rounds, with and without the particle pool:
+
+    python benchmarks/bench_explosions.py
+    python benchmarks/bench_explosions.py --balls 200 --repeat 5 --output explosions.json
+"""
+from harness import make_parser, make_suite, percentile
+
+import gc
+import time
+from particles import ParticlePool
+from workloads import make_match
+
+BALLS = 50
+QUICK_BALLS = 20
+# Wall bounces before the explosion, so that every ball already has particles
+WARMUP_FRAMES = 30
+
+
+class GCTimer:
+    """Counts garbage collections and their pause times via gc.callbacks."""
+
+    def __init__(self):
+        self.pauses = []
+        self.start = 0.0
+
+    def __call__(self, phase: str, info: dict):
+        if phase == 'start':
+            self.start = time.perf_counter()
+        else:
+            self.pauses.append((time.perf_counter() - self.start) * 1000)
+
+    def __enter__(self):
+        gc.collect()
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+
+def explode(n_balls: int, seed: int, pool: ParticlePool, frame_ms: list):
+    # One round; appends the time of every step while the balls explode
+    match = make_match(n_balls, seed=seed)
+    for ball in match.balls:
+        ball.particles.pool = pool  # One pool for all rounds, to count its allocations
+        ball.dx *= 3  # Faster balls bounce off the walls more often
+        ball.dy *= 3
+    for _ in range(WARMUP_FRAMES):
+        match.step()
+    for ball in match.balls:
+        ball.start_explosion()
+    while match.balls:
+        start = time.perf_counter()
+        match.step()
+        frame_ms.append((time.perf_counter() - start) * 1000)
+
+
+def bench_explosions(suite, n_balls: int, pool: ParticlePool):
+    for round_index in range(suite.warmup):
+        explode(n_balls, round_index, pool, [])
+    allocated, reused, allocated_bytes = pool.allocated, pool.reused, pool.allocated_bytes
+    frame_ms = []
+    with GCTimer() as timer:
+        for round_index in range(suite.warmup, suite.warmup + suite.repeat):
+            explode(n_balls, round_index, pool, frame_ms)
+    result = suite.record('explosions', frame_ms, params={'balls': n_balls, 'pool': pool.max_rows > 0})
+    result.update({
+        'rounds': suite.repeat,
+        'frame_p99_ms': percentile(frame_ms, 99),
+        'frame_max_ms': max(frame_ms),
+        'gc_collections': len(timer.pauses),
+        'gc_pause_total_ms': sum(timer.pauses),
+        'gc_pause_max_ms': max(timer.pauses, default=0.0),
+        'storage_allocated': pool.allocated - allocated,
+        'storage_reused': pool.reused - reused,
+        'storage_allocated_kb': (pool.allocated_bytes - allocated_bytes) / 1024,
+    })
+    print(f"{'':<28}p99 {result['frame_p99_ms']:.2f} ms  max {result['frame_max_ms']:.2f} ms | "
+          f"gc {result['gc_collections']} collections, {result['gc_pause_total_ms']:.2f} ms "
+          f"(max {result['gc_pause_max_ms']:.2f} ms) | storage {result['storage_allocated']} allocated "
+          f"({result['storage_allocated_kb']:.0f} KB), {result['storage_reused']} reused")
+
+
+def main():
+    parser = make_parser("Measure allocations and GC pauses during explosions")
+    parser.add_argument('--balls', type=int, default=None, help="balls exploding at once")
+    args = parser.parse_args()
+    suite = make_suite('explosions', args)
+    n_balls = args.balls or (QUICK_BALLS if args.quick else BALLS)
+
+    if suite.selected('explosions'):
+        for pool in (ParticlePool(max_rows=0), ParticlePool()):
+            bench_explosions(suite, n_balls, pool)
+
+    if args.output:
+        suite.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Hexagon.draw() from the HexagonFrameBank against drawing every shape.
+
+Runs under the SDL dummy video driver. Draws hexagons of several sizes in
+random rotations and pulses both ways and reports the pixels that differ
+and the edge pixels that are more than one pixel off: pixels next to a
+color change in one image with no color change within one pixel in the
+other. Pixel colors alone are no measure here; pygame truncates corners
+to whole pixels, so a sub-pixel turn makes one pixel wide slivers of the
+glow or the fill appear and vanish, in the game as well as in the bank.
+
+It prints the time per hexagon and the time draw_hexagons takes per frame
+over a whole match, with a cold bank:
+
+    python benchmarks/bench_hexagons.py
+"""
+from harness import make_parser, make_suite
+
+import math
+import random
+import time
+import numpy as np
+import pygame
+from hexagon import Hexagon
+from simulation import Match
+from sprite_cache import HexagonFrameBank
+
+SIZES = [20, 40, 80]
+# Position with a fractional part, like a hexagon at x + size / 2
+POSITIONS = [(100, 100), (100.5, 99.25)]
+
+
+def pixels(surface):
+    return np.frombuffer(pygame.image.tobytes(surface, 'RGB'), dtype=np.uint8).reshape(
+        surface.get_height(), surface.get_width(), 3)
+
+
+def edges(image):
+    # Pixels with a different color in their 3x3 neighborhood
+    height, width = image.shape[:2]
+    padded = np.pad(image, ((1, 1), (1, 1), (0, 0)), mode='edge')
+    found = np.zeros((height, width), dtype=bool)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            found |= np.any(padded[dy:dy + height, dx:dx + width] != image, axis=2)
+    return found
+
+
+def near(mask):
+    # The mask grown by one pixel in every direction
+    height, width = mask.shape
+    padded = np.pad(mask, 1)
+    grown = np.zeros_like(mask)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            grown |= padded[dy:dy + height, dx:dx + width]
+    return grown
+
+
+def edges_off_by_more_than_one(a, b):
+    edges_a = edges(a)
+    edges_b = edges(b)
+    return int((edges_a & ~near(edges_b)).sum() + (edges_b & ~near(edges_a)).sum())
+
+
+def random_states(rng, count):
+    return [(rng.uniform(0, 360), 1 + 0.1 * math.sin(rng.uniform(0, 2 * math.pi))) for _ in range(count)]
+
+
+def set_state(hexagon, rotation, pulse):
+    hexagon.rotation = rotation
+    hexagon.pulse = pulse
+    hexagon.refresh_geometry()
+
+
+def draw_states(hexagon, states, screen, frames):
+    for rotation, pulse in states:
+        set_state(hexagon, rotation, pulse)
+        hexagon.draw(screen, frames)
+
+
+def bench_sizes(suite, count, max_error):
+    if not (suite.selected('hexagon.draw.shapes') or suite.selected('hexagon.draw.bank')):
+        return
+    rng = random.Random(0)
+    for size in SIZES:
+        # No memory cap, so the timed draws below only hit built frames
+        frames = HexagonFrameBank(max_bytes=2**40, max_error=max_error)
+        extent = size * 4
+        screen = pygame.Surface((extent + 200, extent + 200))
+        reference_screen = pygame.Surface((extent + 200, extent + 200))
+        states = random_states(rng, count)
+
+        differing = 0
+        off = 0
+        for x, y in POSITIONS:
+            hexagon = Hexagon(x, y, size)
+            for rotation, pulse in states:
+                set_state(hexagon, rotation, pulse)
+                screen.fill((0, 0, 0))
+                hexagon.draw(screen, frames)
+                reference_screen.fill((0, 0, 0))
+                hexagon.draw(reference_screen)
+                a = pixels(screen)
+                b = pixels(reference_screen)
+                differing += int(np.any(a != b, axis=2).sum())
+                off += edges_off_by_more_than_one(a, b)
+
+        # Frames are built by now; time the lookups and blits against the shapes
+        params = {'size': size}
+        setup = lambda size=size: Hexagon(*POSITIONS[0], size)
+        reference = suite.bench('hexagon.draw.shapes',
+                                lambda hexagon: draw_states(hexagon, states, reference_screen, None),
+                                setup, params=params, items=len(states))
+        bank = suite.bench('hexagon.draw.bank', lambda hexagon: draw_states(hexagon, states, screen, frames),
+                           setup, params=params, items=len(states))
+        rotation_steps, pulse_steps = frames.steps(size)
+        speedup = f"{reference['median_ms'] / bank['median_ms']:.1f}x faster, " if reference and bank else ""
+        print(f"{'':<28}{rotation_steps}x{pulse_steps} frames, {speedup}differing pixels per draw: "
+              f"{differing / (len(states) * len(POSITIONS)):.1f}, edge pixels more than one pixel off: {off}")
+        print(f"{'':<28}{frames.stats()}")
+
+
+def bench_match(suite, seed, steps):
+    # The game's five hexagons over a whole match, starting with an empty bank
+    screen = pygame.Surface((1000, 800))
+    frames = HexagonFrameBank()
+    for name, bank in (('hexagon.match.shapes', None), ('hexagon.match.bank', frames)):
+        if not suite.selected(name):
+            continue
+        match = Match(seed)
+        frame_ms = []
+        for _ in range(steps):
+            match.step()
+            start = time.perf_counter()
+            for hexagon in match.hexagons:
+                hexagon.draw(screen, bank)
+            frame_ms.append((time.perf_counter() - start) * 1000)
+        # The mean includes the steps that built frames on the way
+        suite.record(name, frame_ms, params={'seed': seed, 'steps': steps})
+    if suite.selected('hexagon.match.bank'):
+        print(f"{'':<28}{frames.stats()}")
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument('--states', type=int, default=None, help="random states drawn per size")
+    parser.add_argument('--max-error', type=float, default=1.0)
+    parser.add_argument('--steps', type=int, default=None, help="match steps drawn")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    suite = make_suite('hexagons', args)
+
+    pygame.display.init()
+    bench_sizes(suite, args.states or (100 if args.quick else 500), args.max_error)
+    bench_match(suite, args.seed, args.steps or (600 if args.quick else 3000))
+
+    if args.output:
+        suite.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
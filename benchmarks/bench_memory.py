@@ -0,0 +1,72 @@
+"""Memory per ball, measured with tracemalloc.
+
+Creates many balls in the states a match goes through (fresh, then with a
+full trail and cracks after some play) and prints the bytes allocated per
+ball, with and without effects (the median over `--repeat` measurements):
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --balls 100000 --output memory.json
+"""
+from harness import make_parser, make_suite
+
+import gc
+import statistics
+import tracemalloc
+from workloads import make_balls
+
+BALLS = 10000
+QUICK_BALLS = 1000
+# Crack angles on a ball shortly before it explodes (one per hit, health 10)
+CRACKS = 9
+
+
+def play(balls):
+    # A few seconds of play: trail filled, cracks from hits
+    for ball in balls:
+        for _ in range(ball.trail_length * 2):
+            ball.record_trail()
+        ball.crack_angles.extend(0.1 * k for k in range(CRACKS))
+
+
+def bytes_per_ball(count: int, effects: bool, played: bool) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    balls = make_balls(count, effects=effects)
+    if played:
+        play(balls)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del balls
+    return used / count
+
+
+def bench_balls(suite, balls: int):
+    if not suite.selected('memory.ball'):
+        return
+    for effects in (True, False):
+        for played in (False, True):
+            for _ in range(suite.warmup):
+                bytes_per_ball(balls, effects, played)
+            per_ball = statistics.median(bytes_per_ball(balls, effects, played) for _ in range(suite.repeat))
+            params = {'effects': effects, 'played': played}
+            suite.results.append({'name': 'memory.ball', 'params': params, 'balls': balls,
+                                  'repeat': suite.repeat, 'bytes_per_ball': round(per_ball)})
+            print(f"{'memory.ball':<28}{' '.join(f'{k}={v}' for k, v in params.items()):<34}"
+                  f"{per_ball:10.0f} bytes/ball")
+
+
+def main():
+    parser = make_parser("Measure the memory used per ball")
+    parser.add_argument('--balls', type=int, default=None, help="balls created per measurement")
+    args = parser.parse_args()
+    suite = make_suite('memory', args)
+    bench_balls(suite, args.balls or (QUICK_BALLS if args.quick else BALLS))
+
+    if args.output:
+        suite.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
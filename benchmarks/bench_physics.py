@@ -0,0 +1,167 @@
+"""Physics hot paths in isolation: particles, ball motion, collisions, hexagons.
+
+Scales the number of balls, live particles and hexagons and reports the
+time per call and per item. Runs without a window:
+
+    python benchmarks/bench_physics.py --output physics.json
+    python benchmarks/bench_physics.py --quick --only collisions
+"""
+from harness import parse_args, make_suite
+
+import itertools
+from ball import Ball
+from ball_engine import BallEngine
+from ccd import advance_balls_swept
+from hexagon import Hexagon
+from particles import ParticleSystem
+from spatial_hash import SpatialHash, resolve_ball_collisions
+from workloads import make_balls, make_match, fill_particles
+
+BALL_COUNTS = [6, 50, 500, 5000]
+PARTICLE_COUNTS = [0, 1000, 10000, 100000]
+HEXAGON_COUNTS = [5, 50, 200, 500]
+# The vectorized BallEngine is aimed at larger arenas
+ENGINE_BALL_COUNTS = [6, 500, 5000, 10000]
+# The all-pairs narrow phase is quadratic, keep it to sizes that finish
+NAIVE_MAX_BALLS = 500
+
+
+def bench_particles(suite, particle_counts):
+    for count in particle_counts:
+        def setup(count=count):
+            system = ParticleSystem()
+            fill_particles(system, count)
+            return system
+        suite.bench('particles.update', lambda system: system.update(), setup, number=10,
+                    params={'particles': count}, items=count)
+
+        def draw_list(system):
+            for _ in system.iter_draw():
+                pass
+        suite.bench('particles.iter_draw', draw_list, setup, number=10,
+                    params={'particles': count}, items=count)
+
+
+def bench_balls(suite, ball_counts):
+    for n in ball_counts:
+        def setup(n=n):
+            balls = make_balls(n)
+            for ball in balls:
+                fill_particles(ball.particles, 20, ball.x, ball.y)
+            return balls
+
+        def move(balls):
+            for ball in balls:
+                ball.move()
+        suite.bench('ball.move', move, setup, number=10, params={'balls': n}, items=n)
+
+        def update_particles(balls):
+            for ball in balls:
+                ball.update_particles()
+        suite.bench('ball.update_particles', update_particles, setup, number=10,
+                    params={'balls': n, 'particles_per_ball': 20}, items=n)
+
+
+def bench_engine(suite, ball_counts):
+    # BallEngine.move() does ball.move() for all balls at once
+    for n in ball_counts:
+        def setup(n=n):
+            return BallEngine(make_balls(n))
+        suite.bench('engine.move', lambda engine: engine.move(), setup, number=10,
+                    params={'balls': n}, items=n)
+        suite.bench('engine.update', lambda engine: engine.update(), setup, number=10,
+                    params={'balls': n}, items=n)
+
+        def update(balls):
+            for ball in balls:
+                ball.update()
+        suite.bench('ball.update', update, lambda n=n: make_balls(n), number=10,
+                    params={'balls': n}, items=n)
+
+
+def bench_collisions(suite, ball_counts):
+    for n in ball_counts:
+        if n <= NAIVE_MAX_BALLS:
+            def naive(balls):
+                active = len(balls)
+                for ball, other in itertools.combinations(balls, 2):
+                    ball.check_collision(other, active)
+            suite.bench('collisions.naive', naive, lambda n=n: make_balls(n), number=3,
+                        params={'balls': n}, items=n * (n - 1) // 2)
+
+        def setup(n=n):
+            balls = make_balls(n)
+            return balls, SpatialHash.for_balls(balls)
+        suite.bench('collisions.grid', lambda state: resolve_ball_collisions(*state), setup, number=3,
+                    params={'balls': n}, items=n)
+
+
+def bench_hexagons(suite, hexagon_counts, ball_counts):
+    # A single call, ball touching an edge
+    def touching():
+        hexagon = Hexagon(100, 100, 40)
+        ball = Ball(hexagon.center_x + hexagon.radius + 10, hexagon.center_y, (255, 0, 0))
+        ball.effects = False
+        return hexagon, ball
+
+    def check(state):
+        hexagon, ball = state
+        hexagon.check_collision(ball)
+    suite.bench('hexagon.check_collision', check, touching, number=10000, params={'case': 'touching'})
+
+    for h in hexagon_counts:
+        for n in ball_counts:
+            def setup(n=n, h=h):
+                return make_match(n, h, effects=False)
+
+            def indexed(match):
+                for ball in match.balls:
+                    for hexagon in match.obstacles.nearby(ball.x, ball.y, ball.radius):
+                        hexagon.check_collision(ball)
+            suite.bench('hexagons.indexed', indexed, setup, number=3,
+                        params={'hexagons': h, 'balls': n}, items=n)
+
+
+def bench_swept(suite, ball_counts):
+    for n in ball_counts:
+        for frames in (1, 4):
+            suite.bench('ccd.swept_step',
+                        lambda match, frames=frames: advance_balls_swept(match.balls, match.obstacles, frames),
+                        lambda n=n: make_match(n, effects=False), number=3,
+                        params={'balls': n, 'step_frames': frames}, items=n)
+
+
+def bench_match(suite, ball_counts, hexagon_counts, particle_counts):
+    # Whole physics frames: Match.step() with effects
+    for n in ball_counts:
+        suite.bench('match.step', lambda match: match.step(), lambda n=n: make_match(n), number=5,
+                    params={'balls': n}, items=n)
+    for h in hexagon_counts:
+        suite.bench('match.step', lambda match: match.step(), lambda h=h: make_match(6, h), number=5,
+                    params={'balls': 6, 'hexagons': h})
+    for count in particle_counts:
+        suite.bench('match.step', lambda match: match.step(), lambda count=count: make_match(6, n_particles=count),
+                    number=5, params={'balls': 6, 'particles': count})
+
+
+def main():
+    args = parse_args("Benchmark the physics hot paths")
+    suite = make_suite('physics', args)
+    ball_counts = BALL_COUNTS[:-1] if args.quick else BALL_COUNTS
+    particle_counts = PARTICLE_COUNTS[:-1] if args.quick else PARTICLE_COUNTS
+    hexagon_counts = HEXAGON_COUNTS[:2] if args.quick else HEXAGON_COUNTS
+
+    bench_particles(suite, particle_counts)
+    bench_balls(suite, ball_counts)
+    bench_engine(suite, ENGINE_BALL_COUNTS[:-1] if args.quick else ENGINE_BALL_COUNTS)
+    bench_collisions(suite, ball_counts)
+    bench_hexagons(suite, hexagon_counts, ball_counts[:2])
+    bench_swept(suite, ball_counts)
+    bench_match(suite, ball_counts, hexagon_counts, particle_counts)
+
+    if args.output:
+        suite.write(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Draw passes of the Renderer in isolation, plus whole frames.
+
+Renders synthetic matches under the SDL dummy video driver and reports
+the time per pass and per frame:
+
+    python benchmarks/bench_render.py --output render.json
+    python benchmarks/bench_render.py --quick --only render.frame
+"""
+from harness import parse_args, make_suite
+
+import pygame
+from renderer import Renderer
+from workloads import make_match, fill_trails
+from constants import WIDTH, HEIGHT
+
+BALL_COUNTS = [6, 50, 500, 5000]
+PARTICLE_COUNTS = [0, 1000, 10000, 100000]
+HEXAGON_COUNTS = [5, 50, 200]
+# Balls blown up before drawing so that shards and falling squares exist
+EXPLODED_BALLS = 3
+# Hits per ball before drawing; every hit adds a crack, the tenth explodes the ball
+DAMAGE_HITS = [0, 5, 9]
+DAMAGED_BALLS = 50
+
+
+def make_renderer(screen, n_balls=6, n_hexagons=None, n_particles=0, exploded=0) -> Renderer:
+    match = make_match(n_balls, n_hexagons, n_particles)
+    fill_trails(match.balls)
+    for ball in match.balls[:exploded]:
+        ball.explode()
+    # Let the squares start falling
+    for ball in match.balls:
+        match.falling_squares.extend(ball.falling_squares)
+        ball.falling_squares.clear()
+    renderer = Renderer(screen, match)
+    renderer.background.update(0.0)
+    return renderer
+
+
+def bench_passes(suite, params, renderer, number=10):
+    setup = lambda: renderer
+    suite.bench('render.background', lambda r: (r.background.update_points(0.5), r.draw_background()),
+                setup, number, params)
+    suite.bench('render.hexagons', lambda r: r.draw_hexagons(), setup, number, params,
+                items=len(renderer.match.hexagons))
+    suite.bench('render.trails', lambda r: r.draw_trails(), setup, number, params,
+                items=len(renderer.match.balls))
+    suite.bench('render.shards', lambda r: r.draw_shards(), setup, number, params,
+                items=sum(len(ball.shards) for ball in renderer.match.balls) or None)
+    suite.bench('render.particles', lambda r: r.draw_particles(), setup, number, params,
+                items=sum(len(ball.particles) for ball in renderer.match.balls) or None)
+    suite.bench('render.falling_squares', lambda r: r.draw_falling_squares(), setup, number, params,
+                items=len(renderer.match.falling_squares) or None)
+    suite.bench('render.balls', lambda r: r.draw_balls(0.5), setup, number, params,
+                items=len(renderer.match.balls))
+    suite.bench('render.frame', lambda r: r.draw(0.5), setup, number, params)
+
+
+def main():
+    args = parse_args("Benchmark the draw passes")
+    suite = make_suite('render', args)
+    ball_counts = BALL_COUNTS[:-1] if args.quick else BALL_COUNTS
+    particle_counts = PARTICLE_COUNTS[:-1] if args.quick else PARTICLE_COUNTS
+    hexagon_counts = HEXAGON_COUNTS[:2] if args.quick else HEXAGON_COUNTS
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    # The game as played: six balls, some exploding
+    renderer = make_renderer(screen, exploded=EXPLODED_BALLS)
+    bench_passes(suite, {'balls': 6, 'exploded': EXPLODED_BALLS}, renderer)
+
+    for n in ball_counts:
+        bench_passes(suite, {'balls': n}, make_renderer(screen, n))
+    for count in particle_counts:
+        renderer = make_renderer(screen, n_particles=count)
+        suite.bench('render.particles', lambda r: r.draw_particles(), lambda: renderer, 10,
+                    {'balls': 6, 'particles': count}, items=count or None)
+        suite.bench('render.frame', lambda r: r.draw(0.5), lambda: renderer, 10,
+                    {'balls': 6, 'particles': count})
+    for hits in DAMAGE_HITS:
+        renderer = make_renderer(screen, DAMAGED_BALLS)
+        for ball in renderer.match.balls:
+            for _ in range(hits):
+                ball.take_damage()
+        suite.bench('render.balls', lambda r: r.draw_balls(0.5), lambda: renderer, 10,
+                    {'balls': DAMAGED_BALLS, 'hits': hits}, items=DAMAGED_BALLS)
+    for h in hexagon_counts:
+        renderer = make_renderer(screen, n_hexagons=h)
+        suite.bench('render.hexagons', lambda r: r.draw_hexagons(), lambda: renderer, 10,
+                    {'hexagons': h}, items=h)
+
+    if args.output:
+        suite.write(args.output)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare two benchmark result files.
+
+    python benchmarks/compare.py before.json after.json [--threshold 5]
+
+Benchmarks are matched by name and parameters; the ratio is the median
+time after / before, so values below 1 are speedups. Results without a
+time (bench_memory.py) are skipped.
+"""
+import argparse
+import json
+
+
+def key(result: dict):
+    return result['name'], tuple(sorted(result['params'].items()))
+
+
+def load(path: str) -> list:
+    with open(path) as file:
+        return [result for result in json.load(file)['results'] if 'median_ms' in result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=5.0,
+                        help="changes below this many percent are shown as unchanged")
+    args = parser.parse_args()
+
+    before = load(args.before)
+    after = load(args.after)
+    old = {key(result): result for result in before}
+
+    print(f"{'benchmark':<28}{'params':<34}{'before':>10}{'after':>10}{'ratio':>8}")
+    for result in after:
+        name, params = key(result)
+        previous = old.pop((name, params), None)
+        label = ' '.join(f"{k}={v}" for k, v in params)
+        if previous is None:
+            print(f"{name:<28}{label:<34}{'-':>10}{result['median_ms']:10.3f}{'new':>8}")
+            continue
+        ratio = result['median_ms'] / previous['median_ms'] if previous['median_ms'] else float('inf')
+        change = abs(ratio - 1) * 100
+        marker = '' if change < args.threshold else (' faster' if ratio < 1 else ' SLOWER')
+        print(f"{name:<28}{label:<34}{previous['median_ms']:10.3f}{result['median_ms']:10.3f}"
+              f"{ratio:8.2f}{marker}")
+    for name, params in old:
+        label = ' '.join(f"{k}={v}" for k, v in params)
+        print(f"{name:<28}{label:<34}{'(missing in after)':>28}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Timing, results and comparison helpers shared by the benchmark scripts.
+
+Every benchmark is a function run `number` times per repetition after a
+few untimed warmup rounds. A fresh workload is built by `setup` before
+each repetition and is not timed. Results are written as JSON so that two
+runs can be compared with `python benchmarks/compare.py old.json new.json`.
+"""
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ.setdefault('BOUNCING_BALLS_HEADLESS', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pygame
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(run: Callable, setup: Optional[Callable] = None, number: int = 1,
+            repeat: int = 7, warmup: int = 1) -> List[float]:
+    """Seconds per call of `run(state)` for each repetition.
+
+    `setup()` builds the state for one repetition; without it `run` is
+    called without arguments.
+    """
+    timings = []
+    for round_index in range(warmup + repeat):
+        state = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        if setup is not None:
+            for _ in range(number):
+                run(state)
+        else:
+            for _ in range(number):
+                run()
+        elapsed = time.perf_counter() - start
+        if round_index >= warmup:
+            timings.append(elapsed / number)
+    return timings
+
+
+class Suite:
+    """Collects benchmark results and writes them as JSON."""
+
+    def __init__(self, name: str, repeat: int = 7, warmup: int = 1, quick: bool = False,
+                 only: Optional[str] = None):
+        self.name = name
+        self.repeat = repeat
+        self.warmup = warmup
+        self.quick = quick
+        self.only = only  # Run only benchmarks whose name contains this
+        self.results: List[dict] = []
+
+    def selected(self, name: str) -> bool:
+        return self.only is None or self.only in name
+
+    def bench(self, name: str, run: Callable, setup: Optional[Callable] = None, number: int = 1,
+              params: Optional[Dict] = None, items: Optional[int] = None) -> Optional[dict]:
+        # `items` is how many operations one call covers (balls, particles, pairs ...)
+        if not self.selected(name):
+            return None
+        timings = measure(run, setup, number, self.repeat, self.warmup)
+        return self.record(name, [t * 1000 for t in timings], number, params, items)
+
+    def record(self, name: str, ms: List[float], number: int = 1, params: Optional[Dict] = None,
+               items: Optional[int] = None) -> dict:
+        # Adds a result from milliseconds per call, for timings not taken by `measure()`
+        result = {
+            'name': name,
+            'params': params or {},
+            'number': number,
+            'repeat': len(ms),
+            'min_ms': min(ms),
+            'median_ms': statistics.median(ms),
+            'mean_ms': statistics.fmean(ms),
+            'p95_ms': percentile(ms, 95),
+            'stdev_ms': statistics.stdev(ms) if len(ms) > 1 else 0.0,
+        }
+        if items:
+            result['items'] = items
+            result['per_item_us'] = result['median_ms'] * 1000 / items
+        self.results.append(result)
+        self.print_result(result)
+        return result
+
+    @staticmethod
+    def print_result(result: dict):
+        params = ' '.join(f"{key}={value}" for key, value in result['params'].items())
+        line = f"{result['name']:<28}{params:<34}{result['median_ms']:10.3f} ms (p95 {result['p95_ms']:.3f})"
+        if 'per_item_us' in result:
+            line += f"  {result['per_item_us']:.3f} us/item"
+        print(line)
+
+    def metadata(self) -> dict:
+        return {
+            'suite': self.name,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'pygame': pygame.version.ver,
+            'sdl': '.'.join(map(str, pygame.get_sdl_version())),
+            'numpy': np.__version__,
+            'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+            'repeat': self.repeat,
+            'warmup': self.warmup,
+            'quick': self.quick,
+        }
+
+    def write(self, path: str):
+        with open(path, 'w') as file:
+            json.dump({'meta': self.metadata(), 'results': self.results}, file, indent=2)
+        print(f"Wrote {len(self.results)} results to {path}")
+
+
+def make_parser(description: str) -> argparse.ArgumentParser:
+    # The options every benchmark script accepts; scripts add their own to it
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--quick', action='store_true', help="smaller workloads and fewer repetitions")
+    parser.add_argument('--repeat', type=int, default=None, help="timed repetitions per benchmark")
+    parser.add_argument('--warmup', type=int, default=1, help="untimed rounds before timing")
+    parser.add_argument('--only', default=None, help="run only benchmarks whose name contains this")
+    parser.add_argument('--output', default=None, help="write results as JSON to this file")
+    return parser
+
+
+def parse_args(description: str) -> argparse.Namespace:
+    return make_parser(description).parse_args()
+
+
+def make_suite(name: str, args: argparse.Namespace) -> Suite:
+    repeat = args.repeat if args.repeat is not None else (3 if args.quick else 7)
+    return Suite(name, repeat, args.warmup, args.quick, args.only)
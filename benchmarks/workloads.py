@@ -0,0 +1,84 @@
+"""Synthetic, seeded workloads for the benchmarks.
+
+Balls are spread over the arena with a radius that keeps the covered area
+roughly constant as N grows, and they are made indestructible so that the
+ball count stays at N while a benchmark runs.
+"""
+import math
+import random
+from typing import List, Optional
+import numpy as np
+from ball import Ball
+from particles import ParticleSystem, PULSE, SPIRAL, SHOCKWAVE
+from simulation import Match, default_layout, field_layout
+from spatial_hash import SpatialHash
+from constants import WIDTH, HEIGHT, COLORS
+
+# Fraction of the arena covered by balls
+BALL_COVERAGE = 0.25
+
+
+def ball_radius(n: int) -> int:
+    return max(2, min(20, int(math.sqrt(BALL_COVERAGE * WIDTH * HEIGHT / (n * math.pi)))))
+
+
+def make_balls(n: int, seed: int = 0, effects: bool = True) -> List[Ball]:
+    random.seed(seed)
+    radius = ball_radius(n)
+    rng = np.random.default_rng(seed)  # One effects generator for all balls, like a Match
+    balls = []
+    for i in range(n):
+        ball = Ball(random.uniform(radius, WIDTH - radius), random.uniform(radius, HEIGHT - radius),
+                    COLORS[i % len(COLORS)])
+        ball.radius = radius
+        ball.health = 10 ** 9  # Never explodes
+        ball.effects = effects
+        ball.particles.rng = rng
+        balls.append(ball)
+    return balls
+
+
+def fill_particles(system: ParticleSystem, count: int, x: float = WIDTH / 2, y: float = HEIGHT / 2,
+                   seed: int = 0):
+    # A mix like the game produces: mostly plain particles, some pulsing, spiral and shockwave
+    if count == 0:
+        return
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 2 * math.pi, count)
+    speed = rng.uniform(1, 5, count)
+    kinds = rng.choice([0, PULSE, SPIRAL, SHOCKWAVE], count, p=[0.7, 0.1, 0.1, 0.1])
+    system.emit(x + rng.uniform(-50, 50, count), y + rng.uniform(-50, 50, count),
+                np.cos(angle) * speed, np.sin(angle) * speed,
+                rng.uniform(20, 60, count), np.asarray(COLORS)[rng.integers(0, len(COLORS), count)],
+                size=rng.uniform(3, 8, count), speed_decay=0.98, flags=kinds,
+                phase=rng.uniform(0, 2 * math.pi, count), max_size=rng.uniform(20, 40, count))
+
+
+def hexagon_layout(count: int):
+    # Layout factory with roughly `count` small hexagons spread over the arena
+    if count == 0:
+        return lambda: []
+    spacing = max(30, int(0.9 * math.sqrt(WIDTH * HEIGHT / count)))
+    return lambda: field_layout(spacing)[:count]
+
+
+def make_match(n_balls: int = 6, n_hexagons: Optional[int] = None, n_particles: int = 0, seed: int = 0,
+               effects: bool = True) -> Match:
+    # Without n_hexagons the match uses the game's five hexagons
+    layout = default_layout if n_hexagons is None else hexagon_layout(n_hexagons)
+    match = Match(seed, effects=effects, layout=layout)
+    match.balls[:] = make_balls(n_balls, seed, effects)
+    match.collision_grid = SpatialHash.for_balls(match.balls)
+    if n_particles:
+        share = n_particles // len(match.balls)
+        for i, ball in enumerate(match.balls):
+            fill_particles(ball.particles, share + (i < n_particles % len(match.balls)),
+                           ball.x, ball.y, seed + i)
+    return match
+
+
+def fill_trails(balls: List[Ball]):
+    # Full trails as after a few seconds of play
+    for ball in balls:
+        ball.trail.extend((ball.x - ball.dx * k, ball.y - ball.dy * k) for k in range(ball.trail_length, 0, -1))
+
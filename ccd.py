@@ -0,0 +1,336 @@
+import heapq
+import math
+from typing import List, Optional, Tuple
+from ball import Ball
+from spatial_hash import SpatialHash, ObstacleIndex
+from constants import WIDTH, HEIGHT, BALL_SPEED
+
+# Gaps below this many pixels count as contact
+CONTACT_TOLERANCE = 1e-6
+# Iterations of conservative advancement against a rotating hexagon
+MAX_ADVANCE_ITERATIONS = 48
+# Pixels a separating ball is advanced before its hexagon gap is measured again
+SEPARATION_STEP = 0.5
+# Contacts a ball may resolve per step; stops wedged clusters from bouncing forever at one instant.
+# A ball out of contacts stops short of its next one for the rest of the step. A pair of balls
+# that meets more than once in a step only deals damage on its first contact.
+MAX_CONTACTS_PER_BALL = 8
+
+# Event kinds; HEXAGON_SWEEP continues a hexagon sweep that ran out of iterations
+WALL_X, WALL_Y, BALL, HEXAGON, HEXAGON_SWEEP = range(5)
+
+
+def time_of_impact_circles(px: float, py: float, vx: float, vy: float, radius: float) -> Optional[float]:
+    """Earliest t in [0, 1] at which |p + v * t| == radius while approaching.
+
+    p and v are the relative position and the relative motion over the whole
+    interval. Circles that already touch and approach hit at t = 0.
+    """
+    b = px * vx + py * vy
+    if b >= 0:
+        return None  # Separating or parallel
+    c = px * px + py * py - radius * radius
+    if c <= 0:
+        return 0.0
+    a = vx * vx + vy * vy
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if t <= 1 else None
+
+
+def time_of_impact_wall(position: float, motion: float, radius: float, limit: float) -> Optional[float]:
+    # Earliest t in [0, 1] at which a circle moving by `motion` touches 0 or `limit`
+    if motion < 0:
+        t = (radius - position) / motion
+    elif motion > 0:
+        t = (limit - radius - position) / motion
+    else:
+        return None
+    if t > 1:
+        return None
+    return max(0.0, t)
+
+
+class SweptStep:
+    """Moves all balls through one physics step with continuous collisions.
+
+    Collisions with walls, other balls and rotating hexagons are found as
+    times of impact within the step and resolved in time order: all involved
+    balls are advanced exactly to the contact, the usual response runs there
+    and the rest of the step continues with the new velocities. Step size
+    therefore doesn't let balls pass through each other or through edges.
+    """
+
+    def __init__(self, balls: List[Ball], obstacles: ObstacleIndex, frames: int, num_active_balls: int):
+        self.balls = [ball for ball in balls if not ball.is_exploding]
+        self.obstacles = obstacles
+        self.frames = frames
+        self.num_active_balls = num_active_balls
+        n = len(self.balls)
+        self.local_time = [0.0] * n  # Step fraction each ball has been advanced to
+        self.version = [0] * n  # Bumped whenever a ball's motion changes
+        self.contacts = [0] * n  # Contacts resolved per ball in this step
+        self.stopped = [False] * n  # Out of contacts, stays put until the next step
+        self.damaged_pairs = set()  # Pairs (i, j), i < j, that already dealt damage in this step
+        self.events = []
+        self.sequence = 0
+
+        # Broad phase: which balls can meet during this step at all
+        max_radius = max((ball.radius for ball in self.balls), default=20)
+        max_speed = max([BALL_SPEED] + [math.hypot(ball.dx, ball.dy) for ball in self.balls])
+        self.max_motion = max_speed * frames
+        grid = SpatialHash(2 * max_radius + 2 * self.max_motion)
+        grid.rebuild(self.balls)
+        index = {id(ball): i for i, ball in enumerate(self.balls)}
+        self.neighbours = [[] for _ in range(n)]
+        for ball, other in grid.candidate_pairs():
+            i, j = index[id(ball)], index[id(other)]
+            self.neighbours[i].append(j)
+            self.neighbours[j].append(i)
+
+    def motion(self, i: int):
+        ball = self.balls[i]
+        if ball.is_exploding or self.stopped[i]:
+            return 0.0, 0.0
+        return ball.dx * self.frames, ball.dy * self.frames
+
+    def position(self, i: int, s: float):
+        ball = self.balls[i]
+        mx, my = self.motion(i)
+        elapsed = s - self.local_time[i]
+        return ball.x + mx * elapsed, ball.y + my * elapsed
+
+    def advance(self, i: int, s: float):
+        ball = self.balls[i]
+        ball.x, ball.y = self.position(i, s)
+        self.local_time[i] = s
+
+    def push(self, s: float, kind: int, i: int, other: int):
+        other_version = self.version[other] if kind == BALL else 0
+        heapq.heappush(self.events, (s, self.sequence, kind, i, other, self.version[i], other_version))
+        self.sequence += 1
+
+    def schedule(self, i: int, now: float, skip: int = -1, later_only: bool = False):
+        # Queue the next wall, ball and hexagon contacts of ball i after `now`;
+        # `skip` and `later_only` avoid queueing the same pair from both sides
+        ball = self.balls[i]
+        if ball.is_exploding:
+            return
+        self.advance(i, now)
+        mx, my = self.motion(i)
+        remaining = 1.0 - now
+        if remaining <= 0:
+            return
+
+        t = time_of_impact_wall(ball.x, mx * remaining, ball.radius, WIDTH)
+        if t is not None:
+            self.push(now + t * remaining, WALL_X, i, 0)
+        t = time_of_impact_wall(ball.y, my * remaining, ball.radius, HEIGHT)
+        if t is not None:
+            self.push(now + t * remaining, WALL_Y, i, 0)
+
+        for j in self.neighbours[i]:
+            other = self.balls[j]
+            if j == skip or (later_only and j < i) or other.is_exploding:
+                continue
+            ox, oy = self.position(j, now)
+            omx, omy = self.motion(j)
+            t = time_of_impact_circles(ball.x - ox, ball.y - oy,
+                                       (mx - omx) * remaining, (my - omy) * remaining,
+                                       ball.radius + other.radius)
+            if t is not None:
+                self.push(now + t * remaining, BALL, i, j)
+
+        reach = ball.radius + math.hypot(mx, my) * remaining
+        for k in self.obstacles.nearby_indices(ball.x, ball.y, reach):
+            hexagon = self.obstacles.hexagons[k]
+            # Bounding circle out of reach for the rest of the step
+            if (math.hypot(ball.x - hexagon.center_x, ball.y - hexagon.center_y)
+                    > reach + max(hexagon.radius, hexagon.prev_radius)):
+                continue
+            contact = self.hexagon_contact(i, hexagon, now)
+            if contact is not None:
+                self.push(contact[0], contact[1], i, k)
+
+    def hexagon_contact(self, i: int, hexagon, now: float) -> Optional[Tuple[float, int]]:
+        # Conservative advancement: never step further than the gap can close.
+        # Returns the contact time and HEXAGON, or where the iterations ran out
+        # and HEXAGON_SWEEP; a grazing approach can need many more iterations.
+        ball = self.balls[i]
+        mx, my = self.motion(i)
+        closing_speed = (math.hypot(mx, my)
+                         + math.radians(abs(hexagon.rotation_delta)) * max(hexagon.radius, hexagon.prev_radius)
+                         + abs(hexagon.radius - hexagon.prev_radius)) or 1.0
+        s = now
+        for _ in range(MAX_ADVANCE_ITERATIONS):
+            px, py = self.position(i, s)
+            contact = hexagon.boundary_distance(px, py, s)
+            if contact is None:
+                return None  # Center inside the hexagon; nothing sensible to sweep
+            gap = contact[0] - ball.radius
+            if gap <= CONTACT_TOLERANCE:
+                if self.hexagon_approaching(i, hexagon, s, gap):
+                    return s, HEXAGON
+                # Touching or overlapping but separating: move on by a fraction of a pixel
+                gap = SEPARATION_STEP
+            s += gap / closing_speed
+            if s > 1.0:
+                return None
+        return s, HEXAGON_SWEEP
+
+    def hexagon_approaching(self, i: int, hexagon, s: float, gap: float) -> bool:
+        probe = min(1.0, s + 1e-4)
+        if probe == s:
+            return False
+        px, py = self.position(i, probe)
+        contact = hexagon.boundary_distance(px, py, probe)
+        return contact is None or contact[0] - self.balls[i].radius < gap
+
+    def resolve(self, kind: int, i: int, other: int, s: float):
+        ball = self.balls[i]
+        self.advance(i, s)
+        involved = [i]
+        if kind == WALL_X:
+            # Bounce off walls
+            ball.dx = abs(ball.dx) if ball.x < WIDTH / 2 else -abs(ball.dx)
+            ball.create_particles()
+        elif kind == WALL_Y:
+            ball.dy = abs(ball.dy) if ball.y < HEIGHT / 2 else -abs(ball.dy)
+            ball.create_particles()
+        elif kind == BALL:
+            other_ball = self.balls[other]
+            self.advance(other, s)
+            involved.append(other)
+            distance = math.hypot(other_ball.x - ball.x, other_ball.y - ball.y) or 1.0
+            nx = (other_ball.x - ball.x) / distance
+            ny = (other_ball.y - ball.y) / distance
+            # Balls that already overlapped (e.g. after spawning) are pushed apart
+            overlap = (ball.radius + other_ball.radius - distance) / 2
+            if overlap > 0:
+                ball.x -= overlap * nx
+                ball.y -= overlap * ny
+                other_ball.x += overlap * nx
+                other_ball.y += overlap * ny
+            was_exploding = ball.is_exploding + other_ball.is_exploding
+            pair = (min(i, other), max(i, other))
+            ball.collide(other_ball, self.num_active_balls, nx, ny, damage=pair not in self.damaged_pairs)
+            self.damaged_pairs.add(pair)
+            self.num_active_balls -= ball.is_exploding + other_ball.is_exploding - was_exploding
+            if overlap > 0:
+                # The push may have moved them into a wall or hexagon
+                self.push_out(i, s)
+                self.push_out(other, s)
+        else:
+            hexagon = self.obstacles.hexagons[other]
+            contact = hexagon.boundary_distance(ball.x, ball.y, s)
+            if contact is not None:
+                distance, nx, ny = contact
+                if distance < ball.radius:
+                    # Push an overlapping ball back onto the boundary
+                    ball.x += nx * (ball.radius - distance)
+                    ball.y += ny * (ball.radius - distance)
+                if ball.dx * nx + ball.dy * ny < 0:
+                    hexagon.bounce(ball, nx, ny)
+                else:
+                    # The rotating edge caught up with a receding ball: push it clear
+                    ball.x += nx * 8 * CONTACT_TOLERANCE
+                    ball.y += ny * 8 * CONTACT_TOLERANCE
+                    ball.create_particles()
+
+        # New velocities: every queued contact of the involved balls is stale,
+        # including their pairs queued by neighbours, so requeue them all. The
+        # pair that just collided isn't requeued: speed normalization can leave
+        # it slightly approaching, which would otherwise repeat at the same time.
+        for j in involved:
+            self.version[j] += 1
+            self.contacts[j] += 1
+        self.schedule(i, s, skip=involved[-1])
+        if len(involved) > 1:
+            self.schedule(involved[1], s, skip=i)
+
+    def run(self, max_events: Optional[int] = None) -> int:
+        n = len(self.balls)
+        if max_events is None:
+            max_events = 16 * n + 64
+        for i in range(n):
+            self.schedule(i, 0.0, later_only=True)
+
+        resolved = 0
+        while self.events and resolved < max_events:
+            s, _, kind, i, other, version, other_version = heapq.heappop(self.events)
+            if not self.valid(kind, i, other, version, other_version):
+                continue
+            if kind == HEXAGON_SWEEP:
+                # No contact yet: sweep on from where the iterations ran out
+                contact = self.hexagon_contact(i, self.obstacles.hexagons[other], s)
+                if contact is not None:
+                    self.push(contact[0], contact[1], i, other)
+                continue
+            if (self.contacts[i] >= MAX_CONTACTS_PER_BALL
+                    or kind == BALL and self.contacts[other] >= MAX_CONTACTS_PER_BALL):
+                self.stop(kind, i, other, s)
+                continue
+            self.resolve(kind, i, other, s)
+            resolved += 1
+
+        # Out of events: every ball with a contact still ahead stops short of it
+        while self.events:
+            s, _, kind, i, other, version, other_version = heapq.heappop(self.events)
+            if self.valid(kind, i, other, version, other_version):
+                self.stop(kind, i, other, s)
+
+        # Rest of the step without further contacts
+        for i in range(n):
+            self.advance(i, 1.0)
+
+        # A rotating or growing hexagon may still reach a stopped ball
+        for i in range(n):
+            if self.stopped[i]:
+                self.push_out(i)
+        return self.num_active_balls
+
+    def valid(self, kind: int, i: int, other: int, version: int, other_version: int) -> bool:
+        # False for events queued before a ball's motion last changed
+        if version != self.version[i] or self.balls[i].is_exploding:
+            return False
+        return kind != BALL or (other_version == self.version[other] and not self.balls[other].is_exploding)
+
+    def stop(self, kind: int, i: int, other: int, s: float):
+        # Halts the balls of an unresolved contact at its time; their velocities
+        # are kept for the next step
+        involved = [i, other] if kind == BALL else [i]
+        for j in involved:
+            self.advance(j, s)
+            self.stopped[j] = True
+            self.version[j] += 1
+
+    def push_out(self, i: int, s: float = 1.0):
+        # Moves an overlapping ball out of hexagons (as they lie at s) and walls
+        ball = self.balls[i]
+        if ball.is_exploding:
+            return
+        radius = ball.radius
+        for hexagon in self.obstacles.nearby(ball.x, ball.y, radius):
+            contact = hexagon.boundary_distance(ball.x, ball.y, s)
+            if contact is not None and contact[0] < radius:
+                # Onto the boundary along the nearest point, which clears the whole hexagon
+                distance, nx, ny = contact
+                ball.x += nx * (radius - distance)
+                ball.y += ny * (radius - distance)
+                if ball.dx * nx + ball.dy * ny < 0:
+                    hexagon.bounce(ball, nx, ny)
+        if ball.x < radius or ball.x > WIDTH - radius:
+            ball.x = min(max(ball.x, radius), WIDTH - radius)
+            ball.dx = abs(ball.dx) if ball.x < WIDTH / 2 else -abs(ball.dx)
+            ball.create_particles()
+        if ball.y < radius or ball.y > HEIGHT - radius:
+            ball.y = min(max(ball.y, radius), HEIGHT - radius)
+            ball.dy = abs(ball.dy) if ball.y < HEIGHT / 2 else -abs(ball.dy)
+            ball.create_particles()
+
+
+def advance_balls_swept(balls: List[Ball], obstacles: ObstacleIndex, frames: int = 1) -> int:
+    num_active_balls = sum(1 for ball in balls if not ball.is_exploding)
+    return SweptStep(balls, obstacles, frames, num_active_balls).run()
@@ -1,12 +1,18 @@
+import os
 import pygame
 
-# Initialize Pygame
-pygame.init()
+# Headless runs (no window, no drawing) are selected before this module is imported
+HEADLESS = os.environ.get('BOUNCING_BALLS_HEADLESS') == '1'
 
-# Get screen info
-screen_info = pygame.display.Info()
-HEIGHT = int(screen_info.current_h * 0.6)  # 60% of the screen height
-WIDTH = int(HEIGHT * 4/3)  # 4:3 ratio based on the height
+# Fixed arena size (60% of a 1080p screen height, 4:3), with and without a
+# window, so that a seed gives the same match on every machine and in every
+# mode; the window itself is scaled to the display (renderer.Window)
+HEIGHT = int(1080 * 0.6)
+WIDTH = int(HEIGHT * 4/3)
+
+if not HEADLESS:
+    # Initialize Pygame
+    pygame.init()
 
 # Constants
 FPS = 60
@@ -0,0 +1,36 @@
+import pygame
+from typing import List, Optional
+from sprite_cache import RotatedSpriteAtlas
+
+
+class DebrisLayer:
+    """Persistent surface holding all falling squares that came to rest.
+
+    A resting square is rasterized into the layer once and then forgotten,
+    so the layer costs one blit per frame no matter how many squares it holds.
+    """
+
+    def __init__(self, width: int, height: int, atlas: RotatedSpriteAtlas):
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.atlas = atlas
+        self.count = 0  # Number of squares baked into the layer
+
+    def bake(self, squares: List[dict]) -> List[pygame.Rect]:
+        # Returns the regions of the layer that changed
+        rects = []
+        for square in squares:
+            sprite = self.atlas.get(square['size'], square['color'], square['rotation'])
+            rects.append(self.surface.blit(sprite, (square['x'] - sprite.get_width()/2,
+                                                    square['y'] - sprite.get_height()/2)))
+        self.count += len(squares)
+        return rects
+
+    def draw(self, screen, rects: Optional[List[pygame.Rect]] = None):
+        # With rects only those regions of the layer are drawn
+        if not self.count:
+            return
+        if rects is None:
+            screen.blit(self.surface, (0, 0))
+        else:
+            for rect in rects:
+                screen.blit(self.surface, rect, rect)
@@ -0,0 +1,90 @@
+import numpy as np
+import pygame
+from typing import List
+
+# Edge length of a tile in pixels
+DIRTY_TILE = 16
+
+
+class TileMask:
+    """Changed screen regions as a grid of coarse tiles.
+
+    Marking whole tiles instead of keeping a list of rectangles means
+    overlapping regions are never counted or redrawn twice, and the
+    changed area stays close to what was actually marked instead of
+    growing into the bounding box of everything that touches.
+    """
+
+    def __init__(self, width: int, height: int, tile: int = DIRTY_TILE):
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.tiles = np.zeros((-(-height // tile), -(-width // tile)), dtype=bool)
+
+    def clear(self):
+        self.tiles[:] = False
+
+    def copy(self) -> 'TileMask':
+        mask = TileMask(self.width, self.height, self.tile)
+        mask.tiles[:] = self.tiles
+        return mask
+
+    def add(self, other: 'TileMask'):
+        self.tiles |= other.tiles
+
+    def add_rect(self, left: float, top: float, right: float, bottom: float):
+        tile = self.tile
+        rows, cols = self.tiles.shape
+        r0, r1 = max(int(top) // tile, 0), min(int(bottom) // tile + 1, rows)
+        c0, c1 = max(int(left) // tile, 0), min(int(right) // tile + 1, cols)
+        if r0 < r1 and c0 < c1:
+            self.tiles[r0:r1, c0:c1] = True
+
+    def add_rects(self, rects: List[pygame.Rect]):
+        for rect in rects:
+            self.add_rect(rect.left, rect.top, rect.right - 1, rect.bottom - 1)
+
+    def add_points(self, xs: np.ndarray, ys: np.ndarray, pad: float):
+        # Squares of +-pad around many points at once
+        tile = self.tile
+        rows, cols = self.tiles.shape
+        c0 = np.clip((xs - pad) // tile, 0, cols - 1).astype(np.int64)
+        c1 = np.clip((xs + pad) // tile, 0, cols - 1).astype(np.int64)
+        r0 = np.clip((ys - pad) // tile, 0, rows - 1).astype(np.int64)
+        r1 = np.clip((ys + pad) // tile, 0, rows - 1).astype(np.int64)
+        span = int(2 * pad) // tile + 2
+        for dr in range(span):
+            r = np.minimum(r0 + dr, r1)
+            for dc in range(span):
+                self.tiles[r, np.minimum(c0 + dc, c1)] = True
+
+    def coverage(self) -> float:
+        # Fraction of the tiles that are marked
+        return float(self.tiles.mean())
+
+    def rects(self) -> List[pygame.Rect]:
+        # Runs of marked tiles per row; equal runs in consecutive rows are joined
+        tile = self.tile
+        screen = pygame.Rect(0, 0, self.width, self.height)
+        rects = []
+        open_runs = {}
+        for row, line in enumerate(self.tiles.tolist()):
+            runs = {}
+            col = 0
+            cols = len(line)
+            while col < cols:
+                if line[col]:
+                    start = col
+                    while col < cols and line[col]:
+                        col += 1
+                    run = (start, col)
+                    rect = open_runs.pop(run, None)
+                    if rect is None:
+                        rect = pygame.Rect(start * tile, row * tile, (col - start) * tile, tile)
+                        rects.append(rect)
+                    else:
+                        rect.h += tile
+                    runs[run] = rect
+                col += 1
+            open_runs = runs
+        return [rect.clip(screen) for rect in rects]
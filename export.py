@@ -0,0 +1,208 @@
+import os
+
+# Offscreen: no window, fixed arena size; must be set before constants is imported
+os.environ.setdefault('BOUNCING_BALLS_HEADLESS', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+import pygame
+from headless import MAX_FRAMES
+from renderer import Renderer
+from simulation import Match
+from constants import WIDTH, HEIGHT, FPS
+
+# Frames waiting for the writer; rendering blocks when the queue is full
+QUEUE_SIZE = 8
+# Seconds rendered after the winner is decided, so the banner is visible
+TAIL_SECONDS = 2.0
+
+
+def encode_png(rgb: bytes, width: int, height: int, compression: int = 1) -> bytes:
+    # Minimal RGB PNG; zlib releases the GIL while compressing, so several
+    # writer threads encode in parallel with the rendering thread
+    stride = width * 3
+    rows = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows, compression))
+            + chunk(b'IEND', b''))
+
+
+class PngSequence:
+    """Numbered PNG files in a directory; frames may be written in any order."""
+
+    ordered = False
+
+    def __init__(self, directory: str, compression: int = 1):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.compression = compression
+
+    def write(self, index: int, rgb: bytes, size: Tuple[int, int]):
+        data = encode_png(rgb, size[0], size[1], self.compression)
+        with open(os.path.join(self.directory, f"frame_{index:05d}.png"), 'wb') as file:
+            file.write(data)
+
+    def close(self):
+        pass
+
+
+class RawStream:
+    """Raw RGB24 frames back to back, to a file or to stdout ('-') for piping."""
+
+    ordered = True
+
+    def __init__(self, path: str):
+        self.file = sys.stdout.buffer if path == '-' else open(path, 'wb')
+
+    def write(self, index: int, rgb: bytes, size: Tuple[int, int]):
+        self.file.write(rgb)
+
+    def close(self):
+        self.file.flush()
+        if self.file is not sys.stdout.buffer:
+            self.file.close()
+
+
+class FrameWriter:
+    """Hands rendered frames to background threads through a bounded queue.
+
+    Ordered sinks (a raw stream) get a single thread; PNG sequences can use
+    several. An error in a writer thread is raised again in the rendering
+    thread on the next `write()` or on `close()`.
+    """
+
+    def __init__(self, sink, queue_size: int = QUEUE_SIZE, threads: int = 1):
+        self.sink = sink
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.error: Optional[BaseException] = None
+        self.blocked = 0.0  # Seconds the renderer waited for a free queue slot
+        count = 1 if sink.ordered else max(1, threads)
+        self.threads = [threading.Thread(target=self.run, daemon=True) for _ in range(count)]
+        for thread in self.threads:
+            thread.start()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:
+                    self.sink.write(*item)
+            except BaseException as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def write(self, index: int, rgb: bytes, size: Tuple[int, int]):
+        if self.error is not None:
+            raise self.error
+        start = time.perf_counter()
+        self.queue.put((index, rgb, size))
+        self.blocked += time.perf_counter() - start
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+
+def export_match(output: str, seed: Optional[int] = None, size: Optional[Tuple[int, int]] = None,
+                 raw: Optional[bool] = None, max_frames: int = MAX_FRAMES, tail: float = TAIL_SECONDS,
+                 queue_size: int = QUEUE_SIZE, threads: Optional[int] = None, compression: int = 1) -> dict:
+    """Render every frame of a match offscreen and write it as PNGs or raw RGB.
+
+    `output` is a directory for PNGs, or a file / '-' for raw RGB (the
+    default for '-' and for .rgb/.raw files). `size` scales the frames.
+    """
+    if raw is None:
+        raw = output == '-' or output.endswith(('.rgb', '.raw'))
+    if threads is None:
+        threads = os.cpu_count() or 1
+    pygame.init()
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    size = size or (WIDTH, HEIGHT)
+
+    match = Match(seed)
+    renderer = Renderer(screen, match)
+    sink = RawStream(output) if raw else PngSequence(output, compression)
+    writer = FrameWriter(sink, queue_size, threads)
+
+    start = time.perf_counter()
+    frames = 0
+    tail_frames = int(tail * FPS)
+    try:
+        while match.balls and match.frame < max_frames:
+            if match.winner is not None:
+                if tail_frames <= 0:
+                    break
+                tail_frames -= 1
+            renderer.after_step(match.step())
+            renderer.draw()
+            frame = screen if size == (WIDTH, HEIGHT) else pygame.transform.smoothscale(screen, size)
+            writer.write(frames, pygame.image.tobytes(frame, 'RGB'), size)
+            frames += 1
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    pygame.quit()
+
+    return {
+        'frames': frames,
+        'size': size,
+        'match_seconds': frames / FPS,
+        'elapsed': elapsed,
+        'blocked': writer.blocked,
+        'writer_threads': len(writer.threads),
+    }
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a Bouncing Balls match to PNG frames or raw RGB")
+    parser.add_argument('output', help="directory for PNG frames, or a .rgb/.raw file or '-' for raw RGB")
+    parser.add_argument('--seed', type=int, default=None, help="random seed of the match")
+    parser.add_argument('--size', type=parse_size, default=None, help="output size, e.g. 1920x1080")
+    parser.add_argument('--raw', action='store_true', help="write raw RGB24 even to other file names")
+    parser.add_argument('--max-seconds', type=float, default=MAX_FRAMES / FPS, help="stop after this much match time")
+    parser.add_argument('--tail', type=float, default=TAIL_SECONDS, help="seconds rendered after the winner")
+    parser.add_argument('--queue', type=int, default=QUEUE_SIZE, help="frames buffered for the writer")
+    parser.add_argument('--threads', type=int, default=None, help="PNG writer threads (default: CPU count)")
+    parser.add_argument('--compression', type=int, default=1, help="PNG compression level 0-9")
+    args = parser.parse_args()
+
+    result = export_match(args.output, args.seed, args.size, True if args.raw else None,
+                          int(args.max_seconds * FPS), args.tail, args.queue, args.threads, args.compression)
+    width, height = result['size']
+    # Progress and hints go to stderr, stdout may carry the raw stream
+    print(f"{result['frames']} frames ({result['match_seconds']:.1f}s of play) in {result['elapsed']:.1f}s, "
+          f"{result['frames'] / result['elapsed']:.0f} frames/s, waited {result['blocked']:.1f}s for "
+          f"{result['writer_threads']} writer thread(s)", file=sys.stderr)
+    if args.raw or args.output == '-' or args.output.endswith(('.rgb', '.raw')):
+        print(f"Encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {FPS} "
+              f"-i {args.output} match.mp4", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
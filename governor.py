@@ -0,0 +1,109 @@
+from typing import Optional
+
+# Effects quality from best to cheapest. Particle emission and lifetime are
+# cut first, then the drawn part of the trails; shards and falling squares
+# only at the end.
+QUALITY_LEVELS = [
+    {'name': 'full', 'emission': 1.0, 'lifetime': 1.0, 'max_particles': None, 'trail': 1.0, 'debris': 1.0},
+    {'name': 'high', 'emission': 0.75, 'lifetime': 1.0, 'max_particles': 400, 'trail': 1.0, 'debris': 1.0},
+    {'name': 'medium', 'emission': 0.5, 'lifetime': 0.75, 'max_particles': 200, 'trail': 0.5, 'debris': 1.0},
+    {'name': 'low', 'emission': 0.25, 'lifetime': 0.5, 'max_particles': 80, 'trail': 0.25, 'debris': 1.0},
+    {'name': 'minimal', 'emission': 0.1, 'lifetime': 0.5, 'max_particles': 30, 'trail': 0.0, 'debris': 0.5},
+]
+
+
+class EffectsBudget:
+    """Runtime limits for visual effects.
+
+    At the defaults nothing is limited. `emission` is the fraction of
+    emitted particles that are kept, `lifetime` scales the lifetime of new
+    particles and `max_particles` caps the live particles of each system
+    (one per ball). `trail` is the drawn trail fraction: balls keep
+    recording full trails, the Renderer draws only the newest part.
+    `debris` is the fraction of shards and falling squares an explosion
+    creates. Gameplay never depends on any of them.
+
+    A QualityGovernor owns one budget and changes it; the Match and the
+    Renderer it is handed to share it with their particle systems.
+    """
+
+    def __init__(self):
+        self.emission = 1.0
+        self.lifetime = 1.0
+        self.max_particles: Optional[int] = None
+        self.trail = 1.0
+        self.debris = 1.0
+
+    def apply(self, level: dict):
+        self.emission = level['emission']
+        self.lifetime = level['lifetime']
+        self.max_particles = level['max_particles']
+        self.trail = level['trail']
+        self.debris = level['debris']
+
+    def allowed(self, n: int, live: int) -> int:
+        # How many of n emitted particles a system with `live` particles may create
+        kept = n if self.emission >= 1.0 else int(n * self.emission + 0.5)
+        if self.max_particles is not None:
+            kept = min(kept, max(0, self.max_particles - live))
+        return kept
+
+
+class QualityGovernor:
+    """Lowers the effects quality while frames take too long, raises it again with headroom.
+
+    `update()` gets the time each frame took, without waiting for the frame
+    cap. When the smoothed frame time stays above `target_ms` for
+    `down_frames` frames the quality drops one level; when it stays below
+    `headroom * target_ms` for `up_frames` frames it rises one level.
+    The limits of each level go to `budget`, a new EffectsBudget unless
+    one is given.
+    """
+
+    def __init__(self, target_ms: float, budget: Optional[EffectsBudget] = None,
+                 down_frames: int = 10, up_frames: int = 120, headroom: float = 0.7,
+                 smoothing: float = 0.1):
+        self.target_ms = target_ms
+        self.budget = budget if budget is not None else EffectsBudget()
+        self.down_frames = down_frames
+        self.up_frames = up_frames
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.average_ms: Optional[float] = None
+        self.level = 0
+        self.over = 0  # Frames in a row above the target
+        self.under = 0  # Frames in a row with headroom
+        self.budget.apply(QUALITY_LEVELS[0])
+
+    @property
+    def name(self) -> str:
+        return QUALITY_LEVELS[self.level]['name']
+
+    def update(self, frame_ms: float) -> bool:
+        # Returns True when the quality level changed
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * self.smoothing
+
+        if self.average_ms > self.target_ms:
+            self.over += 1
+            self.under = 0
+        elif self.average_ms < self.target_ms * self.headroom:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.down_frames and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1)
+            return True
+        if self.under >= self.up_frames and self.level > 0:
+            self.set_level(self.level - 1)
+            return True
+        return False
+
+    def set_level(self, level: int):
+        self.level = level
+        self.over = self.under = 0
+        self.budget.apply(QUALITY_LEVELS[level])
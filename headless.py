@@ -0,0 +1,73 @@
+import os
+
+# Must be set before constants is imported: no window
+os.environ.setdefault('BOUNCING_BALLS_HEADLESS', '1')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import time
+from typing import Optional
+from simulation import Match
+from rankings import COLOR_NAMES
+from constants import FPS
+
+# Safety limit for matches that never end (10 minutes of game time)
+MAX_FRAMES = FPS * 60 * 10
+
+
+def run_match(seed: Optional[int] = None, max_frames: int = MAX_FRAMES, step_frames: int = 1) -> dict:
+    """Run one match without window, drawing or frame cap.
+
+    `step_frames` frames are simulated per physics step; continuous collisions
+    (used for `step_frames` > 1) keep larger steps from tunneling, but the
+    match plays out differently (other winner and length) than with
+    single-frame steps. Returns the final ranking (winner first) with
+    survival times in seconds.
+    """
+    match = Match(seed, effects=False, step_frames=step_frames)
+    while match.winner is None and match.balls and match.frame < max_frames:
+        match.step()
+
+    # Balls still alive rank before eliminated ones, then by survival time
+    ranked = sorted(match.balls, key=lambda b: b.survival_time, reverse=True)
+    ranked += sorted(match.eliminated_balls, key=lambda b: b.survival_time, reverse=True)
+    winner = match.winner
+
+    return {
+        'seed': seed,
+        'frames': match.frame,
+        'winner': COLOR_NAMES.get(winner.color, "Unknown") if winner else None,
+        'ranking': [
+            {
+                'name': COLOR_NAMES.get(ball.color, "Unknown"),
+                'color': ball.color,
+                'survival_time': ball.survival_time / FPS
+            }
+            for ball in ranked
+        ]
+    }
+
+
+def print_result(result: dict):
+    print(f"Seed {result['seed']}: {result['frames']} frames, winner: {result['winner'] or '-'}")
+    for rank, entry in enumerate(result['ranking'], 1):
+        print(f"{rank}.".ljust(4) + entry['name'].ljust(8) + f"{entry['survival_time']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Bouncing Balls match without a window")
+    parser.add_argument('--seed', type=int, default=None, help="random seed of the match")
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES, help="stop after this many frames")
+    parser.add_argument('--step-frames', type=int, default=1, help="frames simulated per physics step; faster, but values above 1 "
+                             "change the outcome of a seeded match")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run_match(args.seed, args.max_frames, args.step_frames)
+    elapsed = time.perf_counter() - start
+    print_result(result)
+    print(f"Simulated in {elapsed:.2f}s ({result['frames'] / elapsed:.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
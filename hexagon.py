@@ -1,10 +1,63 @@
+import copy
 import pygame
 import random
 import math
 from ball import Ball
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from constants import WHITE, BALL_SPEED
 
+# Ecken eines unrotierten Hexagons mit Radius 1 und die Richtungen der Kanten
+# von Ecke i zu Ecke i+1 (Kantenlänge = Radius)
+LOCAL_CORNERS = [(math.cos(math.radians(60 * i)), math.sin(math.radians(60 * i))) for i in range(6)]
+LOCAL_EDGES = [
+    (LOCAL_CORNERS[(i + 1) % 6][0] - LOCAL_CORNERS[i][0],
+     LOCAL_CORNERS[(i + 1) % 6][1] - LOCAL_CORNERS[i][1])
+    for i in range(6)
+]
+# Kleinster und größter Faktor der Pulsierung (0.9 bis 1.1)
+HEXAGON_MIN_PULSE = 0.9
+HEXAGON_MAX_PULSE = 1.1
+# Größe des Leuchteffekts relativ zum Hexagon
+GLOW_FACTOR = 1.1
+
+# Normalen der Kanten (Kante um 90 Grad gedreht)
+LOCAL_NORMALS = [(-ey, ex) for ex, ey in LOCAL_EDGES]
+
+
+def corner_rings(center_x: float, center_y: float, radius: float,
+                 cos_rotation: float, sin_rotation: float) -> Dict[float, List[Tuple[float, float]]]:
+    # Eckpunkte der drei gezeichneten Sechsecke, nach Größenfaktor.
+    # Richtungen der sechs Ecken (60 Grad zwischen den Ecken)
+    directions = [
+        (ux * cos_rotation - uy * sin_rotation,
+         ux * sin_rotation + uy * cos_rotation)
+        for ux, uy in LOCAL_CORNERS
+    ]
+    return {
+        size_factor: [
+            (center_x + radius * size_factor * dx,
+             center_y + radius * size_factor * dy)
+            for dx, dy in directions
+        ]
+        for size_factor in (1.0, 0.5, GLOW_FACTOR)  # Außen, innerer Ring, Leuchteffekt
+    }
+
+
+def draw_body(surface, outer_corners, inner_corners, base_color, inner_color):
+    # Zeichne das Haupthexagon
+    pygame.draw.polygon(surface, base_color, outer_corners)
+
+    # Zeichne den inneren Ring
+    pygame.draw.polygon(surface, inner_color, inner_corners, 2)  # Nur Umriss
+
+    # Verbinde die Ecken des inneren und äußeren Rings
+    for outer, inner in zip(outer_corners, inner_corners):
+        pygame.draw.line(surface, inner_color, outer, inner, 2)
+
+    # Zeichne die äußere Umrandung
+    pygame.draw.polygon(surface, WHITE, outer_corners, 2)
+
+
 class Hexagon:
     def __init__(self, x: int, y: int, size: int):
         self.x = x
@@ -18,148 +71,199 @@ class Hexagon:
         self.rotation_speed = random.uniform(0.25, 0.75)  # Rotationsgeschwindigkeit
         self.pulse_offset = random.uniform(0, 2 * math.pi)  # Zufälliger Start für die Pulsierung
         self.pulse = 1.0  # Initialize pulse with default value
+        self.refresh_geometry()
+        # Drehung und Radius im letzten Update, für die kontinuierliche Kollision
+        # und zum Zeichnen zwischen zwei Updates
+        self.rotation_delta = 0.0
+        self.prev_radius = self.radius
+        self.prev_pulse = self.pulse
         
-    def update(self):
+    def update(self, time: float, frames: int = 1):
+        self.prev_radius = self.radius
+        self.prev_pulse = self.pulse
+
         # Aktualisiere Rotation
-        self.rotation += self.rotation_speed
+        self.rotation_delta = self.rotation_speed * frames
+        self.rotation += self.rotation_delta
         if self.rotation >= 360:
             self.rotation -= 360
             
-        # Berechne Pulsierung (0.9 bis 1.1)
-        time = pygame.time.get_ticks() / 1000  # Zeit in Sekunden
+        # Berechne Pulsierung (0.9 bis 1.1) aus der Simulationszeit in Sekunden
         self.pulse = 1 + 0.1 * math.sin(time * 2 + self.pulse_offset)
+        self.refresh_geometry()
+
+    def refresh_geometry(self):
+        # Eckpunkte und Drehung einmal pro Update berechnen; draw() und
+        # check_collision() verwenden nur noch diese Werte
+        self.center_x = self.x + self.size / 2
+        self.center_y = self.y + self.size / 2
+        angle = math.radians(self.rotation)
+        self.cos_rotation = math.cos(angle)
+        self.sin_rotation = math.sin(angle)
+        self.radius = self.size * self.pulse  # Umkreisradius = Kantenlänge
+
+        self.corners = corner_rings(self.center_x, self.center_y, self.radius,
+                                    self.cos_rotation, self.sin_rotation)
+
+    def interpolated(self, alpha: float) -> 'Hexagon':
+        # Hexagon between the last two updates (alpha 0 = previous, 1 = current),
+        # for drawing only; the hexagon itself keeps its physics state
+        if alpha >= 1 or (self.rotation_delta == 0 and self.pulse == self.prev_pulse):
+            return self
+        hexagon = copy.copy(self)
+        hexagon.rotation = self.rotation - self.rotation_delta * (1 - alpha)
+        hexagon.pulse = self.prev_pulse + (self.pulse - self.prev_pulse) * alpha
+        hexagon.refresh_geometry()
+        return hexagon
 
     def get_corners(self, size_factor=1.0) -> List[Tuple[float, float]]:
         # Berechne die Eckpunkte des rotierten Hexagons
-        center_x = self.x + self.size / 2
-        center_y = self.y + self.size / 2
-        corners = []
-        
-        for i in range(6):  # 6 Ecken für ein Hexagon
-            angle = math.radians(60 * i + self.rotation)  # 60 Grad zwischen den Ecken
-            # Verwende size direkt als Radius, mit Pulsierung
-            x = center_x + self.size * size_factor * math.cos(angle) * self.pulse
-            y = center_y + self.size * size_factor * math.sin(angle) * self.pulse
-            corners.append((x, y))
-        
-        return corners
+        corners = self.corners.get(size_factor)
+        if corners is not None:
+            return corners
+        return [
+            (self.center_x + (x - self.center_x) * size_factor,
+             self.center_y + (y - self.center_y) * size_factor)
+            for x, y in self.corners[1.0]
+        ]
 
     def get_inner_corners(self) -> List[Tuple[float, float]]:
-        # Berechne die Eckpunkte des inneren Hexagons (50% der Größe des äußeren)
-        center_x = self.x + self.size / 2
-        center_y = self.y + self.size / 2
-        corners = []
-        
-        for i in range(6):  # 6 Ecken für ein Hexagon
-            angle = math.radians(60 * i + self.rotation)  # 60 Grad zwischen den Ecken
-            # Innerer Ring ist 50% der Größe des äußeren
-            x = center_x + self.size * 0.5 * math.cos(angle) * self.pulse
-            y = center_y + self.size * 0.5 * math.sin(angle) * self.pulse
-            corners.append((x, y))
-        
-        return corners
+        # Eckpunkte des inneren Hexagons (50% der Größe des äußeren)
+        return self.corners[0.5]
+
+    def bounding_rect(self) -> pygame.Rect:
+        # Bereich, den draw() verändert: Leuchteffekt-Surface und Hexagon samt Umrandung
+        left = int(min(self.x - self.size * 0.1, self.center_x - self.radius)) - 3
+        top = int(min(self.y - self.size * 0.1, self.center_y - self.radius)) - 3
+        right = int(max(self.x + self.size * 2.1, self.center_x + self.radius)) + 3
+        bottom = int(max(self.y + self.size * 2.1, self.center_y + self.radius)) + 3
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def draw(self, screen, frames=None):
+        # Mit einer HexagonFrameBank: ein vorgezeichnetes Bild, ein Blit
+        if frames is not None:
+            frame, left, top = frames.get(self)
+            screen.blit(frame, (left, top))
+            return
 
-    def draw(self, screen):
         # Zeichne den äußeren Leuchteffekt
-        glow_corners = self.get_corners(1.1)  # 10% größer
+        glow_corners = self.get_corners(GLOW_FACTOR)  # 10% größer
         glow_surface = pygame.Surface((self.size * 2.2, self.size * 2.2), pygame.SRCALPHA)
         pygame.draw.polygon(glow_surface, (*self.glow_color, 30), 
                           [(x - self.x + self.size * 0.1, y - self.y + self.size * 0.1) 
                            for x, y in glow_corners])
         screen.blit(glow_surface, (self.x - self.size * 0.1, self.y - self.size * 0.1))
 
-        # Zeichne das Haupthexagon
-        outer_corners = self.get_corners()
-        pygame.draw.polygon(screen, self.base_color, outer_corners)
-        
-        # Zeichne den inneren Ring
-        inner_corners = self.get_inner_corners()
-        pygame.draw.polygon(screen, self.inner_color, inner_corners, 2)  # Nur Umriss
-        
-        # Verbinde die Ecken des inneren und äußeren Rings
-        for outer, inner in zip(outer_corners, inner_corners):
-            pygame.draw.line(screen, self.inner_color, outer, inner, 2)
-        
-        # Zeichne die äußere Umrandung
-        pygame.draw.polygon(screen, WHITE, outer_corners, 2)
+        # Haupthexagon, innerer Ring, Verbindungen und Umrandung
+        draw_body(screen, self.get_corners(), self.get_inner_corners(), self.base_color, self.inner_color)
 
     def check_collision(self, ball: 'Ball') -> bool:
-        # Berechne den Mittelpunkt des Hexagons
-        center_x = self.x + self.size / 2
-        center_y = self.y + self.size / 2
-        
         # Berechne die Distanz zwischen Ball und Hexagon-Zentrum
-        dx = ball.x - center_x
-        dy = ball.y - center_y
-        distance = math.sqrt(dx*dx + dy*dy)
+        dx = ball.x - self.center_x
+        dy = ball.y - self.center_y
         
         # Grobe Kollisionsprüfung mit umgebendem Kreis
-        if distance > self.size + ball.radius:
+        reach = self.radius + ball.radius
+        if dx*dx + dy*dy > reach*reach:
             return False
+        
+        # Ball ins lokale (unrotierte) Koordinatensystem des Hexagons drehen
+        cos_r = self.cos_rotation
+        sin_r = self.sin_rotation
+        local_x = dx * cos_r + dy * sin_r
+        local_y = -dx * sin_r + dy * cos_r
+        
+        # Genaue Kollisionsprüfung mit den Kanten (vorberechnete lokale Daten)
+        radius = self.radius
+        for (cx, cy), (line_vec_x, line_vec_y), normal in zip(LOCAL_CORNERS, LOCAL_EDGES, LOCAL_NORMALS):
+            # Relative Position des Balls zur Kante (Start bei der Ecke)
+            rel_x = local_x - cx * radius
+            rel_y = local_y - cy * radius
             
-        # Genaue Kollisionsprüfung mit den Kanten
-        corners = self.get_corners()
-        for i in range(6):
-            p1 = corners[i]
-            p2 = corners[(i + 1) % 6]
-            
-            # Berechne den nächsten Punkt auf der Linie zum Ball
-            line_vec_x = p2[0] - p1[0]
-            line_vec_y = p2[1] - p1[1]
-            line_len = math.sqrt(line_vec_x*line_vec_x + line_vec_y*line_vec_y)
-            
-            if line_len == 0:
-                continue
-                
-            # Normalisiere den Vektor
-            line_vec_x /= line_len
-            line_vec_y /= line_len
-            
-            # Relative Position des Balls zur Linie
-            rel_x = ball.x - p1[0]
-            rel_y = ball.y - p1[1]
-            
-            # Projiziere auf die Linie
+            # Projiziere auf die Kante (Kantenlänge = Radius)
             proj = rel_x*line_vec_x + rel_y*line_vec_y
-            proj = max(0, min(line_len, proj))
-            
-            # Nächster Punkt auf der Linie
-            closest_x = p1[0] + proj * line_vec_x
-            closest_y = p1[1] + proj * line_vec_y
+            proj = max(0, min(radius, proj))
             
-            # Distanz zum nächsten Punkt
-            dx = ball.x - closest_x
-            dy = ball.y - closest_y
-            distance = math.sqrt(dx*dx + dy*dy)
+            # Distanz zum nächsten Punkt auf der Kante
+            dist_x = rel_x - proj * line_vec_x
+            dist_y = rel_y - proj * line_vec_y
+            distance_sq = dist_x*dist_x + dist_y*dist_y
             
-            if distance <= ball.radius:
-                # Kollision gefunden - berechne Normalenvektor
+            if distance_sq <= ball.radius * ball.radius:
+                # Kollision gefunden - berechne Normalenvektor (lokal)
+                distance = math.sqrt(distance_sq)
                 if distance == 0:
-                    nx = -line_vec_y
-                    ny = line_vec_x
+                    local_nx, local_ny = normal
                 else:
-                    nx = dx / distance
-                    ny = dy / distance
+                    local_nx = dist_x / distance
+                    local_ny = dist_y / distance
+                
+                # Normale zurück ins Weltkoordinatensystem drehen
+                nx = local_nx * cos_r - local_ny * sin_r
+                ny = local_nx * sin_r + local_ny * cos_r
                 
                 # Verschiebe Ball aus dem Hexagon
                 overlap = ball.radius - distance
                 ball.x += overlap * nx
                 ball.y += overlap * ny
                 
-                # Reflektiere Geschwindigkeit
-                dot_product = (ball.dx * nx + ball.dy * ny) * 2
-                ball.dx -= dot_product * nx
-                ball.dy -= dot_product * ny
-                
-                # Normalisiere Geschwindigkeit
-                speed = math.sqrt(ball.dx**2 + ball.dy**2)
-                if speed != 0:
-                    factor = BALL_SPEED / speed
-                    ball.dx *= factor
-                    ball.dy *= factor
-                
-                # Erzeuge Partikel
-                ball.create_particles()
+                self.bounce(ball, nx, ny)
                 return True
         
-        return False
\ No newline at end of file
+        return False
+
+    def bounce(self, ball: 'Ball', nx: float, ny: float):
+        # Reflektiere Geschwindigkeit an der Normalen (nx, ny)
+        dot_product = (ball.dx * nx + ball.dy * ny) * 2
+        ball.dx -= dot_product * nx
+        ball.dy -= dot_product * ny
+        
+        # Normalisiere Geschwindigkeit
+        speed = math.sqrt(ball.dx**2 + ball.dy**2)
+        if speed != 0:
+            factor = BALL_SPEED / speed
+            ball.dx *= factor
+            ball.dy *= factor
+        
+        # Erzeuge Partikel
+        ball.create_particles()
+
+    def boundary_distance(self, px: float, py: float, s: float = 1.0) -> Optional[Tuple[float, float, float]]:
+        # Abstand eines Punkts zum Rand des Hexagons und Normale (vom Rand zum Punkt),
+        # mit der Lage zum Anteil s des letzten Updates (0 = davor, 1 = jetzt).
+        # None, wenn der Punkt im Hexagon liegt.
+        angle = math.radians(self.rotation - self.rotation_delta * (1 - s))
+        cos_r = math.cos(angle)
+        sin_r = math.sin(angle)
+        radius = self.prev_radius + (self.radius - self.prev_radius) * s
+        
+        dx = px - self.center_x
+        dy = py - self.center_y
+        local_x = dx * cos_r + dy * sin_r
+        local_y = -dx * sin_r + dy * cos_r
+        
+        best = None
+        inside = True
+        for (cx, cy), (line_vec_x, line_vec_y), (edge_nx, edge_ny) in zip(LOCAL_CORNERS, LOCAL_EDGES, LOCAL_NORMALS):
+            rel_x = local_x - cx * radius
+            rel_y = local_y - cy * radius
+            # Kantennormalen zeigen nach innen
+            if rel_x * edge_nx + rel_y * edge_ny < 0:
+                inside = False
+            proj = max(0, min(radius, rel_x*line_vec_x + rel_y*line_vec_y))
+            dist_x = rel_x - proj * line_vec_x
+            dist_y = rel_y - proj * line_vec_y
+            distance_sq = dist_x*dist_x + dist_y*dist_y
+            if best is None or distance_sq < best[0]:
+                best = (distance_sq, dist_x, dist_y)
+        
+        if inside:
+            return None
+        distance = math.sqrt(best[0])
+        if distance == 0:
+            return None
+        local_nx = best[1] / distance
+        local_ny = best[2] / distance
+        return (distance,
+                local_nx * cos_r - local_ny * sin_r,
+                local_nx * sin_r + local_ny * cos_r)
@@ -1,322 +1,142 @@
-import pygame
-import random
-import math
-from typing import List, Tuple
-from ball import Ball
-from hexagon import Hexagon
-from background import Background
-from rankings import Rankings
-from constants import WIDTH, HEIGHT, FPS, BALL_SPEED, WHITE, BLACK, COLORS
-
-# Initialize Pygame
-pygame.init()
-
-
-# Get screen info
-screen_info = pygame.display.Info()
-HEIGHT = int(screen_info.current_h * 0.6)  # 60% der Bildschirmhöhe
-WIDTH = int(HEIGHT * 4/3)  # 4:3 Verhältnis basierend auf der Höhe
-
-# Constants
-FPS = 60
-BALL_SPEED = 7 
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-COLORS = [
-    (255, 0, 0),    # Red
-    (0, 255, 0),    # Green
-    (0, 0, 255),    # Blue
-    (255, 255, 0),  # Yellow
-    (255, 0, 255),  # Magenta
-    (0, 255, 255)   # Cyan
-]
+import os
+import sys
 
+# Der Headless-Modus muss feststehen, bevor constants importiert wird
+if '--headless' in sys.argv[1:]:
+    os.environ['BOUNCING_BALLS_HEADLESS'] = '1'
 
-def main():
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Bouncing Balls")
+import argparse
+import time
+import pygame
+from governor import QualityGovernor
+from renderer import Renderer, Window
+from profiler import FrameProfiler, ProfilerOverlay, NULL_PROFILER
+from replay import ReplayRecorder
+from simulation import Match, SimulationClock
+from constants import WIDTH, HEIGHT, FPS
+
+
+def main(seed=None, time_scale=1.0, profile_path=None, record_path=None, frame_target=None,
+         dirty_rects=False, hexagon_frames=False):
+    # Fenster nach Bildschirmgröße; gezeichnet wird in der festen Arena-Größe
+    window = Window((WIDTH, HEIGHT))
+    screen = window.surface
+    if dirty_rects and not window.dirty_rects:
+        print("--dirty-rects is off: the window is larger than the arena and is scaled in full frames")
+        dirty_rects = False
     clock = pygame.time.Clock()
-    
-    # Create Rankings instance
-    rankings = Rankings(WIDTH, HEIGHT, WHITE)
-    
-    # Cache für häufig verwendete Surfaces
-    particle_surfaces = {}
-    
-    # Erstelle den animierten Hintergrund
-    background = Background(WIDTH, HEIGHT)
 
-    # Globale Liste für fallende Quadrate
-    falling_squares = []
+    # Effekt-Qualität: mit --frame-target wird sie an die gemessene Frame-Zeit angepasst
+    governor = QualityGovernor(frame_target) if frame_target else None
+    budget = governor.budget if governor else None
+
+    # Spielzustand und Physik (Bälle, Hexagone, fallende Quadrate)
+    match = Match(seed, budget=budget)
 
-    # Hexagongröße (etwas größer als die ursprüngliche Quadratgröße)
-    hexagon_size = 40  # Radius des Hexagons
-    # Abstand vom Rand (20% der Fensterbreite/höhe)
-    margin_x = int(WIDTH * 0.20)
-    margin_y = int(HEIGHT * 0.20)
+    # Hintergrund, Rangliste und Sprite-Caches
+    renderer = Renderer(screen, match, dirty_rects, hexagon_frames, budget)
 
-    # Erstelle fünf Hexagone symmetrisch angeordnet
-    hexagons = [
-        Hexagon(margin_x, margin_y, hexagon_size),  # Links oben
-        Hexagon(WIDTH - margin_x - hexagon_size*2, margin_y, hexagon_size),  # Rechts oben
-        Hexagon(WIDTH//2 - hexagon_size, HEIGHT//2 - hexagon_size, hexagon_size),  # Mitte
-        Hexagon(margin_x, HEIGHT - margin_y - hexagon_size*2, hexagon_size),  # Links unten
-        Hexagon(WIDTH - margin_x - hexagon_size*2, HEIGHT - margin_y - hexagon_size*2, hexagon_size)  # Rechts unten
-    ]
+    # Zeichnet das Match für die Wiedergabe mit replay.py auf
+    recorder = ReplayRecorder(match) if record_path else None
 
-    # Create three balls with different colors
-    balls = []
-    for color in COLORS:
-        # Versuche maximal 100 Mal, eine gültige Position zu finden
-        valid_position = False
-        for _ in range(100):
-            # Generiere eine zufällige Position
-            x = random.randint(50, WIDTH-50)
-            y = random.randint(50, HEIGHT-50)
-            
-            # Prüfe, ob diese Position mit einem Hexagon kollidiert
-            collision = False
-            temp_ball = Ball(x, y, color)
-            for hexagon in hexagons:
-                if hexagon.check_collision(temp_ball):
-                    collision = True
-                    break
-            
-            # Wenn keine Kollision gefunden wurde, behalte diese Position
-            if not collision:
-                balls.append(temp_ball)
-                valid_position = True
-                break
-        
-        # Wenn keine gültige Position gefunden wurde, platziere den Ball in der Mitte
-        if not valid_position:
-            balls.append(Ball(WIDTH//2, HEIGHT//2, color))
+    # Feste Physik-Schritte, unabhängig von der Bildrate
+    sim_clock = SimulationClock(time_scale)
+    clock.tick(FPS)
 
-    # Liste für eliminierte Bälle
-    eliminated_balls = []
+    # Frame-Profiler: mit --profile aktiv, F3 blendet die Übersicht ein und aus
+    profiler = FrameProfiler() if profile_path else NULL_PROFILER
+    match.profiler = renderer.profiler = profiler
+    overlay = None
 
     running = True
     while running:
+        frame_start = time.perf_counter()
+        profiler.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-        # Update background
-        background.update()
-
-        # Update hexagons rotation
-        for hexagon in hexagons:
-            hexagon.update()
-
-        # Update ball positions
-        for ball in balls[:]:  # Kopie der Liste für sichere Iteration
-            ball.move()
-            # Verschiebe fallende Quadrate in die globale Liste
-            for particle in ball.particles[:]:
-                if particle.get('type') == 'falling_square':
-                    falling_squares.append(particle)
-                    ball.particles.remove(particle)
-            ball.update_particles()
-            if ball.update():  # Wenn True, ist die Explosion fertig
-                # Verschiebe alle verbleibenden fallenden Quadrate in die globale Liste
-                for particle in ball.particles[:]:
-                    if particle.get('type') == 'falling_square':
-                        falling_squares.append(particle)
-                        ball.particles.remove(particle)
-                eliminated_balls.append(ball)  # Füge eliminierten Ball zur Liste hinzu
-                balls.remove(ball)
-                background.update_colors(balls, ball.color)  # Aktualisiere Hintergrundfarben
-                continue
-
-        # Update falling squares
-        for square in falling_squares:
-            if not square['is_resting']:
-                # Füge Gravitation hinzu
-                square['dy'] += square['gravity']
-                
-                # Bewege das Quadrat
-                square['x'] += square['dx']
-                square['y'] += square['dy']
-                
-                # Rotiere das Quadrat
-                square['rotation'] += square['rotation_speed']
-                
-                # Prüfe Kollision mit dem Boden
-                if square['y'] + square['size']/2 >= HEIGHT:
-                    square['y'] = HEIGHT - square['size']/2
-                    
-                    # Wenn die Geschwindigkeit sehr klein ist, lasse das Quadrat liegen
-                    if abs(square['dy']) < 2:
-                        square['is_resting'] = True
-                        square['dx'] = 0
-                        square['dy'] = 0
-                        square['rotation_speed'] = 0  # Stoppe die Rotation
-                    else:
-                        # Bounce mit Energieverlust
-                        square['dy'] = -square['dy'] * square['bounce_factor']
-                        square['dx'] *= 0.8  # Reibung
-                
-                # Prüfe Kollision mit den Wänden
-                if square['x'] - square['size']/2 <= 0:
-                    square['x'] = square['size']/2
-                    square['dx'] = abs(square['dx']) * square['bounce_factor']
-                elif square['x'] + square['size']/2 >= WIDTH:
-                    square['x'] = WIDTH - square['size']/2
-                    square['dx'] = -abs(square['dx']) * square['bounce_factor']
-
-        # Check collisions between balls
-        for i in range(len(balls)):
-            for j in range(i + 1, len(balls)):
-                balls[i].check_collision(balls[j], balls)
-
-        # Überprüfe Kollisionen mit Hexagonen
-        for ball in balls:
-            for hexagon in hexagons:
-                if hexagon.check_collision(ball):
-                    # Entferne take_damage() - Bälle sollen nur abprallen, nicht beschädigt werden
-                    pass
-
-        # Draw everything
-        screen.fill(BLACK)
-        
-        # Zeichne den animierten Hintergrund
-        background.draw(screen)
-        
-        # Zeichne Hexagone
-        for hexagon in hexagons:
-            hexagon.draw(screen)
-
-        # Draw trails
-        for ball in balls:
-            if not ball.is_exploding:
-                for i, pos in enumerate(ball.trail):
-                    alpha = int(255 * (i / ball.trail_length))
-                    color = (*ball.color[:3], alpha)
-                    
-                    rect_width = ball.radius * 0.5
-                    rect_height = ball.radius * 0.3 * (i / ball.trail_length)
-                    
-                    trail_surface = pygame.Surface((rect_width, rect_height), pygame.SRCALPHA)
-                    pygame.draw.rect(trail_surface, color, (0, 0, rect_width, rect_height))
-                    
-                    screen.blit(trail_surface, (
-                        pos[0] - rect_width/2,
-                        pos[1] - rect_height/2
-                    ))
-
-        # Draw particles and falling squares
-        for ball in balls:
-            for particle in ball.particles:
-                if particle.get('type') == 'shard':
-                    # Zeichne Splitter mit Verblassen
-                    alpha = int(255 * (particle['lifetime'] / 120))
-                    color = (*particle['color'][:3], alpha)
-                    
-                    # Erstelle Surface für den Splitter
-                    points = [(int(x), int(y)) for x, y in particle['points']]
-                    
-                    # Berechne Bounding Box für Surface
-                    min_x = min(x for x, _ in points)
-                    max_x = max(x for x, _ in points)
-                    min_y = min(y for _, y in points)
-                    max_y = max(y for _, y in points)
-                    width = max_x - min_x + 2
-                    height = max_y - min_y + 2
-                    
-                    if width > 0 and height > 0:
-                        shard_surface = pygame.Surface((width, height), pygame.SRCALPHA)
-                        # Verschiebe Punkte relativ zur Surface
-                        adjusted_points = [(x - min_x, y - min_y) for x, y in points]
-                        pygame.draw.polygon(shard_surface, color, adjusted_points)
-                        screen.blit(shard_surface, (min_x, min_y))
-                else:
-                    # Normaler Partikel-Code für andere Partikeltypen
-                    if particle.get('type') == 'falling_square':
-                        # Fallende Quadrate haben keine Transparenz
-                        color = particle['color']
-                    else:
-                        # Normale Partikel mit Verblassen
-                        if particle['lifetime'] == float('inf'):
-                            alpha = 255  # Volle Sichtbarkeit für unendliche Lebensdauer
-                        else:
-                            alpha = int(255 * (particle['lifetime'] / 20) * 1.5)
-                        alpha = min(255, alpha)  # Nicht über 255 gehen
-                        color = (*particle['color'][:3], alpha)
-                    size = particle.get('size', 8)
-                    particle_surface = pygame.Surface((size, size), pygame.SRCALPHA)
-                    # Zeichne ein Quadrat statt eines Kreises
-                    pygame.draw.rect(particle_surface, color, (0, 0, size, size))
-                    screen.blit(particle_surface, (particle['x'] - size//2, particle['y'] - size//2))
-        
-        # Zeichne fallende Quadrate
-        for square in falling_squares:
-            size = square['size']
-            # Erstelle eine Surface für das rotierte Quadrat
-            square_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-            
-            # Zeichne das Quadrat in der Mitte der Surface
-            pygame.draw.rect(square_surface, square['color'], 
-                           (size/2, size/2, size, size))
-            
-            # Rotiere die Surface
-            rotated_surface = pygame.transform.rotate(square_surface, 
-                                                   math.degrees(square['rotation']))
-            
-            # Berechne die Position für das rotierte Quadrat
-            pos_x = square['x'] - rotated_surface.get_width()/2
-            pos_y = square['y'] - rotated_surface.get_height()/2
-            
-            # Zeichne das rotierte Quadrat
-            screen.blit(rotated_surface, (pos_x, pos_y))
-
-        # Draw balls with damage visualization
-        for ball in balls[:]:
-            if not ball.is_exploding:
-                damage_percentage = ball.damage / ball.health
-                
-                # Zeichne die äußere Hülle (Shell)
-                shell_color = tuple(
-                    min(255, int(c * 0.75))  # 75% der Originalfarbe (vorher 50%)
-                    for c in ball.color
-                )
-                shell_radius = ball.radius + 6  # 6 Pixel größer als der Ball (vorher 4)
-                shell_surface = pygame.Surface((shell_radius * 2, shell_radius * 2), pygame.SRCALPHA)
-                pygame.draw.circle(shell_surface, (*shell_color, 150),  # Alpha auf 150 erhöht (vorher 100)
-                                 (shell_radius, shell_radius), shell_radius)
-                screen.blit(shell_surface, 
-                          (int(ball.x - shell_radius), int(ball.y - shell_radius)))
-                
-                # Basis-Ball mit dunklerer Farbe bei mehr Schaden
-                darkened_color = tuple(
-                    max(0, int(c * (1 - damage_percentage * 0.5)))
-                    for c in ball.color
-                )
-                pygame.draw.circle(screen, darkened_color, (int(ball.x), int(ball.y)), ball.radius)
-                
-                # Zeichne die fixierten Risse
-                length = ball.radius * (0.5 + damage_percentage)
-                for angle in ball.crack_angles:
-                    end_x = ball.x + math.cos(angle) * length
-                    end_y = ball.y + math.sin(angle) * length
-                    
-                    # Dickere Risse mit weißem Highlight
-                    pygame.draw.line(screen, WHITE, 
-                                   (int(ball.x), int(ball.y)),
-                                   (int(end_x), int(end_y)), 1)
-                    pygame.draw.line(screen, BLACK, 
-                                   (int(ball.x), int(ball.y)),
-                                   (int(end_x), int(end_y)), 3)
-
-        # Zeige das Gewinner-Banner und Rangliste an
-        if len(balls) == 1 and not balls[0].is_exploding:
-            rankings.draw_winner_banner_and_rankings(screen, balls[0], eliminated_balls)
-
-        pygame.display.flip()
+            elif event.type == pygame.KEYDOWN:
+                # Zeitskalierung: + schneller, - langsamer, 0 normal
+                if event.key in (pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS):
+                    sim_clock.time_scale *= 2
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    sim_clock.time_scale /= 2
+                elif event.key in (pygame.K_0, pygame.K_KP0):
+                    sim_clock.time_scale = 1.0
+                elif event.key == pygame.K_F3:
+                    if not profiler.enabled:
+                        # Nur für die Übersicht: ohne --profile wird nichts exportiert
+                        profiler = match.profiler = renderer.profiler = FrameProfiler(keep_history=False)
+                        profiler.begin_frame()
+                    overlay = None if overlay else ProfilerOverlay(profiler)
+                    renderer.invalidate()
+                pygame.display.set_caption(f"Bouncing Balls ({sim_clock.time_scale:g}x)")
+        profiler.lap('events')
+
+        # Physik-Schritte: Hexagone, Bälle, fallende Quadrate und Kollisionen
+        for _ in range(sim_clock.advance(clock.get_time() / 1000)):
+            eliminated = match.step()
+            if recorder:
+                recorder.record(eliminated)
+            renderer.after_step(eliminated)
+
+        # Zeichnen zwischen den letzten beiden Physik-Zuständen
+        if overlay:
+            renderer.invalidate()  # Das Overlay liegt über allem, also ganze Frames
+        rects = renderer.draw(sim_clock.alpha)
+        if overlay:
+            overlay.draw(screen)
+            profiler.lap('draw.profiler')
+
+        # Im Dirty-Rect-Modus nur die geänderten Bereiche übertragen
+        window.present(rects)
+        profiler.lap('flip')
+
+        # Frame-Zeit ohne das Warten auf das Framelimit
+        if governor and governor.update((time.perf_counter() - frame_start) * 1000):
+            print(f"Quality: {governor.name} ({governor.average_ms:.1f} ms per frame)")
+            pygame.display.set_caption(f"Bouncing Balls (quality {governor.name})")
+        if profiler.enabled:
+            counts = renderer.counts()
+            if governor:
+                counts['quality_level'] = governor.level
+            profiler.end_frame(counts)
         clock.tick(FPS)
 
     pygame.quit()
 
+    if recorder:
+        recorder.save(record_path)
+        print(f"Replay written to {record_path}")
+    if profile_path and profiler.enabled:
+        profiler.export(profile_path)
+        print(f"Frame timings written to {profile_path}")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Bouncing Balls")
+    parser.add_argument('--headless', action='store_true',
+                        help="Match ohne Fenster und ohne Framelimit simulieren")
+    parser.add_argument('--seed', type=int, default=None, help="Zufalls-Seed des Matches")
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help="Zeitskalierung der Simulation (0.25 bis 16)")
+    parser.add_argument('--step-frames', type=int, default=1,
+                        help="Frames pro Physik-Schritt im Headless-Modus; schneller, aber "
+                             "Werte über 1 ändern den Ausgang eines Matches mit Seed")
+    parser.add_argument('--profile', nargs='?', const='profile.csv', default=None, metavar='PATH',
+                        help="Frame-Zeiten messen und beim Beenden als CSV oder JSON speichern")
+    parser.add_argument('--record', default=None, metavar='PATH',
+                        help="Match aufzeichnen (Wiedergabe mit replay.py play PATH)")
+    parser.add_argument('--frame-target', type=float, default=None, metavar='MS',
+                        help="Effekte reduzieren, wenn ein Frame länger als MS Millisekunden dauert")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="Nur geänderte Bildschirmbereiche neu zeichnen und übertragen")
+    parser.add_argument('--hexagon-frames', action='store_true',
+                        help="Hexagone aus vorgezeichneten Bildern blitten (bis ~80 MB)")
+    args = parser.parse_args()
+
+    if args.headless:
+        from headless import run_match, print_result
+        print_result(run_match(args.seed, step_frames=args.step_frames))
+    else:
+        main(args.seed, args.time_scale, args.profile, args.record, args.frame_target,
+             args.dirty_rects, args.hexagon_frames)
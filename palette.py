@@ -0,0 +1,125 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from constants import COLORS
+
+Color = Tuple[int, int, int]
+
+RAINBOW_COLORS = np.array([
+    (255, 0, 0),    # Red
+    (255, 127, 0),  # Orange
+    (255, 255, 0),  # Yellow
+    (0, 255, 0),    # Green
+    (0, 0, 255),    # Blue
+    (255, 0, 255),  # Pink
+], dtype=np.uint8)
+
+# How far the effects blend their colors towards white
+BOUNCE_TINT = 0.7
+SHARD_TINT = 0.3
+SPIRAL_TINT = 0.8
+SHOCKWAVE_TINT = 0.95
+TINTS = (BOUNCE_TINT, SHARD_TINT, SPIRAL_TINT, SHOCKWAVE_TINT)
+
+# A ball's shell is 75% of its color
+SHELL_SHADE = 0.75
+# Damage levels precomputed per color (a ball has 10 health)
+MAX_HEALTH = 10
+
+
+def brighten(colors, factor: float) -> np.ndarray:
+    # Blend colors towards white (works on a single color or an array of colors)
+    colors = np.asarray(colors, dtype=float)
+    return np.minimum(255, (colors + (255 - colors) * factor).astype(int))
+
+
+def shade(color: Color, factor: float) -> Color:
+    return tuple(min(255, int(c * factor)) for c in color)
+
+
+def damaged(color: Color, damage_percentage: float) -> Color:
+    # Darker with more damage, down to half the color at full damage
+    return tuple(max(0, int(c * (1 - damage_percentage * 0.5))) for c in color)
+
+
+def fade(old: Color, new: Color, max_radius: int, speed: float) -> List[Color]:
+    # Colors of a background spiral at radius 0, speed, 2 * speed, ... up to max_radius
+    colors = []
+    radius = 0
+    while radius <= max_radius:
+        progress = radius / max_radius
+        colors.append(tuple(int(old[i] * (1 - progress) + new[i] * progress) for i in range(3)))
+        radius += speed
+    return colors
+
+
+class Palette:
+    """Color tables for everything derived from the ball and rainbow colors.
+
+    Tints (blends towards white), shell shades and damage levels of the
+    colors in `constants.COLORS` and `RAINBOW_COLORS` are computed once
+    here; other colors are computed on first use and kept. Tints are
+    NumPy arrays for `ParticleSystem.emit()`, the rest are tuples for
+    pygame. Returned arrays are shared and must not be modified.
+    """
+
+    def __init__(self, colors: List[Color], health: int = MAX_HEALTH):
+        self.health = health
+        self.tints: Dict[Tuple[Color, float], np.ndarray] = {}
+        self.tint_tuples: Dict[Tuple[Color, float], Color] = {}
+        self.shells: Dict[Color, Color] = {}
+        self.damage_levels: Dict[Tuple[Color, int], List[Color]] = {}
+        self.fades: Dict[tuple, List[Color]] = {}
+        # Tints of all rainbow colors at once, for emitting many particles
+        self.rainbow_tints = {factor: brighten(RAINBOW_COLORS, factor) for factor in TINTS}
+
+        for color in list(colors) + [tuple(c) for c in RAINBOW_COLORS.tolist()]:
+            for factor in TINTS:
+                self.tint(color, factor)
+            self.shell(color)
+            self.damaged(color, 0, health)
+
+    def tint(self, color: Color, factor: float) -> np.ndarray:
+        key = (color, factor)
+        tinted = self.tints.get(key)
+        if tinted is None:
+            tinted = self.tints[key] = brighten(color, factor)
+            self.tint_tuples[key] = tuple(tinted.tolist())
+        return tinted
+
+    def tint_tuple(self, color: Color, factor: float) -> Color:
+        key = (color, factor)
+        if key not in self.tint_tuples:
+            self.tint(color, factor)
+        return self.tint_tuples[key]
+
+    def rainbow_tint(self, factor: float) -> np.ndarray:
+        # Tinted RAINBOW_COLORS, index them like RAINBOW_COLORS
+        tinted = self.rainbow_tints.get(factor)
+        if tinted is None:
+            tinted = self.rainbow_tints[factor] = brighten(RAINBOW_COLORS, factor)
+        return tinted
+
+    def shell(self, color: Color) -> Color:
+        shell = self.shells.get(color)
+        if shell is None:
+            shell = self.shells[color] = shade(color, SHELL_SHADE)
+        return shell
+
+    def damaged(self, color: Color, damage: int, health: int) -> Color:
+        key = (color, health)
+        levels = self.damage_levels.get(key)
+        if levels is None:
+            levels = self.damage_levels[key] = [damaged(color, level / health) for level in range(health + 1)]
+        if 0 <= damage <= health:
+            return levels[damage]
+        return damaged(color, damage / health)
+
+    def fade(self, old: Color, new: Color, max_radius: int, speed: float) -> List[Color]:
+        key = (old, new, max_radius, speed)
+        colors = self.fades.get(key)
+        if colors is None:
+            colors = self.fades[key] = fade(old, new, max_radius, speed)
+        return colors
+
+
+PALETTE = Palette(COLORS)
@@ -0,0 +1,213 @@
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+from governor import EffectsBudget
+
+# Flags for the particle kinds (a particle without flags is a normal particle)
+PULSE = 1
+SPIRAL = 2
+SHOCKWAVE = 4
+
+# Particle rows kept in the free list at most (about 65 bytes per row)
+POOL_MAX_ROWS = 65536
+
+
+def create_storage(capacity: int) -> tuple:
+    # In the order of ParticleSystem._storage()
+    return (np.zeros((capacity, 2)), np.zeros((capacity, 2)), np.zeros(capacity),
+            np.zeros(capacity), np.zeros(capacity), np.ones(capacity),
+            np.zeros(capacity), np.zeros((capacity, 3), dtype=np.uint8),
+            np.zeros(capacity, dtype=np.uint8))
+
+
+# Storage of systems that have not emitted yet; without rows it is never written
+EMPTY_STORAGE = create_storage(0)
+
+# Generator and (unlimited) budget of systems that are not given their own, so
+# that a ball doesn't carry one of each; a Match hands its balls a seeded
+# generator and, under a QualityGovernor, the governor's budget
+SHARED_RNG = np.random.default_rng()
+UNLIMITED_BUDGET = EffectsBudget()
+
+
+class ParticlePool:
+    """Free list of particle storage shared by the particle systems of one match.
+
+    A system hands its arrays back when it is released or outgrows them, and
+    the next system that needs the same capacity takes them instead of
+    allocating new ones. Stale rows are harmless: a system only reads its
+    first `count` rows, and `emit()` writes every field of the rows it adds.
+    """
+
+    def __init__(self, max_rows: int = POOL_MAX_ROWS):
+        self.max_rows = max_rows
+        self.free: Dict[int, List[tuple]] = {}
+        self.rows = 0  # Rows currently in the free list
+        self.allocated = 0  # Storage blocks created
+        self.reused = 0  # Storage blocks taken from the free list
+        self.allocated_bytes = 0
+
+    def take(self, capacity: int) -> tuple:
+        if capacity == 0:
+            return EMPTY_STORAGE
+        blocks = self.free.get(capacity)
+        if blocks:
+            self.rows -= capacity
+            self.reused += 1
+            return blocks.pop()
+        storage = create_storage(capacity)
+        self.allocated += 1
+        self.allocated_bytes += sum(array.nbytes for array in storage)
+        return storage
+
+    def give(self, storage: tuple):
+        capacity = len(storage[0])
+        if capacity == 0 or self.rows + capacity > self.max_rows:
+            return
+        self.free.setdefault(capacity, []).append(storage)
+        self.rows += capacity
+
+
+class ParticleSystem:
+    """Point particles stored as contiguous NumPy arrays (struct of arrays).
+
+    All particles are advanced together in a few vectorized operations and
+    dead particles are compacted in bulk at the end of every update, so
+    the rows of dead particles are reused by the next `emit()`. The arrays
+    are allocated on the first `emit()`, so systems that never emit (balls
+    in headless matches) stay small. With a `pool` they are taken from it
+    and go back to it when outgrown or on `release()`. New particles are
+    thinned out and shortened according to `budget`; without one nothing
+    is limited. Without `rng` particles are drawn from SHARED_RNG.
+    """
+
+    def __init__(self, capacity: int = 256, rng: Optional[np.random.Generator] = None,
+                 pool: Optional[ParticlePool] = None, budget: Optional[EffectsBudget] = None):
+        self.rng = rng if rng is not None else SHARED_RNG
+        self.pool = pool
+        self.budget = budget if budget is not None else UNLIMITED_BUDGET
+        self.count = 0
+        self.initial_capacity = capacity
+        self._allocate(0)
+
+    def _storage(self) -> tuple:
+        return (self.pos, self.vel, self.lifetime, self.size, self.max_size,
+                self.speed_decay, self.phase, self.color, self.flags)
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        # phase: pulse offset or spiral angle
+        (self.pos, self.vel, self.lifetime, self.size, self.max_size,
+         self.speed_decay, self.phase, self.color, self.flags) = (
+            self.pool.take(capacity) if self.pool is not None
+            else create_storage(capacity) if capacity else EMPTY_STORAGE)
+
+    def _grow(self, needed: int):
+        capacity = self.capacity or self.initial_capacity
+        while capacity < needed:
+            capacity *= 2
+        old = self._storage()
+        self._allocate(capacity)
+        for src, dst in zip(old, self._storage()):
+            dst[:self.count] = src[:self.count]
+        if self.pool is not None:
+            self.pool.give(old)
+
+    def release(self):
+        # Drops all particles and returns the arrays to the pool
+        if self.pool is not None:
+            self.pool.give(self._storage())
+        self.count = 0
+        self._allocate(0)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def emit(self, x, y, dx, dy, lifetime, color, size=8.0, speed_decay=1.0,
+             flags=0, phase=0.0, max_size=0.0):
+        # All arguments may be scalars or arrays of the same length as dx
+        # (color: one color or one per particle)
+        n = len(dx)
+        budget = self.budget
+        kept = budget.allowed(n, self.count)
+        if kept == 0:
+            return
+        if kept < n:
+            # Evenly spread subset, so a ring of particles stays a (sparser) ring
+            keep = np.linspace(0, n - 1, kept).astype(int)
+            x, y, dx, dy, lifetime, size, speed_decay, flags, phase, max_size = (
+                np.asarray(value)[keep] if np.ndim(value) == 1 else value
+                for value in (x, y, dx, dy, lifetime, size, speed_decay, flags, phase, max_size))
+            if np.ndim(color) == 2:
+                color = np.asarray(color)[keep]
+            n = kept
+        if budget.lifetime != 1.0:
+            lifetime = np.maximum(1, np.asarray(lifetime) * budget.lifetime)
+        start = self.count
+        end = start + n
+        if end > self.capacity:
+            self._grow(end)
+        self.pos[start:end, 0] = x
+        self.pos[start:end, 1] = y
+        self.vel[start:end, 0] = dx
+        self.vel[start:end, 1] = dy
+        self.lifetime[start:end] = lifetime
+        self.color[start:end] = color
+        self.size[start:end] = size
+        self.speed_decay[start:end] = speed_decay
+        self.flags[start:end] = flags
+        self.phase[start:end] = phase
+        self.max_size[start:end] = max_size
+        self.count = end
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        vel = self.vel[:n]
+        lifetime = self.lifetime[:n]
+        flags = self.flags[:n]
+
+        vel *= self.speed_decay[:n, None]
+        self.pos[:n] += vel
+        lifetime -= 1
+
+        # Pulsating size
+        pulse = (flags & PULSE) != 0
+        if pulse.any():
+            self.size[:n][pulse] *= 0.8 + 0.4 * np.sin(self.phase[:n][pulse] + lifetime[pulse] * 0.1)
+
+        # Spiral movement
+        spiral = (flags & SPIRAL) != 0
+        if spiral.any():
+            angle = self.phase[:n][spiral] + 0.1
+            self.phase[:n][spiral] = angle
+            vel[spiral, 0] += np.cos(angle) * 0.2
+            vel[spiral, 1] += np.sin(angle) * 0.2
+
+        # Expanding shockwave
+        shockwave = (flags & SHOCKWAVE) != 0
+        if shockwave.any():
+            self.size[:n][shockwave] = self.max_size[:n][shockwave] * (1 - lifetime[shockwave] / 60)
+
+        alive = lifetime > 0
+        if not alive.all():
+            self._compact(np.flatnonzero(alive))
+
+    def _compact(self, keep: np.ndarray):
+        k = len(keep)
+        for array in self._storage():
+            array[:k] = array[keep]
+        self.count = k
+
+    def clear(self):
+        self.count = 0
+
+    def iter_draw(self) -> Iterator[Tuple[float, float, float, Tuple[int, int, int], int]]:
+        # Yields (x, y, size, color, alpha) for every live particle
+        n = self.count
+        if n == 0:
+            return iter(())
+        alpha = np.minimum(255, (255 * (self.lifetime[:n] / 20) * 1.5).astype(int))
+        return zip(self.pos[:n, 0].tolist(), self.pos[:n, 1].tolist(),
+                   self.size[:n].tolist(), map(tuple, self.color[:n].tolist()),
+                   alpha.tolist())
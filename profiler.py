@@ -0,0 +1,151 @@
+import csv
+import json
+import time
+from collections import deque
+from typing import Dict, List, Optional
+import pygame
+
+
+class NullProfiler:
+    """Stand-in used while profiling is off; every call is a no-op."""
+
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, phase: str):
+        pass
+
+    def end_frame(self, counts: Optional[Dict[str, int]] = None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    """Per-frame timings of the game's phases.
+
+    `lap(phase)` charges the time since the previous lap to `phase`, so the
+    instrumented code only marks the end of each phase. Phases that run
+    several times in a frame (e.g. physics steps) are summed. Rolling
+    percentiles cover the last `window` frames. With `keep_history` every
+    frame is also kept for `export()`; without it only the last frame is,
+    so a profiler opened just for the overlay does not grow.
+    """
+
+    enabled = True
+
+    def __init__(self, window: int = 300, keep_history: bool = True):
+        self.window = window
+        self.keep_history = keep_history
+        self.phases: List[str] = []  # In order of first appearance
+        self.history: List[dict] = []
+        self.last_frame: Optional[dict] = None
+        self.recent: Dict[str, deque] = {}
+        self.current: Dict[str, float] = {}
+        self.frame_start = 0.0
+        self.last = 0.0
+
+    def begin_frame(self):
+        self.current = {}
+        self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0.0) + (now - self.last)
+        self.last = now
+
+    def end_frame(self, counts: Optional[Dict[str, int]] = None):
+        frame = {phase: seconds * 1000 for phase, seconds in self.current.items()}
+        frame['total'] = (time.perf_counter() - self.frame_start) * 1000
+        for phase, ms in frame.items():
+            series = self.recent.get(phase)
+            if series is None:
+                series = self.recent[phase] = deque(maxlen=self.window)
+                if phase != 'total':
+                    self.phases.append(phase)
+            series.append(ms)
+        if counts:
+            frame.update(counts)
+        self.last_frame = frame
+        if self.keep_history:
+            self.history.append(frame)
+
+    def percentiles(self, phase: str) -> Dict[str, float]:
+        ordered = sorted(self.recent.get(phase, ()))
+        if not ordered:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        last = len(ordered) - 1
+        return {name: ordered[round(q * last)] for name, q in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {phase: self.percentiles(phase) for phase in self.phases + ['total']}
+
+    def export(self, path: str):
+        # CSV (one row per frame) or JSON (frames plus percentile summary), by file extension
+        if path.endswith('.json'):
+            with open(path, 'w') as file:
+                json.dump({'phases': self.phases, 'summary': self.summary(), 'frames': self.history}, file)
+            return
+        columns = ['frame', 'total'] + self.phases
+        for frame in self.history:
+            for key in frame:
+                if key not in columns:
+                    columns.append(key)
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, columns, restval='')
+            writer.writeheader()
+            for index, frame in enumerate(self.history):
+                writer.writerow({'frame': index, **{key: round(value, 4) if isinstance(value, float) else value
+                                                    for key, value in frame.items()}})
+
+
+class ProfilerOverlay:
+    """On-screen table of phase percentiles, rebuilt every `refresh` frames."""
+
+    def __init__(self, profiler: FrameProfiler, refresh: int = 15):
+        self.profiler = profiler
+        self.refresh = refresh
+        self.font = None
+        self.surface = None
+        self.frames = 0
+
+    def build(self) -> pygame.Surface:
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        rows = [['phase (ms)', 'p50', 'p95', 'p99']]
+        for phase, values in self.profiler.summary().items():
+            rows.append([phase] + [f"{values[name]:.2f}" for name in ('p50', 'p95', 'p99')])
+        counts = ''
+        if self.profiler.last_frame:
+            counts = '  '.join(f"{key[4:]} {value}" for key, value in self.profiler.last_frame.items()
+                               if key.startswith('num_'))
+
+        # Columns: phase left-aligned, percentiles right-aligned
+        rendered = [[self.font.render(cell, True, (255, 255, 255)) for cell in row] for row in rows]
+        widths = [max(row[column].get_width() for row in rendered) for column in range(4)]
+        line_height = self.font.get_linesize()
+        counts_surface = self.font.render(counts, True, (200, 200, 200)) if counts else None
+        width = max(sum(widths) + 3 * 12, counts_surface.get_width() if counts_surface else 0) + 12
+        height = line_height * (len(rows) + (1 if counts_surface else 0)) + 12
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        y = 6
+        for row in rendered:
+            surface.blit(row[0], (6, y))
+            x = 6 + widths[0]
+            for cell, column_width in zip(row[1:], widths[1:]):
+                x += 12 + column_width
+                surface.blit(cell, (x - cell.get_width(), y))
+            y += line_height
+        if counts_surface:
+            surface.blit(counts_surface, (6, y))
+        return surface
+
+    def draw(self, screen):
+        if self.surface is None or self.frames % self.refresh == 0:
+            self.surface = self.build()
+        self.frames += 1
+        screen.blit(self.surface, (8, 8))
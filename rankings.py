@@ -1,23 +1,53 @@
 import pygame
 
+COLOR_NAMES = {
+    (255, 0, 0): "Red",      # Rot
+    (0, 255, 0): "Green",    # Grün
+    (0, 0, 255): "Blue",     # Blau
+    (255, 255, 0): "Yellow", # Gelb
+    (255, 0, 255): "Pink",   # Magenta
+    (0, 255, 255): "Cyan"    # Cyan
+}
+
 class Rankings:
     def __init__(self, width, height, white):
         self.WIDTH = width
         self.HEIGHT = height
         self.WHITE = white
-        self.color_names = {
-            (255, 0, 0): "Red",      # Rot
-            (0, 255, 0): "Green",    # Grün
-            (0, 0, 255): "Blue",     # Blau
-            (255, 255, 0): "Yellow", # Gelb
-            (255, 0, 255): "Pink",   # Magenta
-            (0, 255, 255): "Cyan"    # Cyan
-        }
+        self.color_names = COLOR_NAMES
+        # Fonts werden beim ersten Zeichnen erstellt und dann behalten
+        self.title_font = None
+        self.ranking_font = None
+        # Fertiges Banner und das Ergebnis, für das es gebaut wurde
+        self.banner = None
+        self.banner_key = None
+
+    def result_key(self, winner, eliminated_balls):
+        return (winner.color, tuple((ball.color, ball.survival_time) for ball in eliminated_balls))
+
+    def is_current(self, winner, eliminated_balls):
+        # Ob das zuletzt gebaute Banner dieses Ergebnis zeigt
+        return self.banner_key == self.result_key(winner, eliminated_balls)
 
     def draw_winner_banner_and_rankings(self, screen, winner, eliminated_balls):
-        # Erstelle Fonts
-        title_font = pygame.font.Font(None, 74)  # Größerer Font für den Titel
-        ranking_font = pygame.font.Font(None, 36)  # Kleinerer Font für die Rangliste
+        # Banner nur neu bauen, wenn sich das Ergebnis geändert hat
+        key = self.result_key(winner, eliminated_balls)
+        if key != self.banner_key:
+            self.banner = self.build_banner(winner, eliminated_balls)
+            self.banner_key = key
+        
+        # Platziere Banner in der Mitte des Bildschirms
+        screen.blit(self.banner,
+                   ((self.WIDTH - self.banner.get_width()) // 2,
+                    (self.HEIGHT - self.banner.get_height()) // 2))
+
+    def build_banner(self, winner, eliminated_balls):
+        # Erstelle Fonts (nur einmal pro Instanz)
+        if self.title_font is None:
+            self.title_font = pygame.font.Font(None, 74)  # Größerer Font für den Titel
+            self.ranking_font = pygame.font.Font(None, 36)  # Kleinerer Font für die Rangliste
+        title_font = self.title_font
+        ranking_font = self.ranking_font
         
         # Banner-Titel
         title_text = "Ranking"
@@ -129,7 +159,4 @@ class Rankings:
             
             y_pos += ranking_font.get_height() + line_spacing
         
-        # Platziere Banner in der Mitte des Bildschirms
-        screen.blit(banner,
-                   ((self.WIDTH - max_width) // 2,
-                    (self.HEIGHT - total_height) // 2))
+        return banner
@@ -0,0 +1,408 @@
+import math
+import numpy as np
+import pygame
+from typing import List, Optional
+from background import Background
+from ball import Ball
+from rankings import Rankings
+from simulation import Match, STEP
+from sprite_cache import SurfaceCache, RotatedSpriteAtlas, BallSpriteCache, HexagonFrameBank
+from debris import DebrisLayer
+from dirty_tiles import TileMask
+from profiler import NULL_PROFILER
+from governor import EffectsBudget
+from constants import WHITE, BLACK
+
+# Winkelauflösung des Sprite-Atlas für fallende Quadrate
+SQUARE_ROTATION_STEPS = 72
+
+# Ab diesem Anteil geänderter Bildschirmfläche wird alles neu gezeichnet
+DIRTY_AREA_LIMIT = 0.5
+
+# Fensterhöhe als Anteil der Bildschirmhöhe
+WINDOW_HEIGHT_FRACTION = 0.6
+# Größte Periode (in Arena-Pixeln), mit der Dirty Rects einzeln skaliert werden
+MAX_SCALE_PERIOD = 32
+
+
+class Window:
+    """A window sized to the display that shows a fixed-size arena.
+
+    Matches are simulated and drawn at the arena size, so a seed plays the
+    same on every display; `surface` is what the Renderer draws on. The
+    window is 60% of the display height with the arena's aspect ratio and
+    `present()` scales each frame into it. At the arena size nothing is
+    scaled and dirty rectangles go straight to `pygame.display.update()`.
+    A smaller window scales only the dirty rectangles. A larger one can't:
+    pygame enlarges with a filter whose sampling positions depend on the
+    size of the whole image, so parts would not line up with full frames.
+    Neither can a size that only lines up with the arena over long
+    stretches. `dirty_rects` tells whether dirty rectangles save anything.
+    """
+
+    def __init__(self, arena_size, caption: str = "Bouncing Balls", size=None):
+        pygame.display.init()
+        arena_width, arena_height = arena_size
+        if size is None:
+            height = int(pygame.display.Info().current_h * WINDOW_HEIGHT_FRACTION) or arena_height
+            size = (int(height * arena_width / arena_height), height)
+        self.display = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        self.scaled = size != (arena_width, arena_height)
+        self.surface = pygame.Surface(arena_size) if self.scaled else self.display
+        # Arena pixels after which the scaling repeats on whole display pixels
+        self.period = (arena_width // math.gcd(arena_width, size[0]),
+                       arena_height // math.gcd(arena_height, size[1]))
+        self.dirty_rects = size[0] <= arena_width and max(self.period) <= MAX_SCALE_PERIOD
+
+    def present(self, rects: Optional[List[pygame.Rect]] = None):
+        # rects: geänderte Bereiche aus Renderer.draw(), None für ganze Frames
+        if not self.scaled:
+            if rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(rects)
+            return
+        if rects is None or not self.dirty_rects:
+            pygame.transform.smoothscale(self.surface, self.display.get_size(), self.display)
+            pygame.display.flip()
+            return
+        # Nur die geänderten Bereiche skalieren, jeweils um ein Pixel vergrößert,
+        # damit der Filter an den Rändern dieselben Nachbarn sieht wie beim ganzen Frame
+        updated = []
+        for rect in rects:
+            source = self.aligned(rect.inflate(2, 2))
+            scaled_rect = self.to_display(source)
+            scaled = pygame.transform.smoothscale(self.surface.subsurface(source), scaled_rect.size)
+            target = self.to_display(self.aligned(rect))
+            self.display.blit(scaled, target.topleft, target.move(-scaled_rect.x, -scaled_rect.y))
+            updated.append(target)
+        pygame.display.update(updated)
+
+    def aligned(self, rect: pygame.Rect) -> pygame.Rect:
+        # Smallest rectangle around `rect` (within the arena) whose corners land on
+        # whole display pixels, so each part is scaled exactly like the whole frame
+        step_x, step_y = self.period
+        left = rect.left // step_x * step_x
+        top = rect.top // step_y * step_y
+        right = -(-rect.right // step_x) * step_x
+        bottom = -(-rect.bottom // step_y) * step_y
+        return pygame.Rect(left, top, right - left, bottom - top).clip(self.surface.get_rect())
+
+    def to_display(self, rect: pygame.Rect) -> pygame.Rect:
+        # Display pixels of an aligned arena rectangle
+        display_width, display_height = self.display.get_size()
+        arena_width, arena_height = self.surface.get_size()
+        left = rect.left * display_width // arena_width
+        top = rect.top * display_height // arena_height
+        return pygame.Rect(left, top, rect.right * display_width // arena_width - left,
+                           rect.bottom * display_height // arena_height - top)
+
+
+class Renderer:
+    """Draws a Match onto a surface.
+
+    Owns everything that only exists for drawing: the animated background,
+    the rankings banner and the sprite caches. Each pass is its own method,
+    so passes can be timed or benchmarked in isolation.
+
+    With `dirty_rects` only the regions that changed since the last frame
+    are restored from a cached background and redrawn; `draw()` then
+    returns them for `pygame.display.update()`. It returns None when the
+    whole screen was redrawn and has to be flipped.
+    """
+
+    def __init__(self, screen: pygame.Surface, match: Match, dirty_rects: bool = False,
+                 hexagon_frames: bool = False, budget: Optional[EffectsBudget] = None):
+        self.screen = screen
+        self.match = match
+        width, height = screen.get_size()
+
+        # Create Rankings instance
+        self.rankings = Rankings(width, height, WHITE)
+
+        # Cache für häufig verwendete Surfaces (Trails, Partikel, Hüllen)
+        self.surface_cache = SurfaceCache()
+
+        # Ein fertiges Sprite pro Ball (Hülle, Körper, Risse), neu nur nach Schaden;
+        # Hülle 6 Pixel größer als der Ball, Alpha 150
+        self.ball_sprites = BallSpriteCache(6, 150)
+
+        # Vorrotierte Sprites der fallenden Quadrate (5° Auflösung)
+        self.square_atlas = RotatedSpriteAtlas(SQUARE_ROTATION_STEPS)
+
+        # Vorgezeichnete Hexagon-Bilder nach gerundeter Drehung und Pulsierung; nur auf
+        # Wunsch, da ein Match zu kurz ist, um die Bilder (bis ~80 MB) oft wiederzuverwenden
+        self.hexagon_frames = HexagonFrameBank() if hexagon_frames else None
+
+        # Ruhende Quadrate werden einmalig in diese Ebene gezeichnet
+        self.debris_layer = DebrisLayer(width, height, self.square_atlas)
+
+        # Erstelle den animierten Hintergrund
+        self.background = Background(width, height, match.rng)
+
+        # Misst die einzelnen Zeichenphasen, wenn ein FrameProfiler gesetzt ist
+        self.profiler = NULL_PROFILER
+
+        # Vom QualityGovernor gesetzte Grenzen (Anteil der gezeichneten Trails)
+        self.budget = budget if budget is not None else EffectsBudget()
+
+        # Dirty-Rect-Modus: Hintergrund-Ebene (Schwarz und Gitter) und die
+        # Bereiche des letzten Frames, die beim nächsten Frame wiederhergestellt werden
+        self.dirty_rects = dirty_rects
+        self.screen_rect = screen.get_rect()
+        self.grid_layer = pygame.Surface((width, height)) if dirty_rects else None
+        self.sprite_tiles = TileMask(width, height)
+        self.last_sprite_tiles = TileMask(width, height)
+        self.dirty_tiles = TileMask(width, height)
+        self.pending_rects: List[pygame.Rect] = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        # Nächsten Frame vollständig zeichnen (z.B. nach einem Overlay)
+        self.full_redraw = True
+
+    def after_step(self, eliminated: List[Ball]):
+        # Zustand, der pro Physik-Schritt mitläuft: Hintergrund und ruhende Quadrate
+        match = self.match
+        for ball in eliminated:
+            self.background.update_colors(match.balls, ball.color)  # Aktualisiere Hintergrundfarben
+            self.ball_sprites.discard(ball)
+            self.full_redraw = True  # Neue Punktfarben im ganzen Gitter
+        self.background.update(match.time)
+        self.profiler.lap('background')
+        self.pending_rects.extend(self.debris_layer.bake(match.take_settled_squares()))
+        self.profiler.lap('debris')
+
+    def draw(self, interpolation: float = 1.0) -> Optional[List[pygame.Rect]]:
+        # Zeichnen zwischen den letzten beiden Physik-Zuständen
+        lap = self.profiler.lap
+        self.background.update_points(self.match.time - (1 - interpolation) * STEP)
+        lap('background')
+
+        if not self.dirty_rects:
+            self.screen.fill(BLACK)
+            self.draw_background()
+            lap('draw.background')
+            self.draw_passes(interpolation)
+            return None
+
+        # Nur die Bereiche, die sich seit dem letzten Frame geändert haben:
+        # wo Objekte im letzten Frame waren, wo sie jetzt sind, und das bewegte Gitter
+        grid_rects = self.background.grid_changes()
+        self.last_sprite_tiles, self.sprite_tiles = self.sprite_tiles, self.last_sprite_tiles
+        self.sprite_tiles.clear()
+        self.mark_sprites(self.sprite_tiles, interpolation)
+        winner = self.match.winner
+        if winner is not None and not self.rankings.is_current(winner, self.match.eliminated_balls):
+            # Das Banner ist deckend: nur beim Erscheinen und bei Änderungen vollständig zeichnen
+            self.full_redraw = True
+        rects = None
+        if not self.full_redraw and grid_rects is not None:
+            dirty = self.dirty_tiles
+            dirty.clear()
+            dirty.add(self.sprite_tiles)
+            dirty.add(self.last_sprite_tiles)
+            dirty.add_rects(grid_rects)
+            dirty.add_rects(self.pending_rects)
+            if dirty.coverage() <= DIRTY_AREA_LIMIT:
+                rects = dirty.rects()
+        self.pending_rects = []
+        self.full_redraw = False
+
+        layer = self.grid_layer
+        if rects is None:
+            # Alles neu: Hintergrund-Ebene komplett aufbauen
+            layer.fill(BLACK)
+            self.background.draw_grid(layer)
+            self.screen.blit(layer, (0, 0))
+        else:
+            if grid_rects:
+                # Gitter nur dort neu zeichnen, wo sich Punkte bewegt haben
+                layer.set_clip(self.screen_rect.unionall(grid_rects))
+                layer.fill(BLACK)
+                self.background.draw_grid(layer)
+                layer.set_clip(None)
+            for rect in rects:
+                self.screen.blit(layer, rect, rect)
+        self.background.draw_effects(self.screen)
+        lap('draw.background')
+        self.draw_passes(interpolation, rects)
+        return rects
+
+    def draw_passes(self, interpolation: float, rects: Optional[List[pygame.Rect]] = None):
+        # Alle Ebenen über dem Hintergrund, in Zeichenreihenfolge
+        lap = self.profiler.lap
+        self.draw_hexagons(interpolation)
+        lap('draw.hexagons')
+        self.draw_trails()
+        lap('draw.trails')
+        self.draw_shards()
+        lap('draw.shards')
+        self.draw_particles()
+        lap('draw.particles')
+        self.draw_debris(rects)
+        lap('draw.debris')
+        self.draw_falling_squares()
+        lap('draw.falling_squares')
+        self.draw_balls(interpolation)
+        lap('draw.balls')
+        self.draw_banner()
+        lap('draw.banner')
+
+    def mark_sprites(self, tiles: TileMask, interpolation: float = 1.0):
+        # Bereiche, die die bewegten Objekte in diesem Frame bedecken
+        for hexagon in self.match.hexagons:
+            rect = hexagon.interpolated(interpolation).bounding_rect()
+            tiles.add_rect(rect.left, rect.top, rect.right, rect.bottom)
+        for ball in self.match.balls:
+            if not ball.is_exploding:
+                # Hülle, Körper und Risse
+                ball_x, ball_y = ball.interpolated_position(interpolation)
+                reach = max(ball.radius + 7, ball.radius * (0.5 + ball.damage / ball.health) + 3)
+                tiles.add_rect(ball_x - reach, ball_y - reach, ball_x + reach, ball_y + reach)
+                # Trail-Segmente
+                trail = ball.trail
+                if trail:
+                    points = np.array(trail)
+                    tiles.add_points(points[:, 0], points[:, 1], ball.radius * 0.5 + 2)
+            particles = ball.particles
+            if particles.count:
+                n = particles.count
+                tiles.add_points(particles.pos[:n, 0], particles.pos[:n, 1],
+                                 float(particles.size[:n].max()) + 2)
+            for shard in ball.shards:
+                xs = [x for x, _ in shard['points']]
+                ys = [y for _, y in shard['points']]
+                tiles.add_rect(min(xs) - 2, min(ys) - 2, max(xs) + 2, max(ys) + 2)
+        for square in self.match.falling_squares:
+            # Das rotierte Sprite ist höchstens size * Wurzel 2 breit
+            half = square['size'] * 0.75 + 2
+            tiles.add_rect(square['x'] - half, square['y'] - half, square['x'] + half, square['y'] + half)
+        for effect in self.background.effect_rects():
+            tiles.add_rect(effect.left, effect.top, effect.right, effect.bottom)
+
+    def counts(self) -> dict:
+        # Objektzahlen für den Profiler
+        balls = self.match.balls
+        return {
+            'num_balls': len(balls),
+            'num_particles': sum(len(ball.particles) for ball in balls),
+            'num_shards': sum(len(ball.shards) for ball in balls),
+            'num_falling_squares': len(self.match.falling_squares),
+            'num_debris': self.debris_layer.count,
+            'num_surfaces': len(self.surface_cache),
+            'num_ball_sprites': len(self.ball_sprites),
+            'num_hexagon_frames': len(self.hexagon_frames) if self.hexagon_frames is not None else 0,
+        }
+
+    def draw_background(self):
+        # Zeichne den animierten Hintergrund
+        self.background.draw(self.screen)
+
+    def draw_hexagons(self, interpolation: float = 1.0):
+        # Rotation und Pulsierung zwischen den letzten beiden Physik-Zuständen
+        screen = self.screen
+        hexagon_frames = self.hexagon_frames
+        for hexagon in self.match.hexagons:
+            hexagon.interpolated(interpolation).draw(screen, hexagon_frames)
+
+    def draw_trails(self):
+        screen = self.screen
+        surface_cache = self.surface_cache
+        trail = self.budget.trail
+        if trail <= 0:
+            return
+        for ball in self.match.balls:
+            if not ball.is_exploding:
+                # Bei gekürzten Trails entfallen die ältesten (kleinsten) Segmente
+                first = int(ball.trail_length * (1 - trail))
+                for i, pos in enumerate(ball.trail):
+                    if i < first:
+                        continue
+                    alpha = int(255 * (i / ball.trail_length))
+
+                    rect_width = ball.radius * 0.5
+                    rect_height = ball.radius * 0.3 * (i / ball.trail_length)
+                    if int(rect_height) == 0:
+                        continue
+
+                    trail_surface = surface_cache.rect(int(rect_width), int(rect_height),
+                                                       ball.color[:3], alpha)
+
+                    screen.blit(trail_surface, (
+                        pos[0] - rect_width/2,
+                        pos[1] - rect_height/2
+                    ))
+
+    def draw_shards(self):
+        screen = self.screen
+        for ball in self.match.balls:
+            for shard in ball.shards:
+                # Zeichne Splitter mit Verblassen
+                alpha = int(255 * (shard['lifetime'] / 120))
+                color = (*shard['color'][:3], alpha)
+
+                # Erstelle Surface für den Splitter
+                points = [(int(x), int(y)) for x, y in shard['points']]
+
+                # Berechne Bounding Box für Surface
+                min_x = min(x for x, _ in points)
+                max_x = max(x for x, _ in points)
+                min_y = min(y for _, y in points)
+                max_y = max(y for _, y in points)
+                width = max_x - min_x + 2
+                height = max_y - min_y + 2
+
+                if width > 0 and height > 0:
+                    shard_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+                    # Verschiebe Punkte relativ zur Surface
+                    adjusted_points = [(x - min_x, y - min_y) for x, y in points]
+                    pygame.draw.polygon(shard_surface, color, adjusted_points)
+                    screen.blit(shard_surface, (min_x, min_y))
+
+    def draw_particles(self):
+        screen = self.screen
+        surface_cache = self.surface_cache
+        for ball in self.match.balls:
+            # Normale Partikel mit Verblassen
+            for x, y, size, color, alpha in ball.particles.iter_draw():
+                if size < 1:
+                    continue
+                # Zeichne ein Quadrat statt eines Kreises
+                particle_surface = surface_cache.rect(int(size), int(size), color, alpha)
+                screen.blit(particle_surface, (x - size//2, y - size//2))
+
+    def draw_debris(self, rects: Optional[List[pygame.Rect]] = None):
+        # Zeichne ruhende Quadrate (eine Ebene, ein Blit bzw. einer pro geändertem Bereich)
+        self.debris_layer.draw(self.screen, rects)
+
+    def draw_falling_squares(self):
+        # Zeichne fallende Quadrate (vorrotierte Sprites aus dem Atlas)
+        screen = self.screen
+        for square in self.match.falling_squares:
+            rotated_surface = self.square_atlas.get(square['size'], square['color'], square['rotation'])
+
+            # Berechne die Position für das rotierte Quadrat
+            pos_x = square['x'] - rotated_surface.get_width()/2
+            pos_y = square['y'] - rotated_surface.get_height()/2
+
+            # Zeichne das rotierte Quadrat
+            screen.blit(rotated_surface, (pos_x, pos_y))
+
+    def draw_balls(self, interpolation: float = 1.0):
+        # Draw balls with damage visualization: Hülle, abgedunkelter Körper und Risse
+        # kommen als ein Sprite aus dem Cache, ein Blit pro Ball
+        screen = self.screen
+        ball_sprites = self.ball_sprites
+        for ball in self.match.balls:
+            if not ball.is_exploding:
+                ball_x, ball_y = ball.interpolated_position(interpolation)
+                sprite, half = ball_sprites.get(ball)
+                screen.blit(sprite, (int(ball_x) - half, int(ball_y) - half))
+
+    def draw_banner(self):
+        # Zeige das Gewinner-Banner und Rangliste an
+        winner = self.match.winner
+        if winner is not None:
+            self.rankings.draw_winner_banner_and_rankings(self.screen, winner, self.match.eliminated_balls)
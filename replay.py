@@ -0,0 +1,455 @@
+import os
+import sys
+
+# Aufnehmen geht ohne Fenster; muss vor constants feststehen
+if sys.argv[1:2] == ['record']:
+    os.environ.setdefault('BOUNCING_BALLS_HEADLESS', '1')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import json
+from array import array
+import struct
+import zlib
+import numpy as np
+from typing import List, Optional
+from ball import Ball
+from hexagon import Hexagon
+from simulation import Match, STEP, update_falling_squares
+from particles import ParticlePool
+from constants import WIDTH, HEIGHT, FPS
+
+MAGIC = b'BBRP'
+VERSION = 1
+# Positions are stored in 1/16 pixel
+POSITION_SCALE = 16
+# Recorded states per chunk; every chunk starts with a keyframe
+KEYFRAME_INTERVAL = 120
+
+# Ball status in keyframes
+ALIVE, EXPLODING, ELIMINATED = range(3)
+# Event types in frame records
+DAMAGE, EXPLODE, ELIMINATE = range(3)
+
+HEADER = struct.Struct('<4sHI')
+KEYFRAME_BALL = struct.Struct('<BiiffBIhB')
+DELTA = struct.Struct('<hh')
+
+
+def quantize(value: float) -> int:
+    return int(round(value * POSITION_SCALE))
+
+
+class ReplayRecorder:
+    """Records a Match as a compact binary stream.
+
+    The header holds the seed, the configuration and the hexagon layout.
+    After it come zlib-compressed chunks. Each chunk starts with a full
+    keyframe of one state, followed by records for the next
+    KEYFRAME_INTERVAL states. A record holds the ball position deltas and
+    the damage, explosion and elimination events of one step. Playing
+    forward only reads records; seeking starts at the nearest keyframe.
+    Events are found by comparing each ball with its previous state, so
+    Ball and Match need no hooks.
+    """
+
+    def __init__(self, match: Match, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.match = match
+        self.keyframe_interval = keyframe_interval
+        self.balls = list(match.balls)  # Ids are positions in this list
+        self.ids = {id(ball): index for index, ball in enumerate(self.balls)}
+        self.header = {
+            'version': VERSION,
+            'seed': match.seed,
+            'step_frames': match.step_frames,
+            'continuous': match.continuous,
+            'fps': FPS,
+            'width': WIDTH,
+            'height': HEIGHT,
+            'position_scale': POSITION_SCALE,
+            'keyframe_interval': keyframe_interval,
+            'start_frame': match.frame,
+            'balls': [{'color': list(ball.color), 'radius': ball.radius, 'health': ball.health}
+                      for ball in self.balls],
+            'hexagons': [{'x': hexagon.x, 'y': hexagon.y, 'size': hexagon.size,
+                          'rotation_speed': hexagon.rotation_speed, 'pulse_offset': hexagon.pulse_offset}
+                         for hexagon in match.hexagons],
+        }
+        self.chunks: List[bytes] = []
+        self.buffer = bytearray()
+        self.states = 0  # Recorded states including the initial one
+        self.eliminated: List[int] = []
+        self.positions = [(quantize(ball.x), quantize(ball.y)) for ball in self.balls]
+        self.status = [ALIVE] * len(self.balls)
+        self.damage = [ball.damage for ball in self.balls]
+        self.cracks = [len(ball.crack_angles) for ball in self.balls]
+        self.record()
+
+    def record(self, eliminated: Optional[List[Ball]] = None):
+        # Call once after every Match.step() with the balls it returned
+        if self.states > 0:
+            self.write_frame(eliminated or [])
+        if self.states % self.keyframe_interval == 0:
+            self.flush()
+            self.write_keyframe()
+        self.states += 1
+
+    def write_keyframe(self):
+        match = self.match
+        buffer = bytearray()
+        buffer += struct.pack('<IB', match.frame, len(self.balls))
+        for index, ball in enumerate(self.balls):
+            if index in self.eliminated:
+                status = ELIMINATED
+            elif ball.is_exploding:
+                status = EXPLODING
+            else:
+                status = ALIVE
+            x, y = quantize(ball.x), quantize(ball.y)
+            buffer += KEYFRAME_BALL.pack(status, x, y, ball.dx, ball.dy, ball.damage, ball.survival_time,
+                                         ball.explosion_timer, len(ball.crack_angles))
+            buffer += struct.pack(f'<{len(ball.crack_angles)}d', *ball.crack_angles)
+            self.positions[index] = (x, y)
+        buffer += struct.pack('<B', len(self.eliminated))
+        buffer += bytes(self.eliminated)
+        buffer += struct.pack(f'<{len(match.hexagons)}d', *(hexagon.rotation for hexagon in match.hexagons))
+        # Length first, so that playing forward can skip the keyframe
+        self.buffer += struct.pack('<I', len(buffer))
+        self.buffer += buffer
+
+    def write_frame(self, eliminated: List[Ball]):
+        events = bytearray()
+        count = 0
+        deltas = bytearray()
+        for index, ball in enumerate(self.balls):
+            status = self.status[index]
+            if status != ALIVE:
+                continue
+            # Only balls that were moving at the start of the step are stored
+            x, y = quantize(ball.x), quantize(ball.y)
+            old_x, old_y = self.positions[index]
+            deltas += DELTA.pack(x - old_x, y - old_y)
+            self.positions[index] = (x, y)
+
+            if ball.damage != self.damage[index]:
+                new = ball.crack_angles[self.cracks[index]:]
+                events += struct.pack(f'<BBBB{len(new)}d', DAMAGE, index, ball.damage, len(new), *new)
+                self.damage[index] = ball.damage
+                self.cracks[index] = len(ball.crack_angles)
+                count += 1
+            if ball.is_exploding:
+                events += struct.pack('<BB', EXPLODE, index)
+                self.status[index] = EXPLODING
+                count += 1
+        for ball in eliminated:
+            index = self.ids[id(ball)]
+            events += struct.pack('<BB', ELIMINATE, index)
+            self.status[index] = ELIMINATED
+            self.eliminated.append(index)
+            count += 1
+        self.buffer += deltas
+        self.buffer += struct.pack('<B', count)
+        self.buffer += events
+
+    def flush(self):
+        if self.buffer:
+            self.chunks.append(zlib.compress(bytes(self.buffer), 9))
+            self.buffer = bytearray()
+
+    def save(self, path: str):
+        self.flush()
+        header = dict(self.header, states=self.states)
+        header_bytes = json.dumps(header).encode()
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(header_bytes)))
+            file.write(header_bytes)
+            file.write(struct.pack('<I', len(self.chunks)))
+            for chunk in self.chunks:
+                file.write(struct.pack('<I', len(chunk)))
+                file.write(chunk)
+
+
+class ReplayView:
+    """The parts of a Match the Renderer needs, driven by a replay.
+
+    Balls are real Ball objects. Only their positions, damage, cracks and
+    explosions come from the replay; particles, shards and falling squares
+    are regenerated for display from explosions.
+    """
+
+    def __init__(self, header: dict, effects: bool = True):
+        self.frame = header['start_frame']
+        self.step_frames = header['step_frames']
+        # Wie Match.rng: Zufall der neu erzeugten Effekte und des Hintergrunds
+        self.rng = np.random.default_rng(header.get('seed'))
+        self.particle_pool = ParticlePool()
+        self.all_balls: List[Ball] = []
+        for entry in header['balls']:
+            ball = Ball(0, 0, tuple(entry['color']))
+            ball.radius = entry['radius']
+            ball.health = entry['health']
+            ball.effects = effects
+            ball.particles.rng = self.rng
+            ball.particles.pool = self.particle_pool
+            self.all_balls.append(ball)
+        self.hexagons = []
+        for entry in header['hexagons']:
+            hexagon = Hexagon(entry['x'], entry['y'], entry['size'])
+            hexagon.rotation_speed = entry['rotation_speed']
+            hexagon.pulse_offset = entry['pulse_offset']
+            self.hexagons.append(hexagon)
+        self.balls: List[Ball] = []
+        self.eliminated_balls: List[Ball] = []
+        self.falling_squares: List[dict] = []
+        self.settled_squares: List[dict] = []
+
+    @property
+    def time(self) -> float:
+        return self.frame * STEP
+
+    @property
+    def winner(self) -> Optional[Ball]:
+        if len(self.balls) == 1 and not self.balls[0].is_exploding:
+            return self.balls[0]
+        return None
+
+    def take_settled_squares(self) -> List[dict]:
+        settled = self.settled_squares
+        self.settled_squares = []
+        return settled
+
+
+class ReplayPlayer:
+    """Plays back a recorded match, forwards and by seeking to any state."""
+
+    def __init__(self, path: str, effects: bool = True):
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, header_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Bouncing Balls replay")
+        if version > VERSION:
+            raise ValueError(f"Replay version {version} is newer than supported ({VERSION})")
+        offset = HEADER.size
+        self.header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+        (chunk_count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        self.chunks: List[bytes] = []
+        for _ in range(chunk_count):
+            (length,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            self.chunks.append(data[offset:offset + length])
+            offset += length
+
+        self.states = self.header['states']
+        self.keyframe_interval = self.header['keyframe_interval']
+        self.scale = self.header['position_scale']
+        self.view = ReplayView(self.header, effects)
+        self.index = {id(ball): index for index, ball in enumerate(self.view.all_balls)}
+        self.chunk_index = -1
+        self.chunk = b''
+        self.offset = 0
+        self.state = -1  # Index of the state the view shows
+        self.seek(0)
+
+    @property
+    def frames(self) -> int:
+        # Last simulation frame of the recording
+        return self.header['start_frame'] + (self.states - 1) * self.header['step_frames']
+
+    def seek(self, state: int):
+        # Jump to the nearest keyframe at or before `state`, unless that is
+        # behind the current state in the same chunk, then play forward
+        state = max(0, min(self.states - 1, state))
+        chunk_index = state // self.keyframe_interval
+        if state < self.state or chunk_index != self.state // self.keyframe_interval:
+            self.load_chunk(chunk_index)
+            self.read_keyframe()
+        while self.state < state:
+            self.step()
+
+    def load_chunk(self, index: int):
+        self.chunk_index = index
+        self.chunk = zlib.decompress(self.chunks[index])
+        self.offset = 0
+
+    def read_keyframe(self):
+        view = self.view
+        chunk = self.chunk
+        self.offset += 4  # Keyframe length
+        frame, count = struct.unpack_from('<IB', chunk, self.offset)
+        self.offset += 5
+        view.frame = frame
+        view.balls = []
+        view.falling_squares.clear()
+        view.settled_squares.clear()
+        self.positions = []
+        for index in range(count):
+            ball = view.all_balls[index]
+            status, x, y, dx, dy, damage, survival_time, explosion_timer, cracks = \
+                KEYFRAME_BALL.unpack_from(chunk, self.offset)
+            self.offset += KEYFRAME_BALL.size
+            ball.crack_angles = array('d', struct.unpack_from(f'<{cracks}d', chunk, self.offset))
+            self.offset += 8 * cracks
+            ball.x = ball.prev_x = x / self.scale
+            ball.y = ball.prev_y = y / self.scale
+            ball.dx, ball.dy = dx, dy
+            ball.damage = damage
+            ball.survival_time = survival_time
+            ball.is_exploding = status == EXPLODING
+            ball.explosion_timer = explosion_timer
+            ball.trail.clear()
+            ball.particles.clear()
+            ball.shards.clear()
+            ball.falling_squares.clear()
+            self.positions.append([x, y])
+            if status != ELIMINATED:
+                view.balls.append(ball)
+        (eliminated,) = struct.unpack_from('<B', chunk, self.offset)
+        self.offset += 1
+        view.eliminated_balls = [view.all_balls[index] for index in chunk[self.offset:self.offset + eliminated]]
+        self.offset += eliminated
+        rotations = struct.unpack_from(f'<{len(view.hexagons)}d', chunk, self.offset)
+        self.offset += 8 * len(view.hexagons)
+        for hexagon, rotation in zip(view.hexagons, rotations):
+            hexagon.rotation = rotation
+            hexagon.update(view.time, 0)
+        self.state = self.chunk_index * self.keyframe_interval
+
+    def step(self) -> List[Ball]:
+        # Advances the view by one recorded state; returns the balls eliminated in it
+        if self.state + 1 >= self.states:
+            return []
+        if self.offset >= len(self.chunk):
+            # Next chunk: its keyframe is the state we are in already
+            self.load_chunk(self.chunk_index + 1)
+            (length,) = struct.unpack_from('<I', self.chunk, 0)
+            self.offset = 4 + length
+
+        view = self.view
+        chunk = self.chunk
+        frames = view.step_frames
+        view.frame += frames
+        for hexagon in view.hexagons:
+            hexagon.update(view.time, frames)
+
+        for ball in view.balls:
+            if not ball.is_exploding:
+                delta_x, delta_y = DELTA.unpack_from(chunk, self.offset)
+                self.offset += DELTA.size
+                position = self.positions[self.index[id(ball)]]
+                position[0] += delta_x
+                position[1] += delta_y
+                # Velocity from the movement, for the trail
+                ball.dx = delta_x / self.scale / frames
+                ball.dy = delta_y / self.scale / frames
+                ball.begin_step()
+                ball.x = position[0] / self.scale
+                ball.y = position[1] / self.scale
+            else:
+                ball.begin_step()
+            if ball.falling_squares:
+                view.falling_squares.extend(ball.falling_squares)
+                ball.falling_squares.clear()
+            ball.update_particles()
+            ball.update(frames)
+
+        eliminated = []
+        (count,) = struct.unpack_from('<B', chunk, self.offset)
+        self.offset += 1
+        for _ in range(count):
+            kind, index = struct.unpack_from('<BB', chunk, self.offset)
+            self.offset += 2
+            ball = view.all_balls[index]
+            if kind == DAMAGE:
+                damage, cracks = struct.unpack_from('<BB', chunk, self.offset)
+                self.offset += 2
+                ball.damage = damage
+                ball.crack_angles.extend(struct.unpack_from(f'<{cracks}d', chunk, self.offset))
+                self.offset += 8 * cracks
+            elif kind == EXPLODE:
+                ball.start_explosion()
+            elif kind == ELIMINATE:
+                view.balls.remove(ball)
+                ball.particles.release()
+                view.eliminated_balls.append(ball)
+                eliminated.append(ball)
+
+        update_falling_squares(view.falling_squares, view.settled_squares)
+        self.state += 1
+        return eliminated
+
+
+def record_match(path: str, seed: Optional[int] = None, max_frames: int = FPS * 600,
+                 step_frames: int = 1) -> Match:
+    # Plays a headless match and saves its replay
+    match = Match(seed, effects=False, step_frames=step_frames)
+    recorder = ReplayRecorder(match)
+    while match.winner is None and match.balls and match.frame < max_frames:
+        recorder.record(match.step())
+    recorder.save(path)
+    return match
+
+
+def play(path: str, start: int = 0):
+    import pygame
+    from renderer import Renderer, Window
+
+    player = ReplayPlayer(path)
+    window = Window((player.header['width'], player.header['height']), "Replay")
+    clock = pygame.time.Clock()
+    renderer = Renderer(window.surface, player.view)
+    player.seek(start)
+    paused = False
+    seek_states = 5 * FPS // player.header['step_frames']
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                # Leertaste pausiert, Pfeiltasten springen 5 Sekunden
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.state + seek_states)
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.state - seek_states)
+                elif event.key == pygame.K_HOME:
+                    player.seek(0)
+
+        if not paused:
+            renderer.after_step(player.step())
+        renderer.draw()
+        pygame.display.set_caption(f"Replay {player.view.frame / FPS:.1f}s / {player.frames / FPS:.1f}s"
+                                   + (" (paused)" if paused else ""))
+        window.present()
+        clock.tick(FPS // player.header['step_frames'])
+
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and play back Bouncing Balls matches")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="simulate a match headless and save its replay")
+    record.add_argument('path')
+    record.add_argument('--seed', type=int, default=None, help="random seed of the match")
+    record.add_argument('--step-frames', type=int, default=1, help="frames simulated per physics step")
+    playback = commands.add_parser('play', help="play back a replay in a window")
+    playback.add_argument('path')
+    playback.add_argument('--start', type=float, default=0.0, help="start at this many seconds")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        match = record_match(args.path, args.seed, step_frames=args.step_frames)
+        print(f"Recorded {match.frame} frames to {args.path} ({os.path.getsize(args.path) / 1024:.1f} KB)")
+    else:
+        header = ReplayPlayer(args.path, effects=False).header
+        play(args.path, int(args.start * FPS / header['step_frames']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import random
+import numpy as np
+from typing import Callable, List, Optional
+from ball import Ball
+from hexagon import Hexagon
+from spatial_hash import SpatialHash, ObstacleIndex, resolve_ball_collisions
+from ccd import advance_balls_swept
+from profiler import NULL_PROFILER
+from governor import EffectsBudget
+from particles import ParticlePool
+from constants import WIDTH, HEIGHT, COLORS, FPS
+
+# Dauer eines Physik-Schritts in Sekunden
+STEP = 1 / FPS
+# Erlaubter Bereich für die Zeitskalierung
+MIN_TIME_SCALE = 0.25
+MAX_TIME_SCALE = 16.0
+
+
+def default_layout() -> List[Hexagon]:
+    # Hexagongröße (etwas größer als die ursprüngliche Quadratgröße)
+    hexagon_size = 40  # Radius des Hexagons
+    # Abstand vom Rand (20% der Fensterbreite/höhe)
+    margin_x = int(WIDTH * 0.20)
+    margin_y = int(HEIGHT * 0.20)
+
+    # Erstelle fünf Hexagone symmetrisch angeordnet
+    return [
+        Hexagon(margin_x, margin_y, hexagon_size),  # Links oben
+        Hexagon(WIDTH - margin_x - hexagon_size*2, margin_y, hexagon_size),  # Rechts oben
+        Hexagon(WIDTH//2 - hexagon_size, HEIGHT//2 - hexagon_size, hexagon_size),  # Mitte
+        Hexagon(margin_x, HEIGHT - margin_y - hexagon_size*2, hexagon_size),  # Links unten
+        Hexagon(WIDTH - margin_x - hexagon_size*2, HEIGHT - margin_y - hexagon_size*2, hexagon_size)  # Rechts unten
+    ]
+
+
+def field_layout(spacing: int = 120, hexagon_size: int = 20) -> List[Hexagon]:
+    # Dichtes Hexagon-Feld über die ganze Arena, z.B. für Stresstests
+    return [
+        Hexagon(x, y, hexagon_size)
+        for y in range(spacing // 2, HEIGHT - hexagon_size, spacing)
+        for x in range(spacing // 2, WIDTH - hexagon_size, spacing)
+    ]
+
+
+class SimulationClock:
+    """Fixed-timestep clock with an accumulator and time scaling.
+
+    Real frame time (scaled) is collected in the accumulator and paid out in
+    physics steps of STEP seconds. `alpha` is how far the rendered frame lies
+    between the last two physics states.
+    """
+
+    def __init__(self, time_scale: float = 1.0, max_frame_time: float = 0.25):
+        self.time_scale = time_scale
+        self.max_frame_time = max_frame_time  # Verhindert eine Todesspirale bei langsamen Frames
+        self.accumulator = 0.0
+
+    @property
+    def time_scale(self) -> float:
+        return self._time_scale
+
+    @time_scale.setter
+    def time_scale(self, value: float):
+        self._time_scale = max(MIN_TIME_SCALE, min(MAX_TIME_SCALE, value))
+
+    def advance(self, frame_time: float) -> int:
+        # Returns the number of physics steps to run for this frame
+        self.accumulator += min(frame_time, self.max_frame_time) * self.time_scale
+        steps = int(self.accumulator / STEP)
+        self.accumulator -= steps * STEP
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / STEP
+
+
+class Match:
+    """Game state and physics of one match, without any drawing.
+
+    `main()` renders a Match every frame, headless runs just call `step()`
+    until there is a winner. With `continuous` collisions, one step may cover
+    `step_frames` frames of ball motion without balls tunneling through
+    each other or through hexagon edges; they are on by default only for
+    `step_frames` > 1, single-frame steps use the overlap checks. Coarser
+    steps still change the outcome of a seeded match: hexagons move
+    linearly within a step and contacts are resolved in a different order.
+    """
+
+    def __init__(self, seed: Optional[int] = None, effects: bool = True,
+                 layout: Callable[[], List[Hexagon]] = default_layout,
+                 step_frames: int = 1, continuous: Optional[bool] = None,
+                 budget: Optional[EffectsBudget] = None):
+        if seed is not None:
+            random.seed(seed)
+        self.seed = seed
+        self.effects = effects
+        # Zufall für Partikel, Splitter und Hintergrund-Effekte, getrennt von `random`;
+        # mit einem Seed sieht jedes Match (z.B. ein Export) gleich aus
+        self.rng = np.random.default_rng(seed)
+        # Speicher eliminierter Bälle wird von den Partikelsystemen der anderen wiederverwendet
+        self.particle_pool = ParticlePool()
+        if step_frames < 1:
+            raise ValueError("step_frames must be at least 1")
+        if continuous is None:
+            continuous = step_frames > 1
+        if step_frames != 1 and not continuous:
+            raise ValueError("step_frames > 1 requires continuous collisions")
+        self.step_frames = step_frames
+        self.continuous = continuous
+        # Misst die Phasen von step(), wenn ein FrameProfiler gesetzt ist
+        self.profiler = NULL_PROFILER
+        self.frame = 0
+
+        # Liste für fallende Quadrate (nur solange sie sich bewegen)
+        self.falling_squares: List[dict] = []
+        # Zur Ruhe gekommene Quadrate, bis der Renderer sie abholt
+        self.settled_squares: List[dict] = []
+
+        # Hexagone (nach dem Seeden erstellt, da sie Zufallswerte ziehen)
+        self.hexagons = layout()
+        # Index über die Hexagone, damit jeder Ball nur die nahen Hexagone prüft
+        self.obstacles = ObstacleIndex(self.hexagons)
+
+        self.balls = [self.spawn_ball(color) for color in COLORS]
+        for ball in self.balls:
+            ball.effects = effects
+            ball.particles.rng = self.rng
+            ball.particles.pool = self.particle_pool
+            # Effekt-Grenzen eines QualityGovernors für alle Partikelsysteme des Matches
+            if budget is not None:
+                ball.particles.budget = budget
+
+        # Broad Phase für Ball-Ball-Kollisionen (Zellgröße = Balldurchmesser)
+        self.collision_grid = SpatialHash.for_balls(self.balls)
+
+        # Liste für eliminierte Bälle
+        self.eliminated_balls: List[Ball] = []
+
+    def spawn_ball(self, color) -> Ball:
+        # Versuche maximal 100 Mal, eine gültige Position zu finden
+        for _ in range(100):
+            # Generiere eine zufällige Position
+            x = random.randint(50, WIDTH-50)
+            y = random.randint(50, HEIGHT-50)
+
+            # Prüfe, ob diese Position mit einem Hexagon kollidiert
+            temp_ball = Ball(x, y, color)
+            nearby = self.obstacles.nearby(x, y, temp_ball.radius)
+            if not any(hexagon.check_collision(temp_ball) for hexagon in nearby):
+                return temp_ball
+
+        # Wenn keine gültige Position gefunden wurde, platziere den Ball in der Mitte
+        return Ball(WIDTH//2, HEIGHT//2, color)
+
+    @property
+    def time(self) -> float:
+        # Simulationszeit in Sekunden
+        return self.frame * STEP
+
+    @property
+    def winner(self) -> Optional[Ball]:
+        if len(self.balls) == 1 and not self.balls[0].is_exploding:
+            return self.balls[0]
+        return None
+
+    def step(self) -> List[Ball]:
+        # Advances the match by step_frames frames and returns the balls eliminated in it
+        eliminated = []
+        frames = self.step_frames
+        profiler = self.profiler
+
+        # Update hexagons rotation
+        time = (self.frame + frames) * STEP
+        for hexagon in self.hexagons:
+            hexagon.update(time, frames)
+        self.obstacles.refresh()
+        profiler.lap('hexagons')
+
+        # Update ball positions (bei kontinuierlicher Kollision erst weiter unten)
+        for ball in self.balls:
+            if self.continuous:
+                ball.begin_step()
+            else:
+                ball.move()
+            # Verschiebe fallende Quadrate in die globale Liste
+            if ball.falling_squares:
+                self.falling_squares.extend(ball.falling_squares)
+                ball.falling_squares.clear()
+        profiler.lap('balls')
+
+        for ball in self.balls[:]:  # Kopie der Liste für sichere Iteration
+            ball.update_particles()
+            if ball.update(frames):  # Wenn True, ist die Explosion fertig
+                self.eliminated_balls.append(ball)  # Füge eliminierten Ball zur Liste hinzu
+                self.balls.remove(ball)
+                ball.particles.release()  # Partikel-Speicher geht zurück in den Pool
+                eliminated.append(ball)
+        profiler.lap('particles')
+
+        self.update_falling_squares()
+        profiler.lap('falling_squares')
+
+        if self.continuous:
+            # Bewegung mit Wand-, Ball- und Hexagon-Kollisionen in zeitlicher Reihenfolge
+            advance_balls_swept(self.balls, self.obstacles, frames)
+        else:
+            # Check collisions between balls
+            resolve_ball_collisions(self.balls, self.collision_grid)
+
+            # Überprüfe Kollisionen mit Hexagonen (Bälle prallen nur ab, kein Schaden)
+            for ball in self.balls:
+                for hexagon in self.obstacles.nearby(ball.x, ball.y, ball.radius):
+                    hexagon.check_collision(ball)
+        profiler.lap('collisions')
+
+        self.frame += frames
+        return eliminated
+
+    def take_settled_squares(self) -> List[dict]:
+        # Returns the squares that came to rest since the last call; they are
+        # no longer part of falling_squares and never move again
+        settled = self.settled_squares
+        self.settled_squares = []
+        return settled
+
+    def update_falling_squares(self):
+        update_falling_squares(self.falling_squares, self.settled_squares)
+
+
+def update_falling_squares(falling_squares: List[dict], settled_squares: List[dict]):
+    # Bewegt die fallenden Quadrate; zur Ruhe gekommene wandern nach settled_squares
+    settled = False
+    for square in falling_squares:
+        if not square['is_resting']:
+            # Füge Gravitation hinzu
+            square['dy'] += square['gravity']
+
+            # Bewege das Quadrat
+            square['x'] += square['dx']
+            square['y'] += square['dy']
+
+            # Rotiere das Quadrat
+            square['rotation'] += square['rotation_speed']
+
+            # Prüfe Kollision mit dem Boden
+            if square['y'] + square['size']/2 >= HEIGHT:
+                square['y'] = HEIGHT - square['size']/2
+
+                # Wenn die Geschwindigkeit sehr klein ist, lasse das Quadrat liegen
+                if abs(square['dy']) < 2:
+                    square['is_resting'] = True
+                    square['dx'] = 0
+                    square['dy'] = 0
+                    square['rotation_speed'] = 0  # Stoppe die Rotation
+                    settled = True
+                else:
+                    # Bounce mit Energieverlust
+                    square['dy'] = -square['dy'] * square['bounce_factor']
+                    square['dx'] *= 0.8  # Reibung
+
+            # Prüfe Kollision mit den Wänden
+            if square['x'] - square['size']/2 <= 0:
+                square['x'] = square['size']/2
+                square['dx'] = abs(square['dx']) * square['bounce_factor']
+            elif square['x'] + square['size']/2 >= WIDTH:
+                square['x'] = WIDTH - square['size']/2
+                square['dx'] = -abs(square['dx']) * square['bounce_factor']
+
+    # Ruhende Quadrate aus der Liste der bewegten Quadrate entfernen
+    if settled:
+        settled_squares.extend(square for square in falling_squares if square['is_resting'])
+        falling_squares[:] = [square for square in falling_squares if not square['is_resting']]
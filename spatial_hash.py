@@ -0,0 +1,137 @@
+from bisect import insort
+from typing import Dict, Iterator, List, Optional, Tuple
+from ball import Ball
+from hexagon import Hexagon, HEXAGON_MAX_PULSE
+
+# Forward neighbours of a cell, so every pair of neighbouring cells is visited once
+NEIGHBOUR_OFFSETS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class SpatialHash:
+    """Uniform grid broad phase for ball-ball collisions.
+
+    Each ball is stored in the cell that contains its center. With a cell size
+    of at least one ball diameter, two balls can only touch if their cells are
+    identical or adjacent, so only those pairs are handed to the narrow phase.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[Ball]] = {}
+
+    @classmethod
+    def for_balls(cls, balls: List[Ball]) -> 'SpatialHash':
+        # Cell size derived from the largest ball diameter
+        max_radius = max((ball.radius for ball in balls), default=20)
+        return cls(max_radius * 2)
+
+    def rebuild(self, balls: List[Ball]):
+        self.cells.clear()
+        cell_size = self.cell_size
+        for ball in balls:
+            if ball.is_exploding:
+                continue
+            key = (int(ball.x // cell_size), int(ball.y // cell_size))
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [ball]
+            else:
+                cell.append(ball)
+
+    def candidate_pairs(self) -> Iterator[Tuple[Ball, Ball]]:
+        cells = self.cells
+        for (cx, cy), cell in list(cells.items()):
+            # Pairs inside the same cell
+            for i in range(len(cell)):
+                for j in range(i + 1, len(cell)):
+                    yield cell[i], cell[j]
+
+            # Pairs with the neighbouring cells
+            for ox, oy in NEIGHBOUR_OFFSETS:
+                other_cell = cells.get((cx + ox, cy + oy))
+                if other_cell is None:
+                    continue
+                for ball in cell:
+                    for other in other_cell:
+                        yield ball, other
+
+
+def resolve_ball_collisions(balls: List[Ball], grid: SpatialHash) -> int:
+    # Count active balls once and keep the count up to date while hits explode balls
+    num_active_balls = sum(1 for ball in balls if not ball.is_exploding)
+    grid.rebuild(balls)
+    for ball, other in grid.candidate_pairs():
+        if ball.is_exploding or other.is_exploding:
+            continue
+        if ball.check_collision(other, num_active_balls):
+            num_active_balls -= ball.is_exploding + other.is_exploding
+    return num_active_balls
+
+
+class ObstacleIndex:
+    """Uniform grid over the bounding circles of static hexagons.
+
+    Each hexagon is stored in every cell its bounding circle overlaps, so a
+    ball only has to test the hexagons registered in the cells it touches.
+    Hexagons don't move, only their radius pulses; they are indexed with
+    their largest radius and re-inserted by `refresh()` should they ever
+    grow beyond it.
+    """
+
+    def __init__(self, hexagons: List[Hexagon], cell_size: Optional[float] = None):
+        self.hexagons = hexagons
+        if cell_size is None:
+            # Cell size derived from the largest hexagon bounding circle
+            cell_size = 2 * max((self.max_radius(h) for h in hexagons), default=HEXAGON_MAX_PULSE * 40)
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.indexed_radius: List[float] = []
+        for index, hexagon in enumerate(hexagons):
+            self.indexed_radius.append(self.max_radius(hexagon))
+            self._insert(index)
+
+    @staticmethod
+    def max_radius(hexagon: Hexagon) -> float:
+        return max(hexagon.radius, hexagon.size * HEXAGON_MAX_PULSE)
+
+    def _cell_range(self, x: float, y: float, radius: float):
+        cell_size = self.cell_size
+        return (int((x - radius) // cell_size), int((x + radius) // cell_size),
+                int((y - radius) // cell_size), int((y + radius) // cell_size))
+
+    def _insert(self, index: int):
+        hexagon = self.hexagons[index]
+        x0, x1, y0, y1 = self._cell_range(hexagon.center_x, hexagon.center_y, self.indexed_radius[index])
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                insort(self.cells.setdefault((cx, cy), []), index)
+
+    def _remove(self, index: int):
+        hexagon = self.hexagons[index]
+        x0, x1, y0, y1 = self._cell_range(hexagon.center_x, hexagon.center_y, self.indexed_radius[index])
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells[(cx, cy)].remove(index)
+
+    def refresh(self):
+        # Re-insert hexagons whose pulsed radius outgrew their indexed bounding circle
+        for index, hexagon in enumerate(self.hexagons):
+            if hexagon.radius > self.indexed_radius[index]:
+                self._remove(index)
+                self.indexed_radius[index] = hexagon.radius
+                self._insert(index)
+
+    def nearby_indices(self, x: float, y: float, radius: float) -> List[int]:
+        # Indices of the hexagons whose bounding circle may touch the circle at (x, y), ascending
+        x0, x1, y0, y1 = self._cell_range(x, y, radius)
+        if x0 == x1 and y0 == y1:
+            return self.cells.get((x0, y0), [])
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                found.update(self.cells.get((cx, cy), ()))
+        return sorted(found)
+
+    def nearby(self, x: float, y: float, radius: float) -> List[Hexagon]:
+        # Hexagons whose bounding circle may touch the circle at (x, y), in list order
+        return [self.hexagons[index] for index in self.nearby_indices(x, y, radius)]
@@ -0,0 +1,282 @@
+import math
+import pygame
+from collections import OrderedDict
+from typing import Tuple
+from palette import PALETTE
+from constants import WHITE, BLACK
+from hexagon import HEXAGON_MIN_PULSE, HEXAGON_MAX_PULSE, GLOW_FACTOR, corner_rings, draw_body
+
+
+class SurfaceCache:
+    """LRU cache for the small SRCALPHA surfaces drawn every frame.
+
+    Surfaces are keyed by (shape, size, color, quantized alpha). `hits`,
+    `misses` and `evictions` count cache traffic so `max_entries` and
+    `alpha_step` can be tuned.
+    """
+
+    def __init__(self, max_entries: int = 4096, alpha_step: int = 8):
+        self.max_entries = max_entries
+        self.alpha_step = alpha_step
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._surfaces: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> str:
+        return (f"{len(self)}/{self.max_entries} surfaces, {self.hits} hits, "
+                f"{self.misses} misses ({self.hit_rate * 100:.1f}% hits), {self.evictions} evictions")
+
+    def quantize_alpha(self, alpha: float) -> int:
+        step = self.alpha_step
+        return max(0, min(255, int(alpha + step // 2) // step * step))
+
+    def _lookup(self, key):
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+        return surface
+
+    def _store(self, key, surface: pygame.Surface) -> pygame.Surface:
+        self.misses += 1
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def rect(self, width: int, height: int, color: Tuple[int, int, int], alpha: float = 255) -> pygame.Surface:
+        alpha = self.quantize_alpha(alpha)
+        key = ('rect', width, height, color, alpha)
+        surface = self._lookup(key)
+        if surface is None:
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            surface.fill((*color, alpha))
+            surface = self._store(key, surface)
+        return surface
+
+
+class RotatedSpriteAtlas:
+    """Pre-rotated sprites of the falling squares.
+
+    For every (size, color) the square is rotated once into `steps` angles
+    (built on first use), so drawing a square is a lookup plus one blit.
+    """
+
+    def __init__(self, steps: int = 72):
+        self.steps = steps  # Angular resolution: 360 / steps degrees
+        self._sprites = {}
+
+    def __len__(self) -> int:
+        return len(self._sprites) * self.steps
+
+    def _build(self, size: int, color: Tuple[int, int, int]):
+        # Square in the middle of a surface twice its size, as drawn before
+        square_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        pygame.draw.rect(square_surface, color, (size/2, size/2, size, size))
+        return [pygame.transform.rotate(square_surface, i * 360 / self.steps)
+                for i in range(self.steps)]
+
+    def get(self, size: int, color: Tuple[int, int, int], rotation: float) -> pygame.Surface:
+        # rotation in radians, like the 'rotation' of a falling square
+        key = (size, color)
+        sprites = self._sprites.get(key)
+        if sprites is None:
+            sprites = self._sprites[key] = self._build(size, color)
+        index = round(math.degrees(rotation) * self.steps / 360) % self.steps
+        return sprites[index]
+
+
+class BallSpriteCache:
+    """One composed sprite per ball: shell, darkened body and cracks.
+
+    A ball only looks different after `take_damage()`, so its sprite is
+    rebuilt when radius, color, damage or the number of cracks change and
+    is otherwise blitted as is. Cracks are drawn from the sprite's center,
+    so their end points can differ by a pixel from lines drawn at the
+    ball's fractional position.
+    """
+
+    def __init__(self, shell_width: int = 6, shell_alpha: int = 255):
+        self.shell_width = shell_width
+        self.shell_alpha = shell_alpha
+        self.builds = 0
+        self._sprites = {}  # ball -> (state, sprite, half size)
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def discard(self, ball):
+        self._sprites.pop(ball, None)
+
+    def _build(self, ball) -> Tuple[pygame.Surface, int]:
+        damage_percentage = ball.damage / ball.health
+        shell_radius = ball.radius + self.shell_width
+        length = ball.radius * (0.5 + damage_percentage)
+        # The cracks (3 pixels wide) may reach out of the shell
+        half = max(shell_radius, int(length) + 2)
+        sprite = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
+        center = (half, half)
+
+        pygame.draw.circle(sprite, (*PALETTE.shell(ball.color), self.shell_alpha), center, shell_radius)
+        pygame.draw.circle(sprite, PALETTE.damaged(ball.color, ball.damage, ball.health), center, ball.radius)
+        for angle in ball.crack_angles:
+            end = (int(half + math.cos(angle) * length), int(half + math.sin(angle) * length))
+            # White highlight under a thicker black line
+            pygame.draw.line(sprite, WHITE, center, end, 1)
+            pygame.draw.line(sprite, BLACK, center, end, 3)
+        self.builds += 1
+        return sprite, half
+
+    def get(self, ball) -> Tuple[pygame.Surface, int]:
+        # Sprite and the distance from its top left corner to the ball's center
+        state = (ball.radius, ball.color, ball.damage, ball.health, len(ball.crack_angles))
+        entry = self._sprites.get(ball)
+        if entry is None or entry[0] != state:
+            sprite, half = self._build(ball)
+            entry = self._sprites[ball] = (state, sprite, half)
+        return entry[1], entry[2]
+
+
+def _corner_bounds(corners, margin: int) -> pygame.Rect:
+    # Pixels covered by a polygon through these (whole pixel) corners
+    xs = [x for x, _ in corners]
+    ys = [y for _, y in corners]
+    return pygame.Rect(min(xs) - margin, min(ys) - margin,
+                       max(xs) - min(xs) + 2 * margin + 1, max(ys) - min(ys) + 2 * margin + 1)
+
+
+class HexagonFrameBank:
+    """Pre-rendered hexagon frames, so a hexagon is drawn with one blit.
+
+    A hexagon's look depends on its size and colors, its rotation and
+    pulse, and the fractional part of its position (pixel rounding).
+    Rotation and pulse are quantized so that no corner moves by more than
+    `max_error` pixels, half of it for each. pygame truncates vertex
+    coordinates, so every drawn corner stays within one pixel of the
+    corner `Hexagon.draw()` would use. Frames cover the full 360°: the
+    glow is clipped to a box that does not turn with the hexagon, so the
+    60° symmetry of the shape cannot be used.
+
+    Frames are drawn on first use, cropped to their visible pixels and
+    RLE encoded, which makes the blit about ten times cheaper than a plain
+    per-pixel alpha blit. The least recently used ones are dropped once
+    all frames together take more than `max_bytes`; the default holds
+    every frame of the game's five size-40 hexagons (about 80 MB).
+    """
+
+    def __init__(self, max_bytes: int = 96 * 1024 * 1024, max_error: float = 1.0):
+        self.max_bytes = max_bytes
+        self.max_error = max_error
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._steps = {}  # size -> (rotation steps, pulse steps)
+        self._frames: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return (f"{len(self)} frames, {self.bytes / 2**20:.1f}/{self.max_bytes / 2**20:.0f} MiB, "
+                f"{self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hits), {self.evictions} evictions")
+
+    def steps(self, size: int) -> Tuple[int, int]:
+        steps = self._steps.get(size)
+        if steps is None:
+            shift = self.max_error / 2
+            # The glow corners are farthest out and move the most
+            reach = size * HEXAGON_MAX_PULSE * GLOW_FACTOR
+            # Half a rotation step turns them by at most `shift` pixels ...
+            rotation_steps = math.ceil(math.pi * reach / shift)
+            # ... and half a pulse step moves them outward by at most `shift`
+            pulse_range = (HEXAGON_MAX_PULSE - HEXAGON_MIN_PULSE) * size * GLOW_FACTOR
+            pulse_steps = math.ceil(pulse_range / (2 * shift)) + 1
+            steps = self._steps[size] = (rotation_steps, pulse_steps)
+        return steps
+
+    def _indices(self, hexagon) -> Tuple[int, int]:
+        rotation_steps, pulse_steps = self.steps(hexagon.size)
+        rotation_index = round(hexagon.rotation * rotation_steps / 360) % rotation_steps
+        pulse_index = round((hexagon.pulse - HEXAGON_MIN_PULSE) / (HEXAGON_MAX_PULSE - HEXAGON_MIN_PULSE)
+                            * (pulse_steps - 1))
+        return rotation_index, max(0, min(pulse_steps - 1, pulse_index))
+
+    def pose(self, hexagon) -> Tuple[float, float]:
+        # Rotation and pulse of the frame drawn for this hexagon
+        rotation_steps, pulse_steps = self.steps(hexagon.size)
+        rotation_index, pulse_index = self._indices(hexagon)
+        return (rotation_index * 360 / rotation_steps,
+                HEXAGON_MIN_PULSE + (HEXAGON_MAX_PULSE - HEXAGON_MIN_PULSE) * pulse_index / (pulse_steps - 1))
+
+    def _build(self, hexagon, rotation: float, pulse: float, left: int, top: int):
+        # Drawn at the hexagon's place on screen with (left, top) as the frame's origin.
+        # pygame truncates coordinates, so the corners are truncated in screen space first:
+        # at the quantized pose the frame has the same pixels as Hexagon.draw()
+        size = hexagon.size
+        angle = math.radians(rotation)
+        corners = corner_rings(hexagon.center_x, hexagon.center_y, size * pulse, math.cos(angle), math.sin(angle))
+        pad = math.ceil(size * HEXAGON_MAX_PULSE * GLOW_FACTOR - size / 2) + 3
+        frame = pygame.Surface((2 * pad + size + 1, 2 * pad + size + 1), pygame.SRCALPHA)
+        origin_x = left - pad
+        origin_y = top - pad
+
+        def local(points):
+            return [(int(x) - origin_x, int(y) - origin_y) for x, y in points]
+
+        # Glow as in Hexagon.draw(): on a surface of its own, blitted at a truncated
+        # position and clipped to it. Drawn directly (not blitted) so that it keeps
+        # its alpha for the screen blit.
+        glow_x = int(hexagon.x - size * 0.1)
+        glow_y = int(hexagon.y - size * 0.1)
+        glow_clip = pygame.Rect(glow_x - origin_x, glow_y - origin_y, int(size * 2.2), int(size * 2.2))
+        glow_corners = [(int(x - hexagon.x + size * 0.1) + glow_clip.x, int(y - hexagon.y + size * 0.1) + glow_clip.y)
+                        for x, y in corners[GLOW_FACTOR]]
+        frame.set_clip(glow_clip)
+        pygame.draw.polygon(frame, (*hexagon.glow_color, 30), glow_corners)
+        frame.set_clip(None)
+
+        outer_corners = local(corners[1.0])
+        draw_body(frame, outer_corners, local(corners[0.5]), hexagon.base_color, hexagon.inner_color)
+
+        # Only the drawn pixels (the outlines reach up to 2 pixels past the corners);
+        # RLE skips the transparent runs when blitting
+        visible = _corner_bounds(outer_corners, 2).union(_corner_bounds(glow_corners, 0).clip(glow_clip))
+        visible = visible.clip(frame.get_rect())
+        frame = frame.subsurface(visible).copy()
+        frame.set_alpha(255, pygame.RLEACCEL)
+        return frame, visible.x - pad, visible.y - pad
+
+    def get(self, hexagon) -> Tuple[pygame.Surface, int, int]:
+        # Frame and its top left corner on screen
+        left = math.floor(hexagon.x)
+        top = math.floor(hexagon.y)
+        key = (hexagon.size, hexagon.base_color, hexagon.glow_color, hexagon.inner_color,
+               round(hexagon.x - left, 3), round(hexagon.y - top, 3), *self._indices(hexagon))
+        entry = self._frames.get(key)
+        if entry is not None:
+            self._frames.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = self._frames[key] = self._build(hexagon, *self.pose(hexagon), left, top)
+            frame = entry[0]
+            self.bytes += frame.get_width() * frame.get_height() * frame.get_bytesize()
+            while self.bytes > self.max_bytes and len(self._frames) > 1:
+                _, (old, _, _) = self._frames.popitem(last=False)
+                self.bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+                self.evictions += 1
+        frame, offset_x, offset_y = entry
+        return frame, left + offset_x, top + offset_y
@@ -0,0 +1,78 @@
+import random
+import numpy as np
+import pytest
+from ball import Ball
+from ball_engine import BallEngine
+from constants import WIDTH, HEIGHT, COLORS
+
+N = 200
+STEPS = 300
+
+
+def make_balls(effects, seed=3):
+    # The same balls on every call; small radius so that many hit the walls
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    balls = []
+    for i in range(N):
+        ball = Ball(random.uniform(10, WIDTH - 10), random.uniform(10, HEIGHT - 10), COLORS[i % len(COLORS)])
+        ball.radius = 10
+        ball.effects = effects
+        ball.particles.rng = rng
+        balls.append(ball)
+    return balls
+
+
+def assert_same_balls(views, balls):
+    assert [view.x for view in views] == [ball.x for ball in balls]
+    assert [view.y for view in views] == [ball.y for ball in balls]
+    assert [view.prev_x for view in views] == [ball.prev_x for ball in balls]
+    assert [view.dx for view in views] == [ball.dx for ball in balls]
+    assert [view.dy for view in views] == [ball.dy for ball in balls]
+    assert [view.survival_time for view in views] == [ball.survival_time for ball in balls]
+    assert [view.trail for view in views] == [list(ball.trail) for ball in balls]
+
+
+@pytest.mark.parametrize('effects', [False, True])
+def test_moves_like_ball_move(effects):
+    balls = make_balls(effects)
+    engine = BallEngine(make_balls(effects))
+    views = engine.views
+
+    for _ in range(STEPS):
+        engine.move()
+        engine.update()
+        for ball in balls:
+            ball.move()
+            ball.update()
+        assert_same_balls(views, balls)
+
+    # Wall bounces emit the same particles from the same generator
+    for view, ball in zip(views, balls):
+        n = len(ball.particles)
+        assert len(view.particles) == n
+        np.testing.assert_array_equal(view.particles.pos[:n], ball.particles.pos[:n])
+    if effects:
+        assert sum(len(ball.particles) for ball in balls) > 0
+        assert all(len(ball.trail) == ball.trail_length for ball in balls)
+
+
+def test_removed_balls_stay_where_they_are():
+    balls = make_balls(True)
+    engine = BallEngine(make_balls(True))
+    views = engine.views
+    for step in range(STEPS):
+        if step == 100:
+            for view in views[::10]:
+                engine.remove(view)
+        engine.move()
+        engine.update()
+        # A ball that left the match is no longer moved, like in Match.step()
+        for i, ball in enumerate(balls):
+            if step < 100 or i % 10:
+                ball.move()
+                ball.update()
+
+    assert not engine.active[::10].any()
+    assert engine.active.sum() == N - len(views[::10])
+    assert_same_balls(views, balls)
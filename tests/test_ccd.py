@@ -0,0 +1,113 @@
+import pytest
+from collections import Counter
+import ccd
+from ball import Ball
+from ccd import SweptStep
+from simulation import Match, field_layout
+from constants import WIDTH, HEIGHT, COLORS
+
+# Pixels a ball may overlap a wall or hexagon edge (contacts are exact up to rounding)
+TOLERANCE = 0.5
+
+
+def in_arena(ball) -> bool:
+    r = ball.radius - TOLERANCE
+    return r <= ball.x <= WIDTH - r and r <= ball.y <= HEIGHT - r
+
+
+def in_hexagon(match, ball) -> bool:
+    for hexagon in match.hexagons:
+        contact = hexagon.boundary_distance(ball.x, ball.y)
+        if contact is None or contact[0] < ball.radius - TOLERANCE:
+            return True
+    return False
+
+
+def crowded_match(seed, step_frames, num_balls=120) -> Match:
+    # Dense hexagon field and many balls, some of them overlapping at spawn
+    match = Match(seed, effects=False, step_frames=step_frames, layout=field_layout)
+    while len(match.balls) < num_balls:
+        ball = match.spawn_ball(COLORS[len(match.balls) % len(COLORS)])
+        ball.effects = False
+        match.balls.append(ball)
+    return match
+
+
+def run_checked(match, max_frames):
+    # Steps the match and checks that no ball leaves the arena or newly enters a hexagon
+    inside = {id(ball): in_hexagon(match, ball) for ball in match.balls}
+    while match.winner is None and match.balls and match.frame < max_frames:
+        match.step()
+        for ball in match.balls:
+            if ball.is_exploding:
+                continue
+            assert in_arena(ball), (match.frame, ball.x, ball.y)
+            now_inside = in_hexagon(match, ball)
+            assert not now_inside or inside[id(ball)], (match.frame, ball.x, ball.y)
+            inside[id(ball)] = now_inside
+
+
+@pytest.mark.parametrize('step_frames', [1, 4, 8])
+@pytest.mark.parametrize('seed', range(4))
+def test_coarse_steps_keep_balls_in_arena_and_out_of_hexagons(seed, step_frames):
+    run_checked(Match(seed, effects=False, step_frames=step_frames, continuous=True), 60 * 60 * 2)
+
+
+def test_balls_out_of_contacts_stop_inside_the_arena(monkeypatch):
+    stops = []
+    stop = SweptStep.stop
+    monkeypatch.setattr(SweptStep, 'stop', lambda self, *args: (stops.append(args), stop(self, *args)))
+    run_checked(crowded_match(0, 16), 16 * 20)
+    assert stops  # The contact cap was reached
+
+
+def test_step_out_of_events_leaves_balls_inside_the_arena():
+    match = crowded_match(1, 16)
+    inside = {id(ball): in_hexagon(match, ball) for ball in match.balls}
+    step = SweptStep(match.balls, match.obstacles, 16, len(match.balls))
+    step.run(max_events=10)
+
+    assert any(step.stopped)
+    for ball in match.balls:
+        assert in_arena(ball)
+        assert not in_hexagon(match, ball) or inside[id(ball)]
+
+
+def test_contact_cap_applies_to_single_frame_steps(monkeypatch):
+    monkeypatch.setattr(ccd, 'MAX_CONTACTS_PER_BALL', 1)
+    run_checked(Match(2, effects=False, continuous=True), 60 * 20)
+
+
+def test_pairs_deal_damage_once_per_step(monkeypatch):
+    match = crowded_match(0, 16)
+    contacts, hits = Counter(), Counter()
+    collide, take_collision_damage = Ball.collide, Ball.take_collision_damage
+
+    def counted_collide(ball, other, *args, **kwargs):
+        contacts[match.frame, frozenset((id(ball), id(other)))] += 1
+        collide(ball, other, *args, **kwargs)
+
+    def counted_damage(ball, other, *args):
+        hits[match.frame, frozenset((id(ball), id(other)))] += 1
+        take_collision_damage(ball, other, *args)
+
+    monkeypatch.setattr(Ball, 'collide', counted_collide)
+    monkeypatch.setattr(Ball, 'take_collision_damage', counted_damage)
+    for _ in range(20):
+        match.step()
+    assert max(contacts.values()) > 1  # Some pairs met more than once in a step
+    assert set(hits) == set(contacts)
+    assert max(hits.values()) == 1
+
+
+def test_continuous_collisions_only_for_coarse_steps():
+    assert not Match(0).continuous
+    assert Match(0, step_frames=4).continuous
+    assert Match(0, continuous=True).continuous
+    with pytest.raises(ValueError):
+        Match(0, step_frames=4, continuous=False)
+
+
+def test_step_frames_must_be_positive():
+    with pytest.raises(ValueError):
+        Match(0, step_frames=0)
@@ -0,0 +1,62 @@
+import hashlib
+import numpy as np
+import pygame
+import pytest
+from renderer import Renderer, Window
+from simulation import Match
+from constants import WIDTH, HEIGHT
+
+FRAMES = 400
+
+
+def render(seed, dirty_rects):
+    # Hash of every frame; matches share `random`, so they run one after the other
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    match = Match(seed)
+    renderer = Renderer(screen, match, dirty_rects)
+    hashes = []
+    for frame in range(FRAMES):
+        renderer.after_step(match.step())
+        renderer.draw((frame % 4 + 1) / 4)  # Also between two physics steps
+        hashes.append(hashlib.sha1(pygame.image.tobytes(screen, 'RGB')).hexdigest())
+    return hashes
+
+
+@pytest.mark.parametrize('seed', [3, 5])
+def test_dirty_rects_give_the_same_frames(seed):
+    pygame.init()
+    try:
+        full = render(seed, False)
+        dirty = render(seed, True)
+    finally:
+        pygame.quit()
+    mismatches = [frame for frame, (a, b) in enumerate(zip(full, dirty)) if a != b]
+    assert not mismatches, f"first differing frame: {mismatches[0]}"
+
+
+@pytest.mark.parametrize('size', [(640, 480), (432, 324)])
+def test_scaled_dirty_rects_match_scaled_frames(size):
+    # A window smaller than the arena scales only the dirty rectangles
+    pygame.init()
+    try:
+        window = Window((WIDTH, HEIGHT), size=size)
+        assert window.dirty_rects
+        match = Match(3)
+        renderer = Renderer(window.surface, match, True)
+        for _ in range(200):
+            renderer.after_step(match.step())
+            window.present(renderer.draw())
+            expected = pygame.transform.smoothscale(window.surface, size)
+            diff = np.abs(pygame.surfarray.array3d(window.display).astype(int)
+                          - pygame.surfarray.array3d(expected).astype(int))
+            assert diff.max() <= 8  # Rounding in the filter only
+    finally:
+        pygame.quit()
+
+
+def test_larger_window_presents_full_frames():
+    pygame.init()
+    try:
+        assert not Window((WIDTH, HEIGHT), size=(WIDTH * 4 // 3, HEIGHT * 4 // 3)).dirty_rects
+    finally:
+        pygame.quit()
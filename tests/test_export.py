@@ -0,0 +1,12 @@
+from export import export_match
+
+
+def test_seed_gives_the_same_clip(tmp_path):
+    # Particles, shards and background effects come from the seeded match
+    clips = []
+    for name in ('a.rgb', 'b.rgb'):
+        path = tmp_path / name
+        result = export_match(str(path), seed=5, size=(96, 72), max_frames=1200, threads=1)
+        clips.append(path.read_bytes())
+        assert len(clips[-1]) == result['frames'] * 96 * 72 * 3
+    assert clips[0] == clips[1]
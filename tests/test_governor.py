@@ -0,0 +1,22 @@
+from governor import QualityGovernor, QUALITY_LEVELS
+from simulation import Match
+
+
+def test_budget_only_limits_the_match_it_is_handed_to():
+    governor = QualityGovernor(16.0, down_frames=1)
+    governed = Match(0, budget=governor.budget)
+    other = Match(0)
+    for _ in range(len(QUALITY_LEVELS)):
+        governor.update(100.0)
+    assert governor.name == 'minimal'
+
+    for ball in governed.balls:
+        assert ball.particles.budget is governor.budget
+    for ball in other.balls:
+        assert ball.particles.budget.emission == 1.0
+        assert ball.particles.budget.max_particles is None
+
+    # Emission is thinned out only in the governed match
+    governed.balls[0].create_particles()
+    other.balls[0].create_particles()
+    assert len(governed.balls[0].particles) < len(other.balls[0].particles)
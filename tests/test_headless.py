@@ -0,0 +1,25 @@
+import pygame
+from headless import run_match
+from renderer import Renderer
+from rankings import COLOR_NAMES
+from simulation import Match
+from constants import WIDTH, HEIGHT
+
+
+def test_seed_gives_the_same_match_with_rendering():
+    # The game loop: effects on and every step drawn, against a headless run
+    seed = 7
+    headless = run_match(seed)
+
+    pygame.init()
+    try:
+        match = Match(seed)
+        renderer = Renderer(pygame.Surface((WIDTH, HEIGHT)), match)
+        while match.winner is None and match.balls:
+            renderer.after_step(match.step())
+            renderer.draw()
+    finally:
+        pygame.quit()
+
+    assert match.frame == headless['frames']
+    assert COLOR_NAMES[match.winner.color] == headless['winner']
@@ -0,0 +1,77 @@
+import math
+import random
+import numpy as np
+import pygame
+import pytest
+from hexagon import Hexagon, GLOW_FACTOR
+from sprite_cache import HexagonFrameBank
+
+SIZES = [20, 40, 80]
+POSITIONS = [(100, 100), (100.5, 99.25)]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def display():
+    pygame.display.init()
+    yield
+    pygame.display.quit()
+
+
+def states(seed, count=40):
+    rng = random.Random(seed)
+    return [(rng.uniform(0, 360), 1 + 0.1 * math.sin(rng.uniform(0, 2 * math.pi))) for _ in range(count)]
+
+
+def set_state(hexagon, rotation, pulse):
+    hexagon.rotation = rotation
+    hexagon.pulse = pulse
+    hexagon.refresh_geometry()
+
+
+def render(hexagon, frames=None):
+    screen = pygame.Surface((400, 400))
+    hexagon.draw(screen, frames)
+    return pygame.image.tobytes(screen, 'RGB')
+
+
+def drawn_corners(hexagon):
+    # Whole pixel corners Hexagon.draw() hands to pygame (which truncates), in screen space
+    glow_x = int(hexagon.x - hexagon.size * 0.1)
+    glow_y = int(hexagon.y - hexagon.size * 0.1)
+    glow = [(int(x - hexagon.x + hexagon.size * 0.1) + glow_x, int(y - hexagon.y + hexagon.size * 0.1) + glow_y)
+            for x, y in hexagon.get_corners(GLOW_FACTOR)]
+    body = [(int(x), int(y)) for x, y in hexagon.get_corners() + hexagon.get_inner_corners()]
+    return np.array(glow + body)
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('position', POSITIONS)
+def test_frame_matches_reference_at_its_pose(size, position):
+    frames = HexagonFrameBank(max_bytes=2 ** 40)
+    hexagon = Hexagon(*position, size)
+    for rotation, pulse in states(size):
+        set_state(hexagon, rotation, pulse)
+        set_state(hexagon, *frames.pose(hexagon))
+        assert render(hexagon, frames) == render(hexagon)
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('position', POSITIONS)
+def test_frame_corners_within_one_pixel(size, position):
+    frames = HexagonFrameBank(max_bytes=2 ** 40)
+    hexagon = Hexagon(*position, size)
+    for rotation, pulse in states(size, 500):
+        set_state(hexagon, rotation, pulse)
+        reference = drawn_corners(hexagon)
+        set_state(hexagon, *frames.pose(hexagon))
+        assert np.abs(drawn_corners(hexagon) - reference).max() <= 1
+
+
+def test_frames_evicted_above_memory_cap():
+    frames = HexagonFrameBank(max_bytes=1024 * 1024)
+    hexagon = Hexagon(100, 100, 40)
+    for rotation in range(0, 360, 2):
+        set_state(hexagon, rotation, 1.0)
+        frames.get(hexagon)
+    assert frames.evictions > 0
+    assert frames.bytes <= frames.max_bytes
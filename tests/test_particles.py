@@ -0,0 +1,93 @@
+import math
+import numpy as np
+import pytest
+from particles import ParticleSystem, PULSE, SPIRAL, SHOCKWAVE
+
+
+def reference_update(particles):
+    # The per-dict loop ParticleSystem replaced (Ball.update_particles before
+    # the NumPy system), for normal, pulse, spiral and shockwave particles
+    for particle in particles[:]:
+        if 'speed_decay' in particle:
+            particle['dx'] *= particle['speed_decay']
+            particle['dy'] *= particle['speed_decay']
+        particle['x'] += particle['dx']
+        particle['y'] += particle['dy']
+        particle['lifetime'] -= 1
+        if 'pulse' in particle:
+            particle['size'] = particle.get('size', 8) * (
+                0.8 + 0.4 * math.sin(particle['pulse'] + particle['lifetime'] * 0.1)
+            )
+        if 'spiral' in particle:
+            particle['angle'] += 0.1
+            particle['dx'] += math.cos(particle['angle']) * 0.2
+            particle['dy'] += math.sin(particle['angle']) * 0.2
+        if 'shockwave' in particle:
+            progress = 1 - (particle['lifetime'] / 60)
+            particle['size'] = particle['max_size'] * progress
+        if particle['lifetime'] <= 0:
+            particles.remove(particle)
+
+
+def emit_batch(system, rng, n, flags):
+    # Emits n particles of one kind into the system and returns the same particles as dicts
+    x, y = rng.uniform(0, 800, n), rng.uniform(0, 600, n)
+    dx, dy = rng.uniform(-6, 6, n), rng.uniform(-6, 6, n)
+    lifetime = rng.integers(5, 40, n)
+    size = rng.integers(1, 4, n).astype(float)
+    speed_decay = rng.uniform(0.9, 1.0, n)
+    phase = rng.uniform(0, math.pi, n)
+    max_size = rng.integers(1, 4, n).astype(float)
+    color = rng.integers(0, 256, (n, 3))
+    system.emit(x, y, dx, dy, lifetime, color, size=size, speed_decay=speed_decay,
+                flags=flags, phase=phase, max_size=max_size)
+
+    particles = []
+    for i in range(n):
+        particle = {'x': x[i], 'y': y[i], 'dx': dx[i], 'dy': dy[i], 'lifetime': int(lifetime[i]),
+                    'size': size[i], 'speed_decay': speed_decay[i]}
+        if flags & PULSE:
+            particle['pulse'] = phase[i]
+        if flags & SPIRAL:
+            particle['spiral'] = True
+            particle['angle'] = phase[i]
+        if flags & SHOCKWAVE:
+            particle['shockwave'] = True
+            particle['max_size'] = max_size[i]
+        particles.append(particle)
+    return particles
+
+
+@pytest.mark.parametrize('flags', [0, PULSE, SPIRAL, SHOCKWAVE])
+def test_matches_the_dict_particles(flags):
+    rng = np.random.default_rng(1)
+    system = ParticleSystem(capacity=8)
+    reference = emit_batch(system, rng, 50, flags)
+    assert len(system) == 50
+
+    for _ in range(45):
+        system.update()
+        reference_update(reference)
+        n = system.count
+        assert n == len(reference)
+        np.testing.assert_allclose(system.pos[:n, 0], [p['x'] for p in reference], atol=1e-9)
+        np.testing.assert_allclose(system.pos[:n, 1], [p['y'] for p in reference], atol=1e-9)
+        np.testing.assert_allclose(system.vel[:n, 0], [p['dx'] for p in reference], atol=1e-9)
+        np.testing.assert_array_equal(system.lifetime[:n], [p['lifetime'] for p in reference])
+        np.testing.assert_allclose(system.size[:n], [p['size'] for p in reference], atol=1e-9)
+    # Every lifetime is below 40, so all particles are gone
+    assert len(system) == 0
+
+
+def test_dead_particles_are_removed_and_their_rows_reused():
+    system = ParticleSystem(capacity=4)
+    system.emit(0.0, 0.0, np.ones(3), np.zeros(3), np.array([1, 3, 2]), (255, 0, 0))
+    system.update()
+    assert len(system) == 2
+    # The survivors keep their order
+    assert system.lifetime[:2].tolist() == [2, 1]
+
+    system.emit(5.0, 5.0, np.zeros(2), np.zeros(2), 10, (0, 255, 0))
+    assert len(system) == 4
+    assert system.capacity == 4
+    assert [alpha for *_, alpha in system.iter_draw()] == [38, 19, 191, 191]
@@ -0,0 +1,24 @@
+from profiler import FrameProfiler
+
+
+def run_frames(profiler, count):
+    for _ in range(count):
+        profiler.begin_frame()
+        profiler.lap('physics')
+        profiler.lap('draw')
+        profiler.end_frame({'num_balls': 6})
+
+
+def test_overlay_profiler_keeps_only_the_last_frame():
+    profiler = FrameProfiler(window=10, keep_history=False)
+    run_frames(profiler, 50)
+    assert profiler.history == []
+    assert profiler.last_frame['num_balls'] == 6
+    assert len(profiler.recent['total']) == 10
+
+
+def test_exporting_profiler_keeps_every_frame():
+    profiler = FrameProfiler(window=10)
+    run_frames(profiler, 50)
+    assert len(profiler.history) == 50
+    assert profiler.last_frame is profiler.history[-1]
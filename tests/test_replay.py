@@ -0,0 +1,70 @@
+import os
+import random
+import pytest
+from replay import ReplayRecorder, ReplayPlayer, quantize, KEYFRAME_INTERVAL
+from simulation import Match
+
+# "A few hundred KB for a full match"
+MAX_REPLAY_BYTES = 300 * 1024
+
+
+def snapshot(frame, balls, alive):
+    # Everything playback has to reproduce, positions at the recorded precision;
+    # eliminated balls are no longer shown, only their survival time counts
+    return (frame, [
+        (quantize(ball.x), quantize(ball.y), ball.damage, tuple(ball.crack_angles),
+         ball.is_exploding, ball.survival_time) if ball in alive else ball.survival_time
+        for ball in balls
+    ])
+
+
+def record(path, seed, step_frames):
+    match = Match(seed, effects=False, step_frames=step_frames)
+    recorder = ReplayRecorder(match)
+    states = [snapshot(match.frame, recorder.balls, match.balls)]
+    while match.winner is None and match.balls:
+        recorder.record(match.step())
+        states.append(snapshot(match.frame, recorder.balls, match.balls))
+    recorder.save(path)
+    return states
+
+
+def view_snapshot(player):
+    view = player.view
+    return snapshot(view.frame, view.all_balls, view.balls)
+
+
+@pytest.fixture(scope='module', params=[1, 4])
+def replay(request, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('replay') / f'match-{request.param}.bbr')
+    return path, record(path, 3, request.param)
+
+
+def test_playback_reproduces_every_state(replay):
+    path, states = replay
+    player = ReplayPlayer(path, effects=False)
+    assert player.states == len(states)
+    assert view_snapshot(player) == states[0]
+    for state in states[1:]:
+        player.step()
+        assert view_snapshot(player) == state
+
+
+def test_seeking_around_keyframes(replay):
+    path, states = replay
+    player = ReplayPlayer(path, effects=False)
+    keyframes = range(KEYFRAME_INTERVAL, len(states), KEYFRAME_INTERVAL)
+    assert keyframes
+    # Backwards as well, so that seeks have to go back to an earlier keyframe
+    targets = [state for keyframe in keyframes for state in (keyframe - 1, keyframe, keyframe + 1)]
+    targets += random.Random(0).sample(range(len(states)), 20) + [0, len(states) - 1]
+    for target in targets + targets[::-1]:
+        target = min(target, len(states) - 1)
+        player.seek(target)
+        assert player.state == target
+        assert view_snapshot(player) == states[target]
+
+
+def test_replay_stays_small(replay):
+    path, states = replay
+    assert os.path.getsize(path) < MAX_REPLAY_BYTES
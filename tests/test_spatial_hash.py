@@ -0,0 +1,116 @@
+import math
+import random
+import pytest
+from ball import Ball
+from spatial_hash import SpatialHash, resolve_ball_collisions
+from constants import BALL_SPEED
+
+RADII = [5, 12, 20, 35]
+CELL_SIZE = 2 * max(RADII)
+
+
+def make_balls(specs):
+    # specs: (x, y, radius, dx, dy, damage)
+    balls = []
+    for x, y, radius, dx, dy, damage in specs:
+        ball = Ball(x, y, (255, 0, 0))
+        ball.radius = radius
+        ball.dx, ball.dy = dx, dy
+        ball.damage = damage
+        ball.effects = False
+        balls.append(ball)
+    return balls
+
+
+def random_specs(rng, count, size=600):
+    specs = []
+    for _ in range(count):
+        angle = rng.uniform(0, 2 * math.pi)
+        specs.append((rng.uniform(0, size), rng.uniform(0, size), rng.choice(RADII),
+                      7 * math.cos(angle), 7 * math.sin(angle), rng.choice([0, 0, 9])))
+    return specs
+
+
+def edge_specs(rng, count):
+    # Centers on or next to cell edges and corners, where a missed neighbour offset shows
+    offsets = [-2, -1e-9, 0, 1e-9, 2]
+    specs = []
+    for x, y, radius, dx, dy, damage in random_specs(rng, count):
+        x = round(x / CELL_SIZE) * CELL_SIZE + rng.choice(offsets)
+        if rng.random() < 0.5:
+            y = round(y / CELL_SIZE) * CELL_SIZE + rng.choice(offsets)
+        specs.append((x, y, radius, dx, dy, damage))
+    return specs
+
+
+def touching_pairs(balls):
+    return {
+        frozenset((id(a), id(b)))
+        for i, a in enumerate(balls) for b in balls[i + 1:]
+        if math.hypot(a.x - b.x, a.y - b.y) <= a.radius + b.radius
+    }
+
+
+def state(balls):
+    # Crack angles are drawn from `random` in collision order, so only their number is compared
+    return [(ball.x, ball.y, ball.dx, ball.dy, ball.damage, len(ball.crack_angles), ball.is_exploding)
+            for ball in balls]
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('layout', [random_specs, edge_specs])
+def test_candidate_pairs_contain_every_touching_pair_once(seed, layout):
+    balls = make_balls(layout(random.Random(seed), 150))
+    grid = SpatialHash.for_balls(balls)
+    assert grid.cell_size == CELL_SIZE
+    grid.rebuild(balls)
+
+    pairs = [frozenset((id(a), id(b))) for a, b in grid.candidate_pairs()]
+    assert all(len(pair) == 2 for pair in pairs)
+    assert len(pairs) == len(set(pairs))
+    assert touching_pairs(balls) <= set(pairs)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_resolved_state_matches_all_pairs_loop(seed):
+    # Separate clusters of two touching balls, so that the order of pairs
+    # doesn't matter; some clusters straddle cell edges
+    rng = random.Random(seed)
+    specs = []
+    for row in range(6):
+        for column in range(6):
+            x = column * 5 * CELL_SIZE + rng.choice([CELL_SIZE, rng.uniform(0, 2 * CELL_SIZE)])
+            y = row * 5 * CELL_SIZE + rng.choice([CELL_SIZE, rng.uniform(0, 2 * CELL_SIZE)])
+            first, second = random_specs(rng, 2)
+            angle = rng.uniform(0, 2 * math.pi)
+            distance = (first[2] + second[2]) * rng.uniform(0.5, 1.0)
+            specs.append((x, y) + first[2:])
+            specs.append((x + distance * math.cos(angle), y + distance * math.sin(angle)) + second[2:])
+
+    assert len(touching_pairs(make_balls(specs))) == len(specs) // 2
+
+    random.seed(seed)
+    grid_balls = make_balls(specs)
+    grid = SpatialHash.for_balls(grid_balls)
+    num_active_balls = resolve_ball_collisions(grid_balls, grid)
+
+    random.seed(seed)
+    balls = make_balls(specs)
+    for i in range(len(balls)):
+        for j in range(i + 1, len(balls)):
+            balls[i].check_collision(balls[j], len(balls))
+
+    assert state(grid_balls) == state(balls)
+    assert num_active_balls == sum(1 for ball in balls if not ball.is_exploding)
+    assert num_active_balls < len(balls)  # Some hits exploded balls
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_collision_leaves_both_balls_at_ball_speed(seed):
+    rng = random.Random(seed)
+    first, second = make_balls(random_specs(rng, 2))
+    angle = rng.uniform(0, 2 * math.pi)
+    nx, ny = math.cos(angle), math.sin(angle)
+    first.collide(second, 6, nx, ny)
+    assert math.hypot(first.dx, first.dy) == pytest.approx(BALL_SPEED)
+    assert math.hypot(second.dx, second.dy) == pytest.approx(BALL_SPEED)
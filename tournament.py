@@ -0,0 +1,108 @@
+# First: headless sets the environment for windowless runs, which has to
+# happen before pygame is imported (here through rankings)
+from headless import run_match, MAX_FRAMES
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional
+from rankings import COLOR_NAMES
+
+
+def _run_batch(seeds: List[int], max_frames: int) -> List[dict]:
+    # Runs in a worker process; batches keep the IPC overhead per match low
+    return [run_match(seed, max_frames) for seed in seeds]
+
+
+def iter_results(matches: int, base_seed: int = 0, workers: Optional[int] = None,
+                 max_frames: int = MAX_FRAMES, batch_size: Optional[int] = None) -> Iterator[dict]:
+    """Run seeded headless matches on a process pool.
+
+    Match i uses the seed base_seed + i. Results are yielded as soon as their
+    batch finishes, so the order is not the seed order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if batch_size is None:
+        # Several batches per worker so that slow matches don't leave cores idle
+        batch_size = max(1, min(50, matches // (workers * 8)))
+
+    seeds = list(range(base_seed, base_seed + matches))
+    batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_batch, batch, max_frames) for batch in batches]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+class TournamentStats:
+    """Win counts and mean survival time per ball color."""
+
+    def __init__(self):
+        self.matches = 0
+        self.undecided = 0  # Matches stopped by the frame limit
+        self.elapsed = 0.0  # Wall-clock seconds
+        self.wins = {name: 0 for name in COLOR_NAMES.values()}
+        self.total_survival = {name: 0.0 for name in COLOR_NAMES.values()}
+        self.appearances = {name: 0 for name in COLOR_NAMES.values()}
+
+    def add(self, result: dict):
+        self.matches += 1
+        if result['winner'] is None:
+            self.undecided += 1
+        else:
+            self.wins[result['winner']] = self.wins.get(result['winner'], 0) + 1
+        for entry in result['ranking']:
+            name = entry['name']
+            self.total_survival[name] = self.total_survival.get(name, 0.0) + entry['survival_time']
+            self.appearances[name] = self.appearances.get(name, 0) + 1
+
+    def win_rate(self, name: str) -> float:
+        return self.wins.get(name, 0) / self.matches if self.matches else 0.0
+
+    def mean_survival(self, name: str) -> float:
+        count = self.appearances.get(name, 0)
+        return self.total_survival.get(name, 0.0) / count if count else 0.0
+
+    def table(self) -> str:
+        lines = ["Ball".ljust(8) + "Wins".rjust(8) + "Win rate".rjust(10) + "Mean time".rjust(11)]
+        for name in sorted(self.wins, key=lambda n: self.wins[n], reverse=True):
+            lines.append(name.ljust(8) + str(self.wins[name]).rjust(8) +
+                         f"{self.win_rate(name) * 100:9.1f}%" +
+                         f"{self.mean_survival(name):10.1f}s")
+        if self.undecided:
+            lines.append(f"Undecided: {self.undecided}")
+        return "\n".join(lines)
+
+
+def run_tournament(matches: int, base_seed: int = 0, workers: Optional[int] = None,
+                   max_frames: int = MAX_FRAMES, progress: bool = False) -> TournamentStats:
+    stats = TournamentStats()
+    start = time.perf_counter()
+    for result in iter_results(matches, base_seed, workers, max_frames):
+        stats.add(result)
+        if progress and (stats.matches % 100 == 0 or stats.matches == matches):
+            elapsed = time.perf_counter() - start
+            print(f"{stats.matches}/{matches} matches, {stats.matches / elapsed:.1f} matches/s",
+                  flush=True)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless matches on all cores")
+    parser.add_argument('matches', type=int, help="number of matches")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first match")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--max-frames', type=int, default=MAX_FRAMES, help="frame limit per match")
+    args = parser.parse_args()
+
+    stats = run_tournament(args.matches, args.seed, args.workers, args.max_frames, progress=True)
+    print()
+    print(stats.table())
+    print(f"\n{stats.matches} matches in {stats.elapsed:.1f}s ({stats.matches / stats.elapsed:.1f} matches/s)")
+
+
+if __name__ == "__main__":
+    main()